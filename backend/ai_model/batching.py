@@ -0,0 +1,140 @@
+# backend/ai_model/batching.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+from .mpnet_encoder import mpnet_encode
+
+# Micro-batching defaults
+MAX_BATCH_SIZE = 16
+MAX_WAIT_SECONDS = 0.05
+
+_STOP = object()
+
+
+def predict_batch(model, tokenizer, texts, max_length=512, encode_fn=mpnet_encode,
+                  return_embeddings=False):
+    """
+    Scores a list of texts with one MPNet encode and one XLM-R forward pass.
+    Inputs are padded to the longest sequence in the batch, not the model max.
+    With return_embeddings=True, returns (labels, MPNet embeddings).
+    """
+    if not texts:
+        return ([], []) if return_embeddings else []
+
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True,
+                       max_length=max_length, padding="longest")
+    mpnet_vecs = encode_fn(texts, batch_size=len(texts))
+
+    with torch.no_grad():
+        outputs = model(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            mpnet_emb=mpnet_vecs
+        )
+        logits = outputs["logits"]
+        labels = [int(label) for label in torch.argmax(logits, dim=1)]
+    if return_embeddings:
+        return labels, mpnet_vecs.cpu().numpy()
+    return labels
+
+
+class MicroBatchScorer:
+    """
+    Background scorer that groups submitted texts into batches.
+    A batch is flushed when it reaches max_batch_size or when max_wait
+    seconds have passed since its first text arrived.
+    """
+
+    def __init__(self, score_fn, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.pages = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queues a text and returns a Future resolving to its score."""
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def close(self):
+        """Flushes pending texts and stops the worker thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect(item)
+            self._score(batch)
+            if stop:
+                return
+
+    def _score(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            scores = self.score_fn(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.pages += len(batch)
+        for (_, future), score in zip(batch, scores):
+            future.set_result(score)
+
+
+def benchmark(predict_fn, texts, batch_sizes=(1, 2, 4, 8, 16, 32)):
+    """Prints and returns pages/sec of predict_fn for each batch size."""
+    results = {}
+    predict_fn(texts[:1])  # warm-up
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            predict_fn(texts[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        results[batch_size] = len(texts) / elapsed
+        print(f"⏱️ batch={batch_size:>3}  {results[batch_size]:.2f} pages/sec")
+    return results
+
+
+if __name__ == "__main__":
+    # Run from backend/: python -m ai_model.batching
+    import json
+    import os
+
+    from .model import predict_threat_levels
+
+    data_file = os.path.join(os.path.dirname(
+        __file__), "..", "scraped_data.json")
+    with open(data_file, "r", encoding="utf-8") as file:
+        sample_texts = [row["text"] for row in json.load(file)][:64]
+    benchmark(predict_threat_levels, sample_texts)
@@ -0,0 +1,172 @@
+# backend/ai_model/cascade.py
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from .extraction import normalize_keywords
+
+# Tier thresholds (tune with the agreement numbers in report() and sweep())
+CASCADE_ENABLED = os.getenv("SCORING_CASCADE", "1") == "1"
+KEYWORD_POINTS = 2.0      # cheap score per keyword hit, capped at 10
+BAND_LOW = 2.0            # cheap scores below this are confidently benign
+BAND_HIGH = 8.0           # cheap scores at or above this are confidently illicit
+REFINE_AT = 6             # score that sends a page on to GPT
+AUDIT_RATE = 0.05         # share of pages outside the band still sent to the model
+
+
+class ScoringCascade:
+    """
+    Cheap-first scoring: the keyword matcher scores every page and only
+    pages whose cheap score falls inside the uncertainty band
+    [band_low, band_high) reach the transformer model. Pages below the
+    band keep their cheap score; pages above it keep it too and go on to
+    GPT like any other score of refine_at or more. The matcher must
+    normalize text itself (see KeywordMatcher's normalize).
+
+    A small audit sample of pages outside the band is escalated anyway,
+    so the report can show how often the cheap tier agrees with the model.
+    """
+
+    def __init__(self, matcher, band_low=BAND_LOW, band_high=BAND_HIGH,
+                 keyword_points=KEYWORD_POINTS, refine_at=REFINE_AT, audit_rate=AUDIT_RATE,
+                 enabled=CASCADE_ENABLED):
+        self.matcher = matcher
+        self.band_low = band_low
+        self.band_high = band_high
+        self.keyword_points = keyword_points
+        self.refine_at = refine_at
+        self.audit_rate = audit_rate
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counts = {"keyword": 0, "model": 0, "gpt": 0, "filtered": 0, "resolved_high": 0}
+        self.seconds = {"keyword": 0.0, "model": 0.0, "gpt": 0.0}
+        # Model verdicts on audited and escalated pages
+        self.audited_low = [0, 0]      # [model agreed < refine_at, total]
+        self.audited_high = [0, 0]     # [model agreed >= refine_at, total]
+        self.escalated_high = [0, 0]   # [model scored >= refine_at, total]
+
+    @property
+    def cache_tag(self):
+        """
+        Score-cache tag for cheap-tier results; changes with the phrase
+        set and every threshold, so stale cheap scores are not reused.
+        """
+        fingerprint = getattr(self.matcher, "fingerprint", "none")
+        return (f"keyword-{fingerprint}-{self.keyword_points:g}-{self.band_low:g}-"
+                f"{self.band_high:g}-{self.refine_at:g}")
+
+    def cheap_score(self, text):
+        start = time.perf_counter()
+        hits = self.matcher.count(text)
+        self._add_time("keyword", time.perf_counter() - start)
+        return min(10.0, hits * self.keyword_points)
+
+    def triage(self, text):
+        """
+        Returns (cheap_score, escalate, audited), where audited is None or
+        the side of the band ("low" / "high") an audited page came from.
+        Pages that are not escalated keep cheap_score as their model score.
+        """
+        if self.matcher is None or not self.enabled:
+            return 0.0, True, None
+        cheap_score = self.cheap_score(text)
+        if self.band_low <= cheap_score < self.band_high:
+            return cheap_score, True, None
+        side = "low" if cheap_score < self.band_low else "high"
+        if random.random() < self.audit_rate:
+            return cheap_score, True, side
+        with self._lock:
+            self.counts["filtered" if side == "low" else "resolved_high"] += 1
+        return cheap_score, False, None
+
+    def record_model(self, model_score, audited):
+        """Records the model's verdict on an escalated page."""
+        high = model_score >= self.refine_at
+        with self._lock:
+            if audited == "low":
+                self.audited_low[0] += not high
+                self.audited_low[1] += 1
+            else:
+                tally = self.audited_high if audited == "high" else self.escalated_high
+                tally[0] += high
+                tally[1] += 1
+
+    def _add_time(self, tier, seconds):
+        with self._lock:
+            self.counts[tier] += 1
+            self.seconds[tier] += seconds
+
+    @contextmanager
+    def timed(self, tier):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_time(tier, time.perf_counter() - start)
+
+    def report(self):
+        """Per-tier counts, mean latency (ms) and agreement rates."""
+        with self._lock:
+            return {
+                "counts": dict(self.counts),
+                "mean_ms": {tier: 1000 * self.seconds[tier] / self.counts[tier]
+                            for tier in self.seconds if self.counts[tier]},
+                "filter_agreement": self.audited_low[0] / self.audited_low[1]
+                if self.audited_low[1] else None,
+                "high_agreement": self.audited_high[0] / self.audited_high[1]
+                if self.audited_high[1] else None,
+                "escalation_precision": self.escalated_high[0] / self.escalated_high[1]
+                if self.escalated_high[1] else None,
+            }
+
+
+def sweep(cheap_scores, model_scores, bands=((2, 8), (2, 10.5), (4, 8)), refine_at=REFINE_AT):
+    """
+    Offline threshold tuning: for each (band_low, band_high), the share of
+    pages sent to the model, the share of model-high pages not filtered
+    below the band, and how many pages resolved above it are model-high.
+    """
+    cheap_scores = np.asarray(cheap_scores)
+    high = np.asarray(model_scores) >= refine_at
+    results = {}
+    for low, top in bands:
+        escalated = (cheap_scores >= low) & (cheap_scores < top)
+        above = cheap_scores >= top
+        results[(low, top)] = {
+            "escalated": float(escalated.mean()),
+            "high_recall": float((cheap_scores >= low)[high].mean()) if high.any() else None,
+            "above_precision": float(high[above].mean()) if above.any() else None,
+        }
+        result = results[(low, top)]
+        print(f"🪜 band [{low:g}, {top:g}): escalates {result['escalated']:.1%}, "
+              f"keeps {result['high_recall'] or 0:.1%} of model-high pages, "
+              f"{result['above_precision'] or 0:.1%} of pages above the band are model-high")
+    return results
+
+
+if __name__ == "__main__":
+    # python -m ai_model.cascade <dataset.csv> [limit]
+    import sys
+
+    from utils.preprocess import load_matcher
+    from .cpu_inference import _predict_all, validation_split
+    from .model_registry import get_threat_model, get_tokenizer
+
+    texts = validation_split(sys.argv[1])[0][:int(sys.argv[2]) if len(sys.argv) > 2 else 512]
+    cascade = ScoringCascade(load_matcher(normalize=normalize_keywords))
+    start = time.perf_counter()
+    cheap_scores = [cascade.cheap_score(t) for t in texts]
+    keyword_seconds = time.perf_counter() - start
+
+    model, encode_fn = get_threat_model()
+    start = time.perf_counter()
+    model_scores = _predict_all(model, get_tokenizer(), encode_fn, texts)
+    model_seconds = time.perf_counter() - start
+    print(f"⏱️ keyword tier {1000 * keyword_seconds / len(texts):.3f} ms/page, "
+          f"model tier {1000 * model_seconds / len(texts):.1f} ms/page")
+    sweep(cheap_scores, model_scores)
@@ -0,0 +1,266 @@
+# backend/ai_model/cpu_inference.py
+
+import os
+import time
+
+import numpy as np
+import torch
+from torch import nn
+
+from .mpnet_encoder import get_mpnet_model, mpnet_encode
+
+# Selected at load time: fp32 (default), int8 (dynamic quantization) or onnx
+BACKENDS = ("fp32", "int8", "onnx")
+MODEL_BACKEND = os.getenv("THREAT_MODEL_BACKEND", "fp32")
+ONNX_DIR = "./xlm_roberta_elmo_model/onnx"
+ONNX_OPSET = 14
+
+
+def onnx_available():
+    try:
+        __import__("onnxruntime")
+        return True
+    except ImportError:
+        return False
+
+
+def quantize_int8(module):
+    """Returns a copy of module with Linear layers dynamically quantized."""
+    return torch.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+
+class _LogitsOnly(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, mpnet_emb):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                          mpnet_emb=mpnet_emb)["logits"]
+
+
+class _HiddenStates(nn.Module):
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids, attention_mask):
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+
+def export_onnx(model, out_dir=ONNX_DIR, quantize=True, mpnet=None):
+    """
+    Exports the fused XLM-R + head and the MPNet encoder to ONNX.
+    With quantize=True, int8 copies are written next to the fp32 graphs.
+    """
+    mpnet = mpnet if mpnet is not None else get_mpnet_model()
+    os.makedirs(out_dir, exist_ok=True)
+    ids = torch.ones(1, 16, dtype=torch.long)
+    mask = torch.ones(1, 16, dtype=torch.long)
+    seq_axes = {0: "batch", 1: "sequence"}
+
+    torch.onnx.export(
+        _LogitsOnly(model).eval(), (ids, mask, torch.zeros(1, 768)),
+        os.path.join(out_dir, "threat_model.onnx"),
+        input_names=["input_ids", "attention_mask", "mpnet_emb"],
+        output_names=["logits"],
+        dynamic_axes={"input_ids": seq_axes, "attention_mask": seq_axes,
+                      "mpnet_emb": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=ONNX_OPSET)
+
+    torch.onnx.export(
+        _HiddenStates(mpnet[0].auto_model).eval(), (ids, mask),
+        os.path.join(out_dir, "mpnet.onnx"),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={"input_ids": seq_axes, "attention_mask": seq_axes,
+                      "last_hidden_state": seq_axes},
+        opset_version=ONNX_OPSET)
+    mpnet.tokenizer.save_pretrained(
+        os.path.join(out_dir, "mpnet_tokenizer"))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        for name in ("threat_model", "mpnet"):
+            quantize_dynamic(os.path.join(out_dir, f"{name}.onnx"),
+                             os.path.join(out_dir, f"{name}.int8.onnx"),
+                             weight_type=QuantType.QInt8)
+    print(f"✅ Exported ONNX models to {out_dir}")
+
+
+def _session(path):
+    import onnxruntime as ort
+    return ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+
+def _onnx_path(out_dir, name):
+    quantized = os.path.join(out_dir, f"{name}.int8.onnx")
+    return quantized if os.path.exists(quantized) else os.path.join(out_dir, f"{name}.onnx")
+
+
+class OnnxThreatModel:
+    """ONNX Runtime stand-in for XLMRobertaMPNet's forward pass."""
+
+    def __init__(self, out_dir=ONNX_DIR):
+        self.session = _session(_onnx_path(out_dir, "threat_model"))
+
+    def __call__(self, input_ids, attention_mask, mpnet_emb=None):
+        (logits,) = self.session.run(["logits"], {
+            "input_ids": input_ids.numpy(),
+            "attention_mask": attention_mask.numpy(),
+            "mpnet_emb": mpnet_emb.numpy().astype(np.float32)
+        })
+        return {"loss": None, "logits": torch.from_numpy(logits)}
+
+    def eval(self):
+        return self
+
+
+class OnnxMPNetEncoder:
+    """ONNX Runtime MPNet encoder with mean pooling and L2 normalization."""
+
+    def __init__(self, out_dir=ONNX_DIR, max_length=384):
+        from transformers import AutoTokenizer
+        self.session = _session(_onnx_path(out_dir, "mpnet"))
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            os.path.join(out_dir, "mpnet_tokenizer"))
+        self.max_length = max_length
+
+    def __call__(self, texts, batch_size=32):
+        chunks = []
+        for i in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(texts[i:i + batch_size], padding="longest", truncation=True,
+                                    max_length=self.max_length, return_tensors="np")
+            (hidden,) = self.session.run(["last_hidden_state"], {
+                "input_ids": inputs["input_ids"].astype(np.int64),
+                "attention_mask": inputs["attention_mask"].astype(np.int64)
+            })
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / \
+                np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1,
+                              keepdims=True), 1e-12, None)
+            chunks.append(pooled)
+        return torch.from_numpy(np.concatenate(chunks).astype(np.float32))
+
+
+def load_inference_backend(backend, model, out_dir=ONNX_DIR, mpnet=None):
+    """
+    Wraps a loaded fp32 XLMRobertaMPNet for the requested CPU backend.
+    Returns (model, encode_fn) for predict_batch. Without onnxruntime,
+    "onnx" falls back to the fp32 torch model.
+    """
+    if backend == "onnx" and not onnx_available():
+        print("⚠️ onnxruntime not installed, using the fp32 torch model")
+        backend = "fp32"
+    if backend == "fp32":
+        return model, mpnet_encode
+    if backend == "int8":
+        quantized_mpnet = quantize_int8(
+            mpnet if mpnet is not None else get_mpnet_model())
+        return quantize_int8(model).eval(), \
+            lambda texts, batch_size=32: mpnet_encode(texts, batch_size, model=quantized_mpnet)
+    if backend == "onnx":
+        if not os.path.exists(os.path.join(out_dir, "threat_model.onnx")):
+            export_onnx(model, out_dir, mpnet=mpnet)
+        return OnnxThreatModel(out_dir), OnnxMPNetEncoder(out_dir)
+    raise ValueError(f"Unknown model backend {backend!r}, expected one of {BACKENDS}")
+
+
+def validation_split(csv_path):
+    """(texts, labels) of the validation rows train_threat_model.py holds out."""
+    from .training_data import LazyTextDataset, index_csv, split_rows
+
+    index = index_csv(csv_path)
+    _, val_rows = split_rows(len(index["offsets"]))
+    dataset = LazyTextDataset(csv_path, index, val_rows, None)
+    return [dataset.text(i) for i in range(len(dataset))], dataset.labels.astype(int).tolist()
+
+
+def _predict_all(model, tokenizer, encode_fn, texts, batch_size=32):
+    from .batching import predict_batch
+    predictions = []
+    for i in range(0, len(texts), batch_size):
+        predictions += predict_batch(model, tokenizer,
+                                     texts[i:i + batch_size], encode_fn=encode_fn)
+    return predictions
+
+
+def parity_check(model, tokenizer, csv_path, backends=("int8", "onnx")):
+    """Compares each backend's predictions with fp32 on the validation split."""
+    texts, labels = validation_split(csv_path)
+    reference = _predict_all(model, tokenizer, mpnet_encode, texts)
+    results = {"fp32": {"accuracy": float(np.mean(np.array(reference) == labels))}}
+    print(f"🎯 fp32 accuracy: {results['fp32']['accuracy']:.4f}")
+
+    for backend in backends:
+        candidate, encode_fn = load_inference_backend(backend, model)
+        predictions = _predict_all(candidate, tokenizer, encode_fn, texts)
+        results[backend] = {
+            "accuracy": float(np.mean(np.array(predictions) == labels)),
+            "agreement": float(np.mean(np.array(predictions) == np.array(reference)))
+        }
+        print(f"🎯 {backend}: accuracy {results[backend]['accuracy']:.4f}, "
+              f"agreement with fp32 {results[backend]['agreement']:.4f}")
+    return results
+
+
+def _rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _benchmark_worker(backend, texts, batch_size, results):
+    from .batching import predict_batch
+    from .model_registry import get_threat_model, get_tokenizer
+    model, encode_fn = get_threat_model(backend)
+    tokenizer = get_tokenizer()
+    loaded_rss = _rss_mb()
+    predict_batch(model, tokenizer, texts[:batch_size], encode_fn=encode_fn)  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        predict_batch(model, tokenizer,
+                      texts[i:i + batch_size], encode_fn=encode_fn)
+    elapsed = time.perf_counter() - start
+    results[backend] = {"pages_per_sec": len(texts) / elapsed,
+                        "rss_mb": loaded_rss, "peak_rss_mb": _rss_mb()}
+
+
+def benchmark(texts, backends=BACKENDS, batch_size=16):
+    """Latency and resident memory per backend, each in a fresh process."""
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    with ctx.Manager() as manager:
+        results = manager.dict()
+        for backend in backends:
+            worker = ctx.Process(target=_benchmark_worker,
+                                 args=(backend, texts, batch_size, results))
+            worker.start()
+            worker.join()
+            stats = results.get(backend)
+            if stats:
+                print(f"⏱️ {backend:>5}: {stats['pages_per_sec']:.2f} pages/sec, "
+                      f"RSS {stats['rss_mb']:.0f} MB (peak {stats['peak_rss_mb']:.0f} MB)")
+        return dict(results)
+
+
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python -m ai_model.cpu_inference export
+    #   python -m ai_model.cpu_inference parity large_darkweb_threat_dataset.csv
+    #   python -m ai_model.cpu_inference benchmark large_darkweb_threat_dataset.csv
+    import sys
+
+    command = sys.argv[1]
+    if command == "benchmark":
+        benchmark(validation_split(sys.argv[2])[0][:256])
+    else:
+        from .model_registry import get_fp32_model, get_tokenizer
+        if command == "export":
+            export_onnx(get_fp32_model())
+        elif command == "parity":
+            parity_check(get_fp32_model(), get_tokenizer(), sys.argv[2])
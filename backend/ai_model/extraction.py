@@ -0,0 +1,200 @@
+# backend/ai_model/extraction.py
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Tags whose content is never page text
+DROP_TAGS = ("script", "style", "noscript", "iframe")
+
+# Inert markup BeautifulSoup.get_text and selectolax leave out on their own
+HIDDEN_TAGS = ("template",)
+
+# Larger pages are truncated before parsing
+MAX_HTML_BYTES = 2 * 1024 * 1024
+
+# selectolax > lxml > html.parser, unless HTML_BACKEND names one
+BACKENDS = ("selectolax", "lxml", "html.parser")
+HTML_BACKEND = os.getenv("HTML_BACKEND")
+
+
+def _bs4_text(html, separator):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(DROP_TAGS)):
+        tag.decompose()
+    return soup.get_text(separator)
+
+
+def _lxml_text(html, separator):
+    from lxml import etree
+    from lxml import html as lxml_html
+    if not html.strip():
+        return ""
+    root = lxml_html.fromstring(html)
+
+    # Same text nodes as BeautifulSoup.get_text: tails of dropped tags are
+    # kept as their own chunks, comments and dropped subtrees are skipped
+    parts = []
+    skip = 0
+    events = ("start", "end", "comment", "pi")
+    for event, node in etree.iterwalk(root, events=events):
+        if event in ("comment", "pi"):
+            # Reported once, with no end event; only the tail is text
+            if not skip and node.tail:
+                parts.append(node.tail)
+            continue
+        dropped = node.tag in DROP_TAGS or node.tag in HIDDEN_TAGS
+        if event == "start":
+            if dropped:
+                skip += 1
+            elif not skip and node.text:
+                parts.append(node.text)
+        else:
+            if dropped:
+                skip -= 1
+            if not skip and node.tail and node is not root:
+                parts.append(node.tail)
+    return separator.join(parts)
+
+
+def _selectolax_text(html, separator):
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+    tree = HTMLParser(html)
+    tree.strip_tags(list(DROP_TAGS))
+    return tree.root.text(separator=separator) if tree.root is not None else ""
+
+
+_EXTRACTORS = {
+    "selectolax": _selectolax_text,
+    "lxml": _lxml_text,
+    "html.parser": _bs4_text,
+}
+
+
+def _available(backend):
+    module = {"selectolax": "selectolax", "lxml": "lxml",
+              "html.parser": "bs4"}[backend]
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def default_backend():
+    if HTML_BACKEND:
+        return HTML_BACKEND
+    return next(b for b in BACKENDS if _available(b))
+
+
+def clean_html(html, separator="", backend=None, max_bytes=MAX_HTML_BYTES):
+    """
+    Extracts whitespace-normalized text from raw HTML.
+    - Truncates input to its first max_bytes bytes of UTF-8 before parsing
+    - Removes scripts, styles, noscript blocks, iframes and comments
+    - Falls back to html.parser if the faster backend rejects the input
+    """
+    # A UTF-8 character is at most 4 bytes, so shorter pages skip the encode
+    if len(html) > max_bytes // 4:
+        html = html.encode("utf-8", "surrogatepass")[:max_bytes].decode("utf-8", "ignore")
+    backend = backend or default_backend()
+    try:
+        text = _EXTRACTORS[backend](html, separator)
+    except (ValueError, ImportError):
+        text = _bs4_text(html, separator)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_keywords(text):
+    """Lowercases text and keeps only ASCII letters, digits and spaces."""
+    return re.sub(r"[^a-zA-Z0-9\s]", "", text).lower().strip()
+
+
+def _noop():
+    return None
+
+
+def start_pool(workers):
+    """
+    Starts a process pool for clean_html and spawns its workers right away,
+    so they are forked before the scraper starts its own threads.
+    """
+    import multiprocessing as mp
+    context = mp.get_context("fork") if sys.platform != "win32" else None
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    for future in [pool.submit(_noop) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+# Rules of the three clean_text functions this module replaced
+LEGACY_PROFILES = {
+    "scraper": {"drop": DROP_TAGS, "separator": "", "keywords": False},
+    "scraper_utils": {"drop": ("script", "style"), "separator": "", "keywords": False},
+    "parser": {"drop": DROP_TAGS, "separator": " ", "keywords": True},
+}
+
+
+def legacy_clean(html, profile):
+    from bs4 import BeautifulSoup
+    rules = LEGACY_PROFILES[profile]
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(rules["drop"])):
+        tag.decompose()
+    text = re.sub(r"\s+", " ", soup.get_text(rules["separator"])).strip()
+    return normalize_keywords(text) if rules["keywords"] else text
+
+
+def parity_report(pages, backends=BACKENDS):
+    """
+    Compares each backend with the legacy clean_text rules on saved pages.
+    Returns {(backend, profile): fraction of identical outputs}.
+    """
+    report = {}
+    for backend in backends:
+        if not _available(backend):
+            continue
+        for profile, rules in LEGACY_PROFILES.items():
+            same = 0
+            for html in pages:
+                text = clean_html(html, rules["separator"], backend)
+                if rules["keywords"]:
+                    text = normalize_keywords(text)
+                same += text == legacy_clean(html, profile)
+            report[(backend, profile)] = same / len(pages)
+            print(f"🔍 {backend:>11} vs {profile:<13} {report[(backend, profile)]:.1%} identical")
+    return report
+
+
+def benchmark(pages, backends=BACKENDS):
+    """Prints MB/sec and pages/sec of each available backend."""
+    total_mb = sum(len(html) for html in pages) / 2 ** 20
+    results = {}
+    for backend in backends:
+        if not _available(backend):
+            continue
+        start = time.perf_counter()
+        for html in pages:
+            clean_html(html, backend=backend)
+        elapsed = time.perf_counter() - start
+        results[backend] = len(pages) / elapsed
+        print(f"⏱️ {backend:>11}: {results[backend]:.1f} pages/sec, {total_mb / elapsed:.1f} MB/sec")
+    return results
+
+
+if __name__ == "__main__":
+    # python -m ai_model.extraction <directory of saved .html pages>
+    import glob
+
+    saved = []
+    for path in sorted(glob.glob(os.path.join(sys.argv[1], "*.htm*"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            saved.append(file.read())
+    parity_report(saved)
+    benchmark(saved)
@@ -0,0 +1,311 @@
+# backend/ai_model/feature_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import torch
+from torch import nn
+
+from .mpnet_encoder import MPNET_NAME
+from .score_cache import content_key
+
+DIM = 768
+INITIAL_CAPACITY = 4096
+ENCODE_BATCH_SIZE = 32
+MAX_LENGTH = 512
+
+# Head-only training
+HEAD_EPOCHS = 20
+HEAD_BATCH_SIZE = 256
+HEAD_LEARNING_RATE = 1e-3
+HEAD_WEIGHT_DECAY = 0.01
+RETRAIN_CHUNK = 50000       # CSV rows read and encoded at a time
+
+
+def encoder_fingerprint(model, sample=4096):
+    """
+    Hash of the frozen XLM-R encoder: every parameter's name and shape plus
+    a strided sample of its values. Head-only retrains leave it unchanged.
+    """
+    digest = hashlib.sha256(f"{MPNET_NAME}:{MAX_LENGTH}".encode("utf-8"))
+    for name, param in model.xlm.named_parameters():
+        flat = param.detach().reshape(-1)
+        step = max(1, flat.numel() // sample)
+        digest.update(f"{name}{tuple(param.shape)}".encode("utf-8"))
+        digest.update(flat[::step].float().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Memory-mapped float16 store of frozen-encoder features, one row per
+    distinct text: the XLM-R pooled output followed by the MPNet embedding.
+    Rows are keyed by content hash, so unchanged examples are encoded once
+    across retrains. A different encoder version clears the store's own
+    files; anything else in directory is left alone. manifest.json records
+    how many rows the last save committed; later rows are dropped on load.
+    """
+
+    def __init__(self, directory, version, dim=DIM):
+        self.directory = directory
+        self.version = version
+        self.dim = dim
+        self._features_path = os.path.join(directory, "features.f16")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.Lock()
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            if meta != {"version": version, "dim": dim}:
+                print(f"♻️ Encoder changed ({meta.get('version')} -> {version}), "
+                      "clearing feature store")
+                for path in (self._features_path, self._keys_path, self._meta_path,
+                             self._manifest_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        os.makedirs(directory, exist_ok=True)
+        with open(self._meta_path, "w", encoding="utf-8") as file:
+            json.dump({"version": version, "dim": dim}, file)
+
+        self.keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r", encoding="utf-8") as file:
+                self.keys = file.read().splitlines()
+        committed = 0
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as file:
+                committed = json.load(file)["rows"]
+        if len(self.keys) > committed:
+            print(f"♻️ Dropping {len(self.keys) - committed} uncommitted feature rows")
+            self.keys = self.keys[:committed]
+            with open(self._keys_path + ".tmp", "w", encoding="utf-8") as file:
+                file.writelines(key + "\n" for key in self.keys)
+            os.replace(self._keys_path + ".tmp", self._keys_path)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self._keys_file = open(self._keys_path, "a", encoding="utf-8")
+
+        capacity = max(INITIAL_CAPACITY, len(self.keys))
+        if os.path.exists(self._features_path):
+            capacity = max(capacity, os.path.getsize(self._features_path) // (4 * dim))
+        self._open(capacity)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _open(self, capacity):
+        if not os.path.exists(self._features_path):
+            open(self._features_path, "wb").close()
+        with open(self._features_path, "r+b") as file:
+            file.truncate(capacity * 2 * self.dim * 2)
+        self.features = np.memmap(self._features_path, dtype=np.float16, mode="r+",
+                                  shape=(capacity, 2 * self.dim))
+
+    def key(self, text):
+        return content_key(text, self.version)
+
+    def missing(self, texts):
+        """Positions in texts whose features are not stored yet (first occurrence only)."""
+        seen = set()
+        missing = []
+        for i, text in enumerate(texts):
+            key = self.key(text)
+            if key not in self.rows and key not in seen:
+                seen.add(key)
+                missing.append(i)
+        return missing
+
+    def add(self, texts, xlm_out, mpnet_emb):
+        with self._lock:
+            start = len(self.keys)
+            end = start + len(texts)
+            if end > len(self.features):
+                self.features.flush()
+                self._open(max(end, 2 * len(self.features)))
+            self.features[start:end, :self.dim] = np.asarray(xlm_out, dtype=np.float32)
+            self.features[start:end, self.dim:] = np.asarray(mpnet_emb, dtype=np.float32)
+            for text in texts:
+                key = self.key(text)
+                self.rows[key] = len(self.keys)
+                self.keys.append(key)
+                self._keys_file.write(key + "\n")
+
+    def lookup(self, texts):
+        """Store rows of texts, which must all be stored."""
+        return np.array([self.rows[self.key(text)] for text in texts], dtype=np.int64)
+
+    def load(self, rows):
+        """(xlm_out, mpnet_emb) float16 tensors for store rows."""
+        block = torch.from_numpy(np.ascontiguousarray(self.features[np.sort(rows)]))
+        order = np.argsort(np.argsort(rows))
+        block = block[torch.from_numpy(order)]
+        return block[:, :self.dim], block[:, self.dim:]
+
+    def save(self):
+        """Syncs features and keys to disk, then commits their row count."""
+        with self._lock:
+            self.features.flush()
+            self._keys_file.flush()
+            os.fsync(self._keys_file.fileno())
+            with open(self._manifest_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({"rows": len(self.keys), "dim": self.dim}, file)
+            os.replace(self._manifest_path + ".tmp", self._manifest_path)
+
+    def stats(self):
+        return {"rows": len(self.keys), "version": self.version}
+
+
+def encode_features(model, tokenizer, texts, encode_fn, batch_size=ENCODE_BATCH_SIZE):
+    """
+    XLM-R pooled outputs and MPNet embeddings for texts, in length-sorted
+    batches padded to their own longest sequence.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    xlm_out = np.zeros((len(texts), DIM), dtype=np.float32)
+    mpnet_emb = np.zeros((len(texts), DIM), dtype=np.float32)
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            batch_texts = [texts[i] for i in batch]
+            inputs = tokenizer(batch_texts, return_tensors="pt", truncation=True,
+                               max_length=MAX_LENGTH, padding="longest")
+            xlm_out[batch] = model.xlm(input_ids=inputs["input_ids"],
+                                       attention_mask=inputs["attention_mask"]
+                                       ).pooler_output.numpy()
+            mpnet_emb[batch] = encode_fn(batch_texts, batch_size=len(batch)).cpu().numpy()
+    return xlm_out, mpnet_emb
+
+
+def update_store(store, model, tokenizer, texts, encode_fn, batch_size=ENCODE_BATCH_SIZE):
+    """Encodes only the texts missing from store; returns how many were added."""
+    missing = store.missing(texts)
+    if missing:
+        fresh = [texts[i] for i in missing]
+        start = time.perf_counter()
+        store.add(fresh, *encode_features(model, tokenizer, fresh, encode_fn, batch_size))
+        store.save()
+        print(f"🧊 Encoded {len(fresh):,} new texts in {time.perf_counter() - start:.1f}s "
+              f"({len(texts) - len(fresh):,} reused)")
+    return len(missing)
+
+
+def train_head(model, xlm_out, mpnet_emb, labels, epochs=HEAD_EPOCHS,
+               batch_size=HEAD_BATCH_SIZE, lr=HEAD_LEARNING_RATE,
+               weight_decay=HEAD_WEIGHT_DECAY, seed=42):
+    """
+    Trains mpnet_fc and classifier on cached features; the encoder is not
+    touched. Returns the final epoch's mean training loss.
+    """
+    torch.manual_seed(seed)
+    labels = torch.as_tensor(labels, dtype=torch.long)
+    params = list(model.mpnet_fc.parameters()) + list(model.classifier.parameters())
+    optimizer = torch.optim.AdamW(params, lr=lr, weight_decay=weight_decay)
+    loss_fn = nn.CrossEntropyLoss()
+    model.mpnet_fc.train()
+    model.classifier.train()
+    for _ in range(epochs):
+        total = 0.0
+        for batch in torch.randperm(len(labels)).split(batch_size):
+            optimizer.zero_grad()
+            logits = model.head(xlm_out[batch].float(), mpnet_emb[batch].float())
+            loss = loss_fn(logits, labels[batch])
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(batch)
+        mean_loss = total / len(labels)
+    model.mpnet_fc.eval()
+    model.classifier.eval()
+    return mean_loss
+
+
+def head_accuracy(model, xlm_out, mpnet_emb, labels):
+    with torch.no_grad():
+        predicted = model.head(xlm_out.float(), mpnet_emb.float()).argmax(dim=1)
+    return float((predicted == torch.as_tensor(labels)).float().mean())
+
+
+def retrain_head(csv_path, store_dir, checkpoint, output=None):
+    """
+    Head-only refresh of the threat model: encodes rows of csv_path that
+    are not cached yet, trains the head on all cached features and saves
+    the full state dict to output (checkpoint by default) and to the
+    model.safetensors the registry loads from that directory.
+    """
+    from .mpnet_encoder import mpnet_encode
+    from .model_registry import get_tokenizer, load_fp32_model, save_state_dict
+    from .training_data import LazyTextDataset, index_csv, split_rows
+
+    model = load_fp32_model(checkpoint)
+    store = FeatureStore(store_dir, encoder_fingerprint(model))
+    index = index_csv(csv_path)
+    train_rows, val_rows = split_rows(len(index["offsets"]))
+    splits = {}
+    for name, rows in (("train", train_rows), ("val", val_rows)):
+        dataset = LazyTextDataset(csv_path, index, rows, None)
+        store_rows = []
+        for start in range(0, len(dataset), RETRAIN_CHUNK):
+            end = min(len(dataset), start + RETRAIN_CHUNK)
+            texts = [dataset.text(i) for i in range(start, end)]
+            update_store(store, model, get_tokenizer(), texts, mpnet_encode)
+            store_rows.append(store.lookup(texts))
+        splits[name] = (*store.load(np.concatenate(store_rows)), dataset.labels.astype(np.int64))
+
+    start = time.perf_counter()
+    loss = train_head(model, *splits["train"])
+    print(f"✅ Head trained in {time.perf_counter() - start:.1f}s, loss {loss:.3f}, "
+          f"val accuracy {head_accuracy(model, *splits['val']):.1%}")
+    output = output or checkpoint
+    save_state_dict(model.state_dict(), output)
+
+
+def benchmark(rows=100000, classes=11, seed=0):
+    """Head training time on synthetic cached features with a planted linear signal."""
+    from .xlm_roberta_model import XLMRobertaMPNet
+
+    class HeadOnly(nn.Module):
+        # XLMRobertaMPNet's head without building the encoder
+        head = XLMRobertaMPNet.head
+
+        def __init__(self):
+            super().__init__()
+            self.mpnet_fc = nn.Linear(DIM, DIM)
+            self.classifier = nn.Linear(2 * DIM, classes)
+
+    generator = torch.Generator().manual_seed(seed)
+    labels = torch.randint(0, classes, (rows,), generator=generator)
+    centres = torch.randn(classes, 2 * DIM, generator=generator)
+    features = centres[labels] + 16 * torch.randn(rows, 2 * DIM, generator=generator)
+    features = features.half()
+    xlm_out, mpnet_emb = features[:, :DIM], features[:, DIM:]
+
+    model = HeadOnly()
+    split = rows * 9 // 10
+    start = time.perf_counter()
+    loss = train_head(model, xlm_out[:split], mpnet_emb[:split], labels[:split])
+    elapsed = time.perf_counter() - start
+    accuracy = head_accuracy(model, xlm_out[split:], mpnet_emb[split:], labels[split:])
+    print(f"⏱️ Head-only training: {split:,} rows x {HEAD_EPOCHS} epochs in {elapsed:.1f}s, "
+          f"loss {loss:.3f}, val accuracy {accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python -m ai_model.feature_cache retrain <csv> [store dir] [output checkpoint]
+    #   python -m ai_model.feature_cache bench [rows]
+    import sys
+
+    from .model_registry import MODEL_CHECKPOINT
+
+    if sys.argv[1] == "retrain":
+        retrain_head(sys.argv[2],
+                     sys.argv[3] if len(sys.argv) > 3 else "feature_store",
+                     MODEL_CHECKPOINT,
+                     sys.argv[4] if len(sys.argv) > 4 else None)
+    else:
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
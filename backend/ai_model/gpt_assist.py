@@ -1,37 +1,334 @@
 # gpt_assist.py
-import openai
+import asyncio
+import json
 import os
+import random
+import re
+import time
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+import aiohttp
+from aiohttp import web
 
+from .score_cache import content_key
 
-def gpt_refine_threat(text, original_score):
-    prompt = f"""
+# Any OpenAI-compatible chat completions endpoint; point OPENAI_BASE_URL at
+# `python -m ai_model.gpt_assist fake` to run without network access
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+GPT_MODEL = os.getenv("GPT_MODEL", "gpt-3.5-turbo")  # or "gpt-4" if you have access
+
+# Refinement queue
+BATCH_SIZE = 8            # texts packed into one request
+BATCH_WAIT_SECONDS = 0.5
+MAX_CONCURRENCY = 4       # requests in flight
+MAX_TEXT_CHARS = 2000     # per text, to bound prompt size
+
+# Token bucket (requests) and circuit breaker
+RATE_PER_SECOND = 1.0
+BURST = 4
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 60
+
+SYSTEM_PROMPT = "You are a threat assessment assistant."
+
+PROMPT = """
 You are a cybersecurity AI evaluating dark web content.
 
-Text:
-\"\"\"
-{text}
-\"\"\"
+Below is a JSON list of texts, each with an id and its current predicted
+threat score (range: 0–10).
 
-The current predicted threat score is {original_score} (range: 0–10).
+{items}
 
-Re-evaluate and return a new score (0–10) based on hidden threats, slang, context. 
-Respond ONLY with the score. Example: 7.8
+Re-evaluate each text and return a new score (0–10) based on hidden threats, slang, context.
+Respond ONLY with a JSON list of scores in the same order. Example: [7.8, 3.1]
 """
 
+
+def _clamp(score):
+    return round(min(max(float(score), 0), 10), 2)  # clamp to 0–10
+
+
+def build_messages(items):
+    """Chat messages asking for new scores of [(text, original_score)]."""
+    payload = json.dumps([
+        {"id": i, "score": score, "text": text[:MAX_TEXT_CHARS]}
+        for i, (text, score) in enumerate(items)
+    ], ensure_ascii=False)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": PROMPT.format(items=payload)}
+    ]
+
+
+def _first_json(content, opening="["):
+    start = content.find(opening)
+    return json.JSONDecoder().raw_decode(content, max(start, 0))[0]
+
+
+def parse_scores(content, expected):
+    """Parses the JSON score list of a reply; raises ValueError on mismatch."""
+    scores = _first_json(content)
+    if not isinstance(scores, list):
+        scores = [scores]
+    if len(scores) != expected:
+        raise ValueError(f"expected {expected} scores, got {len(scores)}")
+    return [_clamp(score) for score in scores]
+
+
+class ChatCompletionsBackend:
+    """Scores batches through an OpenAI-compatible /chat/completions endpoint."""
+
+    def __init__(self, base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY, model=GPT_MODEL,
+                 timeout=30):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+
+    async def score_batch(self, items):
+        if self._session is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._session = aiohttp.ClientSession(headers=headers, timeout=self.timeout)
+        body = {
+            "model": self.model,
+            "messages": build_messages(items),
+            "max_tokens": 8 * len(items) + 8,
+            "temperature": 0.2
+        }
+        async with self._session.post(self.url, json=body) as response:
+            response.raise_for_status()
+            reply = await response.json()
+        return parse_scores(reply["choices"][0]["message"]["content"], len(items))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class TokenBucket:
+    """Async token bucket: rate tokens per second, up to burst stored."""
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after max_failures consecutive failures and rejects calls for
+    reset_seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, max_failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial:
+            self.trial = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def failure(self):
+        self.failures += 1
+        self.trial = False
+        if self.failures >= self.max_failures or self.opened_at is not None:
+            if self.opened_at is None:
+                print(f"⚡ GPT circuit open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+
+class GPTRefiner:
+    """
+    Async refinement queue in front of a scoring backend.
+    - Packs up to batch_size queued texts into one request
+    - Caches results by text hash and shares in-flight requests
+    - Limits request rate and concurrency, and stops calling a failing
+      backend until the circuit breaker resets
+    Texts that cannot be refined resolve to their original score.
+    """
+
+    def __init__(self, backend=None, cache=None, batch_size=BATCH_SIZE,
+                 max_wait=BATCH_WAIT_SECONDS, max_concurrency=MAX_CONCURRENCY,
+                 bucket=None, breaker=None):
+        self.backend = backend if backend is not None else ChatCompletionsBackend()
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.bucket = bucket if bucket is not None else TokenBucket()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queue = asyncio.Queue()
+        self._pending = {}
+        self._tasks = set()
+        self._batcher = None
+        self.requests = 0
+        self.refined = 0
+        self.fallbacks = 0
+
+    async def refine(self, text, original_score):
+        """Returns the refined score of text, or original_score on failure."""
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached[0]
+
+        key = content_key(text, "gpt")
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+            await self._queue.put((key, text, original_score, future))
+            if self._batcher is None:
+                self._batcher = asyncio.create_task(self._run())
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            scores = None
+            if self.breaker.allow():
+                await self.bucket.acquire()
+                self.requests += 1
+                try:
+                    scores = await self.backend.score_batch(
+                        [(text, score) for _, text, score, _ in batch])
+                    self.breaker.success()
+                except Exception as e:
+                    self.breaker.failure()
+                    print(f"⚠️ GPT refinement failed: {e}")
+            for i, (key, text, original_score, future) in enumerate(batch):
+                if scores is None:
+                    self.fallbacks += 1
+                    result = original_score
+                else:
+                    self.refined += 1
+                    result = scores[i]
+                    if self.cache is not None:
+                        self.cache.put(text, result, None)
+                self._pending.pop(key, None)
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._semaphore.release()
+
+    def stats(self):
+        return {"requests": self.requests, "refined": self.refined,
+                "fallbacks": self.fallbacks, "queued": self._queue.qsize(),
+                "circuit": self.breaker.state}
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.backend.close()
+
+
+def gpt_refine_threat(text, original_score):
+    """Blocking single-text refinement for callers outside an event loop."""
+    async def refine_once():
+        backend = ChatCompletionsBackend()
+        try:
+            return (await backend.score_batch([(text, original_score)]))[0]
+        finally:
+            await backend.close()
+
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # or "gpt-4" if you have access
-            messages=[
-                {"role": "system", "content": "You are a threat assessment assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=10,
-            temperature=0.2
-        )
-        score = float(response.choices[0].message.content.strip())
-        return round(min(max(score, 0), 10), 2)  # clamp to 0–10
+        return asyncio.run(refine_once())
     except Exception as e:
         print(f"GPT failed: {e}")
         return original_score  # fallback
+
+
+# Request counter of a fake_app, e.g. app[FAKE_STATS]["requests"]
+FAKE_STATS = web.AppKey("fake_stats", dict)
+
+
+def fake_app(latency=0.2, fail_rate=0.0):
+    """
+    Local stand-in for the chat completions API: nudges each score up by
+    one for texts containing illicit-sounding words, down by one otherwise.
+    """
+    stats = {"requests": 0}
+    words = re.compile(r"drug|weapon|card|exploit|hack|leak|ransom", re.I)
+
+    async def completions(request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        if random.random() < fail_rate:
+            return web.json_response({"error": "injected failure"}, status=500)
+        content = body["messages"][-1]["content"]
+        items = _first_json(content)
+        scores = [_clamp(item["score"] + (1 if words.search(item["text"]) else -1))
+                  for item in items]
+        stats["requests"] += 1
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant", "content": json.dumps(scores)}}]
+        })
+
+    app = web.Application()
+    app[FAKE_STATS] = stats
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+if __name__ == "__main__":
+    # python -m ai_model.gpt_assist fake [port] [fail_rate]
+    import sys
+
+    if sys.argv[1] == "fake":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8089
+        fail_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+        print(f"🧪 Fake chat completions API on http://127.0.0.1:{port}/v1")
+        web.run_app(fake_app(fail_rate=fail_rate), host="127.0.0.1", port=port)
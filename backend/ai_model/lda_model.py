@@ -1,22 +1,158 @@
 # backend/ai_model/lda_model.py
 
+import copy
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
 from sklearn.decomposition import LatentDirichletAllocation
-from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Persisted next to this module; bump MODEL_FORMAT when the parameters
+# below change so an incompatible snapshot is not loaded
+TOPIC_MODEL_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "topic_model.joblib")
+MODEL_FORMAT = 1
+
+NUM_TOPICS = 5
+HASH_FEATURES = 2 ** 18
+UPDATE_BATCH = 256           # pages buffered per partial_fit
+EXPECTED_DOCUMENTS = 1e6     # online LDA corpus size, keeps updates small
+UNKNOWN_TOPIC = "Topic_unknown"
+
+
+def _vectorizer():
+    # Non-negative raw counts, as LDA expects; no vocabulary to fit or grow
+    return HashingVectorizer(n_features=HASH_FEATURES, stop_words="english",
+                             alternate_sign=False, norm=None)
+
+
+def _lda():
+    return LatentDirichletAllocation(n_components=NUM_TOPICS, learning_method="online",
+                                     total_samples=EXPECTED_DOCUMENTS, random_state=42)
+
+
+class TopicModel:
+    """
+    Online LDA over hashed term counts. New pages are buffered and folded
+    in with partial_fit, so topic ids stay stable as the corpus grows and
+    nothing but the current mini-batch is held in memory. `version`
+    counts the partial_fit updates applied so far. Updates fit a copy of
+    the model and swap it in, so topic detection never waits on a fit.
+    """
+
+    def __init__(self, path=TOPIC_MODEL_FILE):
+        self.path = path
+        self.vectorizer = _vectorizer()
+        self.lda = _lda()
+        self.version = 0
+        self.documents = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=TOPIC_MODEL_FILE):
+        """Loads the snapshot at path, or starts an empty model."""
+        model = cls(path)
+        if os.path.exists(path):
+            state = joblib.load(path)
+            if state.get("format") == MODEL_FORMAT:
+                model.lda = state["lda"]
+                model.version = state["version"]
+                model.documents = state["documents"]
+            else:
+                print(f"⚠️ Ignoring topic model snapshot with format {state.get('format')}")
+        return model
+
+    @property
+    def fitted(self):
+        return self.version > 0
+
+    def detect_topics(self, texts):
+        """Returns the (len(texts), NUM_TOPICS) topic distributions."""
+        with self._lock:
+            lda, fitted = self.lda, self.fitted
+        if not fitted:
+            return np.full((len(texts), NUM_TOPICS), 1 / NUM_TOPICS)
+        return lda.transform(self.vectorizer.transform(texts))
 
-# Load on startup
-vectorizer = CountVectorizer(stop_words='english', max_df=0.9, min_df=2)
-lda_model = LatentDirichletAllocation(n_components=5, random_state=42)
+    def observe(self, texts):
+        """Buffers new pages and runs partial_fit once a batch is full."""
+        with self._lock:
+            self._buffer.extend(texts)
+            if len(self._buffer) < UPDATE_BATCH:
+                return
+            batch, self._buffer = self._buffer, []
+        self.update(batch)
 
+    def update(self, texts):
+        X = self.vectorizer.transform(texts)
+        with self._update_lock:
+            lda = copy.deepcopy(self.lda)
+            lda.partial_fit(X)
+            with self._lock:
+                self.lda = lda
+                self.version += 1
+                self.documents += len(texts)
 
-def train_lda(text_samples):
-    """Train LDA model if needed"""
-    X = vectorizer.fit_transform(text_samples)
-    lda_model.fit(X)
+    def save(self):
+        """Atomically writes the model and its version to disk."""
+        with self._lock:
+            state = {"format": MODEL_FORMAT, "lda": self.lda,
+                     "version": self.version, "documents": self.documents}
+        # Fitted models are never modified in place, so the dump needs no lock
+        joblib.dump(state, self.path + ".tmp")
+        os.replace(self.path + ".tmp", self.path)
+
+
+topic_model = TopicModel.load()
+
+
+def topic_label(distribution):
+    if not topic_model.fitted:
+        return UNKNOWN_TOPIC
+    return f"Topic_{int(np.argmax(distribution))}"
+
+
+def train_lda(text_samples, batch_size=UPDATE_BATCH):
+    """Streams an iterable of texts into the model in mini-batches."""
+    batch = []
+    for text in text_samples:
+        batch.append(text)
+        if len(batch) == batch_size:
+            topic_model.update(batch)
+            batch = []
+    if batch:
+        topic_model.update(batch)
+    topic_model.save()
+
+
+def detect_topics(texts):
+    """Topic distributions of a batch of texts."""
+    return topic_model.detect_topics(texts)
 
 
 def detect_topic(text):
     """Detect most probable topic for a new text"""
-    X = vectorizer.transform([text])
-    topic_distribution = lda_model.transform(X)
-    top_topic = topic_distribution.argmax()
-    return f"Topic_{top_topic}"
+    return topic_label(detect_topics([text])[0])
+
+
+if __name__ == "__main__":
+    # Run from backend/: python -m ai_model.lda_model <scraped_data dir>
+    import sys
+
+    from database.record_store import iter_records
+
+    train_lda(record["text"] for record in iter_records(sys.argv[1])
+              if record.get("text") and record.get("status") is None)
+    print(f"✅ Topic model v{topic_model.version} fitted on {topic_model.documents} pages")
+
+    sample = [record["text"] for record in iter_records(sys.argv[1]) if record.get("text")][:1024]
+    start = time.perf_counter()
+    for i in range(0, len(sample), 64):
+        detect_topics(sample[i:i + 64])
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {1e6 * elapsed / max(len(sample), 1):.0f} µs per page in batches of 64")
@@ -1,24 +1,18 @@
-from transformers import XLMRobertaTokenizer
-import torch
-from ai_model.mpnet_encoder import mpnet_encode
-from backend.ai_model.xlm_roberta_model import XLMRobertaMPNet
+from ai_model.batching import predict_batch
+from ai_model.model_registry import get_threat_model, get_tokenizer
+from ai_model.windowing import LONG_DOC_MODE, predict_windows
 
-tokenizer = XLMRobertaTokenizer.from_pretrained("xlm-roberta-base")
-model = XLMRobertaMPNet(num_labels=11)
-model.load_state_dict(torch.load("./xlm_roberta_elmo_model/pytorch_model.bin"))
-model.eval()
 
+def predict_threat_levels(texts):
+    """
+    Scores a batch of texts with a single forward pass. Long texts are
+    split into overlapping windows unless THREAT_LONG_DOCS=off.
+    """
+    model, encode_fn = get_threat_model()
+    if LONG_DOC_MODE == "off":
+        return predict_batch(model, get_tokenizer(), texts, encode_fn=encode_fn)
+    return predict_windows(model, get_tokenizer(), texts, LONG_DOC_MODE, encode_fn=encode_fn)
 
-def predict_threat_level(text):
-    inputs = tokenizer(text, return_tensors="pt",
-                       truncation=True, padding=True)
-    mpnet_vec = mpnet_encode([text])[0].unsqueeze(0)
 
-    with torch.no_grad():
-        outputs = model(
-            input_ids=inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            mpnet_emb=mpnet_vec
-        )
-        logits = outputs["logits"]
-        return int(torch.argmax(logits, dim=1))
+def predict_threat_level(text):
+    return predict_threat_levels([text])[0]
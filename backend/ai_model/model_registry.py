@@ -0,0 +1,125 @@
+# backend/ai_model/model_registry.py
+
+import os
+import threading
+
+import torch
+from transformers import XLMRobertaTokenizer
+try:
+    from transformers.modeling_utils import no_init_weights
+except ImportError:  # transformers >= 5
+    from transformers.initialization import no_init_weights
+
+from .cpu_inference import (MODEL_BACKEND, ONNX_DIR, OnnxMPNetEncoder, OnnxThreatModel,
+                            load_inference_backend, onnx_available)
+from .mpnet_encoder import load_mpnet
+from .xlm_roberta_model import XLMRobertaMPNet
+
+MODEL_CHECKPOINT = "./xlm_roberta_elmo_model/pytorch_model.bin"
+NUM_LABELS = 11
+
+# name -> loaded artifact, shared by every caller in the process
+_loaded = {}
+_lock = threading.RLock()
+
+
+def _once(name, loader):
+    with _lock:
+        if name not in _loaded:
+            _loaded[name] = loader()
+        return _loaded[name]
+
+
+def weights_path(checkpoint=MODEL_CHECKPOINT):
+    """
+    The file load_state_dict reads for checkpoint: a model.safetensors next
+    to it if present, else the checkpoint itself. Cache versions are
+    derived from this file.
+    """
+    safetensors_path = os.path.join(
+        os.path.dirname(checkpoint), "model.safetensors")
+    return safetensors_path if os.path.exists(safetensors_path) else checkpoint
+
+
+def load_state_dict(checkpoint=MODEL_CHECKPOINT):
+    """
+    Loads checkpoint weights memory-mapped from disk (see weights_path).
+    Mapped pages are shared between worker processes via the page cache.
+    """
+    path = weights_path(checkpoint)
+    if path.endswith(".safetensors"):
+        from safetensors.torch import load_file
+        return load_file(path, device="cpu")
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+
+def convert_to_safetensors(checkpoint=MODEL_CHECKPOINT):
+    """Writes model.safetensors next to a pytorch_model.bin checkpoint."""
+    from safetensors.torch import save_file
+    state = torch.load(checkpoint, map_location="cpu", weights_only=True)
+    target = os.path.join(os.path.dirname(checkpoint), "model.safetensors")
+    save_file({k: v.contiguous() for k, v in state.items()}, target)
+    print(f"✅ Saved {target}")
+
+
+def save_state_dict(state, checkpoint=MODEL_CHECKPOINT):
+    """
+    Writes state to checkpoint and to the model.safetensors next to it,
+    which load_state_dict prefers. Both files are replaced atomically:
+    the old ones may still be mapped.
+    """
+    from safetensors.torch import save_file
+
+    state = {k: v.contiguous() for k, v in state.items()}
+    torch.save(state, checkpoint + ".tmp")
+    os.replace(checkpoint + ".tmp", checkpoint)
+    target = os.path.join(os.path.dirname(checkpoint), "model.safetensors")
+    save_file(state, target + ".tmp")
+    os.replace(target + ".tmp", target)
+    print(f"✅ Saved {checkpoint} and {target}")
+
+
+def load_fp32_model(checkpoint=MODEL_CHECKPOINT):
+    """
+    Builds XLMRobertaMPNet from config without downloading or initializing
+    the pretrained xlm-roberta-base weights, then assigns the checkpoint
+    tensors in place so they stay memory-mapped.
+    """
+    with no_init_weights():
+        model = XLMRobertaMPNet(num_labels=NUM_LABELS, pretrained=False)
+    model.load_state_dict(load_state_dict(checkpoint), assign=True)
+    return model.eval()
+
+
+def get_tokenizer():
+    return _once("tokenizer", lambda: XLMRobertaTokenizer.from_pretrained("xlm-roberta-base"))
+
+
+def get_fp32_model():
+    return _once("fp32", load_fp32_model)
+
+
+def _load_backend(backend):
+    if backend == "fp32":
+        return load_inference_backend("fp32", get_fp32_model())
+    if backend == "onnx" and not onnx_available():
+        return load_inference_backend("onnx", get_fp32_model())
+    if backend == "onnx" and os.path.exists(os.path.join(ONNX_DIR, "threat_model.onnx")):
+        return OnnxThreatModel(ONNX_DIR), OnnxMPNetEncoder(ONNX_DIR)
+    # The fp32 copies are only needed to quantize or export, so they are not kept
+    return load_inference_backend(backend, load_fp32_model(), mpnet=load_mpnet())
+
+
+def get_threat_model(backend=MODEL_BACKEND):
+    """Returns (model, encode_fn) for backend, loading it once per process."""
+    return _once(f"threat_model:{backend}", lambda: _load_backend(backend))
+
+
+def preload(backend=MODEL_BACKEND):
+    """
+    Loads everything the scorer needs up front. Call this before forking
+    worker processes so they inherit the weights copy-on-write.
+    """
+    get_tokenizer()
+    get_threat_model(backend)
+    print(f"🧠 Threat model backend: {backend}")
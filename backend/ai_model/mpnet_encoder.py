@@ -1,14 +1,35 @@
 from sentence_transformers import SentenceTransformer
+import threading
 import torch
 
-# Load once
-mpnet_model = SentenceTransformer('all-mpnet-base-v2')
+MPNET_NAME = 'all-mpnet-base-v2'
 
+# Loaded once, on first use
+mpnet_model = None
+_lock = threading.Lock()
 
-def mpnet_encode(texts):
+
+def load_mpnet():
+    """Loads a fresh SentenceTransformer (not shared)."""
+    return SentenceTransformer(MPNET_NAME)
+
+
+def get_mpnet_model():
+    """Returns the process-wide SentenceTransformer, loading it on first use."""
+    global mpnet_model
+    with _lock:
+        if mpnet_model is None:
+            mpnet_model = load_mpnet()
+        return mpnet_model
+
+
+def mpnet_encode(texts, batch_size=32, model=None):
     """
     Returns averaged MPNet embeddings (768-dim).
+    Pass model to encode with a different (e.g. quantized) copy.
     """
-    embeddings = mpnet_model.encode(
-        texts, convert_to_tensor=True, normalize_embeddings=True)
+    if model is None:
+        model = get_mpnet_model()
+    embeddings = model.encode(
+        texts, batch_size=batch_size, convert_to_tensor=True, normalize_embeddings=True)
     return embeddings  # shape: (batch_size, 768)
@@ -1,5 +1,4 @@
-import re
-from bs4 import BeautifulSoup
+from .extraction import clean_html, normalize_keywords
 
 
 def clean_text(html):
@@ -9,18 +8,4 @@ def clean_text(html):
     - Normalizes spacing and removes unwanted symbols
     - Converts to lowercase
     """
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Remove unnecessary elements
-    for tag in soup(["script", "style", "noscript", "iframe"]):
-        tag.decompose()
-
-    text = soup.get_text(separator=" ")
-
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text)
-
-    # Remove non-alphanumerics (keep space)
-    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
-
-    return text.lower().strip()
+    return normalize_keywords(clean_html(html, separator=" "))
@@ -1,9 +1,10 @@
 # backend/ai_model/rl_model.py
 
 import numpy as np
-import random
 import os
 import json
+import threading
+import time
 
 # Parameters
 # How finely we discretize threat scores (0-10 divided into 20 bins)
@@ -13,23 +14,13 @@ ALPHA = 0.1       # Learning rate
 GAMMA = 0.9       # Discount factor
 EPSILON = 0.1     # Exploration vs Exploitation
 
-# File to save Q-table
-QTABLE_FILE = os.path.abspath("backend/ai_model/q_table.json")
+# File to save Q-table (next to this module, not the CWD)
+QTABLE_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "q_table.json")
 
-# Load or initialize Q-table
-
-
-def load_q_table():
-    if os.path.exists(QTABLE_FILE):
-        with open(QTABLE_FILE, "r") as file:
-            return json.load(file)
-    else:
-        return {}
-
-
-def save_q_table(q_table):
-    with open(QTABLE_FILE, "w") as file:
-        json.dump(q_table, file)
+# Snapshot the in-memory table after this many updates or seconds
+SNAPSHOT_EVERY = 500
+SNAPSHOT_INTERVAL_SECONDS = 60
 
 # Discretize a score
 
@@ -43,49 +34,109 @@ def discretize(score):
 def get_state_key(score, topic):
     return f"{discretize(score)}_{topic}"
 
-# Choose an action
-
-
-def choose_action(state_key, q_table):
-    if random.random() < EPSILON:
-        return random.choice([0, 1, 2])  # Explore
-    else:
-        # Exploit best known action
-        return np.argmax(q_table.get(state_key, [0, 0, 0]))
-
-# Update Q-table
 
-
-def update_q_table(q_table, state_key, action, reward, next_state_key):
-    if state_key not in q_table:
-        q_table[state_key] = [0, 0, 0]
-    if next_state_key not in q_table:
-        q_table[next_state_key] = [0, 0, 0]
-
-    predict = q_table[state_key][action]
-    target = reward + GAMMA * max(q_table[next_state_key])
-    q_table[state_key][action] += ALPHA * (target - predict)
-
-# Apply action to adjust score
+class QTable:
+    """
+    Dense in-memory Q-table of shape (score bins, topics, actions).
+    Topics are interned to integer ids; the table grows as new topics
+    appear. Updates are serialized with a lock and the table is
+    snapshotted atomically to QTABLE_FILE in the legacy JSON key format.
+    """
+
+    def __init__(self, path=QTABLE_FILE):
+        self.path = path
+        self.topic_ids = {}
+        self.values = np.zeros((STATE_BINS + 1, 0, len(ACTIONS)))
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._last_snapshot = time.monotonic()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r") as file:
+            q_table = json.load(file)
+        for key, row in q_table.items():
+            bin_index, topic = key.split("_", 1)
+            topic_id = self.intern(topic)
+            self.values[int(bin_index), topic_id] = row
+
+    def intern(self, topic):
+        """Returns the integer id of topic, growing the table if needed."""
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            topic_id = self.topic_ids[topic] = len(self.topic_ids)
+            if topic_id >= self.values.shape[1]:
+                grown = np.zeros((STATE_BINS + 1, max(8, 2 * topic_id), len(ACTIONS)))
+                grown[:, :self.values.shape[1]] = self.values
+                self.values = grown
+        return topic_id
+
+    def adjust(self, scores, topics):
+        """Vectorized epsilon-greedy adjustment and Q-update for a batch."""
+        scores = np.asarray(scores, dtype=float)
+        with self._lock:
+            topic_ids = np.array([self.intern(t) for t in topics], dtype=int)
+            bins = np.clip((scores / (10 / STATE_BINS)).astype(int), 0, STATE_BINS)
+
+            actions = np.argmax(self.values[bins, topic_ids], axis=1)
+            explore = np.random.random(len(scores)) < EPSILON
+            actions[explore] = np.random.randint(
+                0, len(ACTIONS), explore.sum())
+
+            new_scores = np.round(
+                np.clip(scores + np.asarray(ACTIONS)[actions], 0, 10), 2)
+
+            # Simulate reward (can later use real alerts, analyst feedback, etc.)
+            rewards = np.random.choice([1, 0, -1], len(scores))
+
+            next_bins = np.clip(
+                (new_scores / (10 / STATE_BINS)).astype(int), 0, STATE_BINS)
+            predict = self.values[bins, topic_ids, actions]
+            target = rewards + GAMMA * \
+                self.values[next_bins, topic_ids].max(axis=1)
+            np.add.at(self.values, (bins, topic_ids, actions),
+                      ALPHA * (target - predict))
+
+            self._dirty += len(scores)
+            due = (self._dirty >= SNAPSHOT_EVERY
+                   or time.monotonic() - self._last_snapshot >= SNAPSHOT_INTERVAL_SECONDS)
+        if due:
+            self.snapshot()
+        return new_scores, actions, rewards
+
+    def snapshot(self):
+        """Atomically writes the table to disk in the legacy JSON format."""
+        with self._lock:
+            q_table = {
+                f"{bin_index}_{topic}": self.values[bin_index, topic_id].tolist()
+                for topic, topic_id in self.topic_ids.items()
+                for bin_index in range(STATE_BINS + 1)
+                if self.values[bin_index, topic_id].any()
+            }
+            self._dirty = 0
+            self._last_snapshot = time.monotonic()
+            with open(self.path + ".tmp", "w") as file:
+                json.dump(q_table, file)
+            os.replace(self.path + ".tmp", self.path)
+
+
+q_table = QTable()
+
+# Apply action to adjust scores
+
+
+def adjust_scores(scores, topics):
+    """Adjusts a batch of scores; returns a list of new scores."""
+    new_scores, _, _ = q_table.adjust(scores, topics)
+    return new_scores.tolist()
 
 
 def adjust_score(score, topic):
-    q_table = load_q_table()
-    state_key = get_state_key(score, topic)
-    action = choose_action(state_key, q_table)
-
-    # Apply action: -0.5, 0, or +0.5
-    new_score = round(min(max(score + ACTIONS[action], 0), 10), 2)
-
-    # Simulate reward (can later use real alerts, analyst feedback, etc.)
-    reward = random.choice([1, 0, -1])
-
-    next_state_key = get_state_key(new_score, topic)
-    update_q_table(q_table, state_key, action, reward, next_state_key)
-
-    save_q_table(q_table)
+    new_scores, actions, rewards = q_table.adjust([score], [topic])
+    new_score = float(new_scores[0])
 
     print(
-        f"🧠 RL: {state_key} → action {ACTIONS[action]} → new score {new_score} (reward: {reward})")
+        f"🧠 RL: {get_state_key(score, topic)} → action {ACTIONS[actions[0]]} → new score {new_score} (reward: {rewards[0]})")
 
     return new_score
@@ -0,0 +1,144 @@
+# backend/ai_model/score_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Cache limits
+MAX_ENTRIES = 50000
+TTL_SECONDS = 7 * 24 * 3600
+EVICT_EVERY = 1000          # puts between eviction passes
+ACCESS_FLUSH_EVERY = 1000   # buffered last-access updates before they are written
+
+
+def model_version(checkpoint_path):
+    """Derives a version tag from a checkpoint file's size and mtime."""
+    try:
+        stat = os.stat(checkpoint_path)
+        return f"{stat.st_size}-{int(stat.st_mtime)}"
+    except OSError:
+        return "unknown"
+
+
+def content_key(text, version):
+    """Hashes cleaned text together with the model version."""
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _as_score(value):
+    # The REAL column hands back model scores (ints) as floats
+    return int(value) if float(value).is_integer() else value
+
+
+class ScoreCache:
+    """
+    SQLite-backed cache of (score, topic) keyed by content hash.
+    Entries expire after ttl seconds; once more than max_entries are
+    stored, the least recently used ones are evicted. A tag keeps results
+    of another scorer (e.g. the keyword tier) apart from the model's.
+    Hits only buffer their access time and eviction runs every evict_every
+    puts, so lookups never write; call flush() to persist access times.
+    """
+
+    def __init__(self, path, version, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS,
+                 evict_every=EVICT_EVERY):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._accessed = {}  # key -> last access not yet written
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                topic TEXT,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scores_access ON scores(last_access)")
+        self._conn.commit()
+
+    def _key(self, text, tag):
+        return content_key(text, self.version if tag is None else f"{self.version}/{tag}")
+
+    def get(self, text, tag=None):
+        """Returns (score, topic) for text, or None on a miss."""
+        key = self._key(text, tag)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score, topic, created FROM scores WHERE key = ?", (key,)).fetchone()
+            # Expired rows are left for the next eviction pass
+            if row is None or now - row[2] > self.ttl:
+                self.misses += 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_EVERY:
+                self._write_accesses()
+                self._conn.commit()
+            self.hits += 1
+            return _as_score(row[0]), row[1]
+
+    def put(self, text, score, topic, tag=None):
+        key = self._key(text, tag)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                (key, score, topic, now, now))
+            self._accessed.pop(key, None)
+            self._puts += 1
+            if self._puts % self.evict_every == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def flush(self):
+        """Writes buffered access times."""
+        with self._lock:
+            if self._accessed:
+                self._write_accesses()
+                self._conn.commit()
+
+    def _write_accesses(self):
+        self._conn.executemany("UPDATE scores SET last_access = ? WHERE key = ?",
+                               [(t, key) for key, t in self._accessed.items()])
+        self._accessed = {}
+
+    def _evict(self, now):
+        self._write_accesses()
+        self._conn.execute(
+            "DELETE FROM scores WHERE created < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        if count > self.max_entries:
+            self._conn.execute("""
+                DELETE FROM scores WHERE key IN (
+                    SELECT key FROM scores ORDER BY last_access ASC LIMIT ?
+                )""", (count - self.max_entries,))
+
+    def stats(self):
+        """Returns hit/miss counters and the hit rate."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._write_accesses()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,61 @@
+# backend/ai_model/scraping/async_fetcher.py
+
+import asyncio
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+
+# Tor SOCKS proxy (rdns=True resolves .onion names through Tor, like socks5h)
+TOR_PROXY = "socks5://127.0.0.1:9150"
+
+MAX_CONCURRENCY = 32
+PER_HOST_CONCURRENCY = 2
+TIMEOUT_SECONDS = 20
+
+
+class AsyncFetcher:
+    """
+    Pooled asyncio HTTP client routed through Tor.
+    Keeps one ClientSession (and its keep-alive connections) for its whole
+    lifetime and bounds in-flight requests globally and per host.
+    Pass proxy_url=None to fetch directly, e.g. from a local test server.
+    """
+
+    def __init__(self, proxy_url=TOR_PROXY, max_concurrency=MAX_CONCURRENCY,
+                 per_host=PER_HOST_CONCURRENCY, timeout=TIMEOUT_SECONDS):
+        self.proxy_url = proxy_url
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self._session = None
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    async def __aenter__(self):
+        if self.proxy_url:
+            connector = ProxyConnector.from_url(
+                self.proxy_url, rdns=True,
+                limit=self.max_concurrency, limit_per_host=self.per_host)
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency, limit_per_host=self.per_host)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def fetch(self, url, headers=None):
+        """
+        Returns (status, body text, response headers) for url; the headers
+        are a case-insensitive copy.
+        """
+        host = urlsplit(url).hostname or ""
+        async with self._global, self._hosts[host]:
+            async with self._session.get(url, headers=headers) as response:
+                body = await response.text(errors="replace")
+                return response.status, body, response.headers.copy()
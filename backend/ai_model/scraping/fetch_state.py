@@ -0,0 +1,85 @@
+# backend/ai_model/scraping/fetch_state.py
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+def body_digest(body):
+    """Hashes a raw response body."""
+    return hashlib.sha256(body.encode("utf-8", errors="replace")).hexdigest()
+
+
+class FetchState:
+    """
+    SQLite-backed per-URL state for change detection between cycles.
+    Stores the ETag / Last-Modified validators, the body digest and the
+    last score and topic, so unchanged pages can skip cleaning and scoring.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                digest TEXT,
+                score REAL,
+                topic TEXT,
+                last_seen REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    def get(self, url):
+        """Returns the stored state of url as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM fetch_state WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def record(self, url, etag, last_modified, digest, score, topic):
+        """Stores validators and the result of a freshly scored page."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetch_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, digest, score, topic, time.time()))
+            self._conn.commit()
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Marks an unchanged page as seen, refreshing any new validators."""
+        with self._lock:
+            self._conn.execute("""
+                UPDATE fetch_state SET
+                    etag = COALESCE(?, etag),
+                    last_modified = COALESCE(?, last_modified),
+                    last_seen = ?
+                WHERE url = ?""", (etag, last_modified, time.time(), url))
+            self._conn.commit()
+
+    def update_score(self, url, score):
+        """Replaces the stored score, e.g. once GPT refinement lands."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE fetch_state SET score = ? WHERE url = ?", (score, url))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def conditional_headers(state):
+    """Builds If-None-Match / If-Modified-Since headers from stored state."""
+    headers = {}
+    if state is None:
+        return headers
+    if state["etag"]:
+        headers["If-None-Match"] = state["etag"]
+    if state["last_modified"]:
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
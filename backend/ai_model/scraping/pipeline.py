@@ -0,0 +1,89 @@
+# backend/ai_model/scraping/pipeline.py
+
+import asyncio
+import time
+
+QUEUE_SIZE = 64
+
+_DONE = object()
+
+
+async def _worker(inbox, outbox, stage, queue_gauge=None):
+    while True:
+        item = await inbox.get()
+        if item is _DONE:
+            return
+        if queue_gauge is not None:
+            queue_gauge.set(inbox.qsize(), stage=stage.__name__)
+        try:
+            result = await stage(item)
+        except Exception as e:
+            print(f"⚠️ Pipeline stage {stage.__name__} failed: {e}")
+            continue
+        if result is not None and outbox is not None:
+            await outbox.put(result)
+
+
+async def run_pipeline(items, stages, queue_size=QUEUE_SIZE, queue_gauge=None):
+    """
+    Pushes items through a chain of async stages connected by bounded queues.
+
+    stages is a list of (async_fn, workers). Each fn takes one item and
+    returns the item for the next stage, or None to drop it. Because the
+    queues are bounded, a slow stage applies backpressure to the ones
+    before it while all stages run concurrently.
+
+    queue_gauge, if given, receives each stage's inbox depth as items
+    are taken off it.
+    """
+    queues = [asyncio.Queue(queue_size) for _ in stages]
+    workers = []
+    for i, (stage, count) in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(queues) else None
+        workers.append([asyncio.create_task(_worker(queues[i], outbox, stage, queue_gauge))
+                        for _ in range(count)])
+
+    for item in items:
+        await queues[0].put(item)
+
+    # Drain stage by stage so every item reaches the end before shutdown
+    for inbox, tasks in zip(queues, workers):
+        for _ in tasks:
+            await inbox.put(_DONE)
+        await asyncio.gather(*tasks)
+    if queue_gauge is not None:
+        for stage, _ in stages:
+            queue_gauge.set(0, stage=stage.__name__)
+
+
+class Periodic:
+    """
+    Runs an async callback at most once per period seconds, and only if
+    mark() was called since its last run. close() runs it once more when
+    marked work is still outstanding.
+    """
+
+    def __init__(self, callback, period, clock=time.monotonic):
+        self.callback = callback
+        self.period = period
+        self.clock = clock
+        self.pending = 0
+        self.runs = 0
+        self._last = clock()
+
+    def mark(self):
+        self.pending += 1
+
+    async def maybe_run(self):
+        if self.pending and self.clock() - self._last >= self.period:
+            await self.run()
+
+    async def run(self):
+        self.pending = 0
+        self._last = self.clock()
+        self.runs += 1
+        await self.callback()
+
+    async def close(self):
+        if self.pending:
+            await self.run()
@@ -1,21 +1,35 @@
-from ..xlm_roberta_model import XLMRobertaMPNet
-from transformers import XLMRobertaTokenizer
-import torch
 import os
 import sys
 import json
 import time
-import requests
-import pandas as pd
+import asyncio
+from urllib.parse import urlsplit
 import matplotlib.pyplot as plt
 from datetime import datetime
-from bs4 import BeautifulSoup
-import re
-from ..mpnet_encoder import mpnet_encode
-from ..gpt_assist import gpt_refine_threat
-from ..lda_model import detect_topic
-from elasticsearch_ops.elastic_manager import save_entry, create_index
-from ..rl_model import adjust_score
+from ..gpt_assist import GPTRefiner
+from ..lda_model import UNKNOWN_TOPIC, detect_topic, topic_model
+from elasticsearch_ops.elastic_manager import (save_entry, create_index, flush_entries,
+                                               document_id, content_digest)
+from database.record_store import RecordStore, iter_records, migrate_json
+from database.rollups import TrendRollups, pick_resolution
+from ..rl_model import adjust_score, q_table
+from ..batching import MicroBatchScorer, predict_batch
+from ..windowing import LONG_DOC_MODE, predict_windows
+from ..cpu_inference import MODEL_BACKEND
+from ..model_registry import (MODEL_CHECKPOINT, get_threat_model, get_tokenizer, preload,
+                              weights_path)
+from ..score_cache import ScoreCache, model_version
+from ..extraction import clean_html, normalize_keywords, start_pool
+from ..cascade import ScoringCascade
+from ..near_duplicates import NearDuplicateIndex, minhash
+from ..vector_index import EmbeddingIndex
+from utils.preprocess import load_matcher
+from utils.workbook_cache import workbook_path
+from utils.metrics import METRICS_PORT, SIZE_BUCKETS, registry, start_http_server
+from .async_fetcher import AsyncFetcher
+from .pipeline import Periodic, run_pipeline
+from .fetch_state import FetchState, body_digest, conditional_headers
+from .revisit_scheduler import RevisitScheduler
 
 
 # Set up Python path first
@@ -26,119 +40,222 @@ sys.path.insert(0, PROJECT_ROOT)
 BACKEND_PATH = os.path.join(PROJECT_ROOT, "backend")
 sys.path.insert(0, BACKEND_PATH)
 
-# Now import custom modules
-
-try:
-    tokenizer = XLMRobertaTokenizer.from_pretrained("xlm-roberta-base")
-    model = XLMRobertaMPNet(num_labels=11)
-    model.load_state_dict(torch.load(
-        "./xlm_roberta_elmo_model/pytorch_model.bin", map_location=torch.device('cpu')))
-    model.eval()
-except Exception as e:
-    print(f"❌ Model loading failed: {e}")
-    sys.exit(1)
-
 # Define paths
 PREDICTIONS_FILE = os.path.join(BACKEND_PATH, "predictions.json")
 TARGET_FILE = os.path.join(BACKEND_PATH, "scraping", "target_url.txt")
 SCRAPED_DATA_FILE = os.path.join(BACKEND_PATH, "scraped_data.json")
+SCRAPED_DATA_DIR = os.path.join(BACKEND_PATH, "scraped_data")
 GRAPH_FILE = os.path.join(BACKEND_PATH, "threat_trend.png")
+ROLLUPS_FILE = os.path.join(BACKEND_PATH, "trend_rollups.json")
+SCORE_CACHE_FILE = os.path.join(BACKEND_PATH, "score_cache.db")
+FETCH_STATE_FILE = os.path.join(BACKEND_PATH, "fetch_state.db")
+GPT_CACHE_FILE = os.path.join(BACKEND_PATH, "gpt_cache.db")
+NEAR_DUP_FILE = os.path.join(BACKEND_PATH, "near_duplicates.npz")
+VECTOR_INDEX_DIR = os.path.join(BACKEND_PATH, "vector_index")
+REVISIT_STATE_FILE = os.path.join(BACKEND_PATH, "revisit_state.npz")
+KEYWORD_WORKBOOK = workbook_path()
+METRICS_SUMMARY_FILE = os.path.join(BACKEND_PATH, "metrics_summary.json")
+
+# Micro-batching of model inference across the fetch loop
+BATCH_SIZE = 16
+BATCH_WAIT_SECONDS = 0.05
+
+# Async pipeline: fetch -> clean -> score -> persist
+CLEAN_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+SCORE_WORKERS = BATCH_SIZE
+
+# Longest idle wait between scheduler checks
+MAX_IDLE_SECONDS = 60
+
+# Minimum time between ES flushes, state saves, stats and the trend graph
+HOUSEKEEPING_SECONDS = 60
+
+# Scores of unchanged pages are reused instead of re-running the models;
+# the tag changes with the weights file the registry loads, the inference
+# backend and the long-page mode
+score_cache = ScoreCache(SCORE_CACHE_FILE, f"{model_version(weights_path(MODEL_CHECKPOINT))}-"
+                                           f"{MODEL_BACKEND}-{LONG_DOC_MODE}")
+
+# Keyword tier in front of the transformer model; without the workbook
+# every page is escalated
+try:
+    cascade = ScoringCascade(load_matcher(KEYWORD_WORKBOOK, normalize=normalize_keywords))
+except Exception as e:
+    print(f"⚠️ Keyword tier unavailable, scoring every page with the model: {e}")
+    cascade = ScoringCascade(None)
+
+# MinHash/LSH clusters of mirrors and re-posted listings; a page close to
+# an already scored one reuses its cluster's score and topic. Clusters are
+# dropped whenever the score cache would be
+near_duplicates = NearDuplicateIndex.load(NEAR_DUP_FILE,
+                                          f"{score_cache.version}/{cascade.cache_tag}")
+
+# MPNet embeddings of model-scored pages, keyed by Elasticsearch _id
+vector_index = EmbeddingIndex(VECTOR_INDEX_DIR)
+
+# ETag / Last-Modified / body digest per URL for conditional re-fetches
+fetch_state = FetchState(FETCH_STATE_FILE)
+
+# Per-URL next-visit times, adapted to change rate, score and failures
+revisit_scheduler = RevisitScheduler.load(REVISIT_STATE_FILE)
+
+# Append-only segment store replacing the scraped_data.json rewrite
+if not os.path.isdir(SCRAPED_DATA_DIR) and os.path.exists(SCRAPED_DATA_FILE):
+    migrate_json(SCRAPED_DATA_FILE, SCRAPED_DATA_DIR)
+record_store = RecordStore(SCRAPED_DATA_DIR)
+
+# Per-minute/hour/day score rollups the trend chart is drawn from
+GRAPH_MAX_POINTS = 500
+if os.path.exists(ROLLUPS_FILE):
+    trend_rollups = TrendRollups.load(ROLLUPS_FILE)
+else:
+    trend_rollups = TrendRollups.from_records(iter_records(SCRAPED_DATA_DIR))
+
+# Instrumentation, served on 127.0.0.1:METRICS_PORT/metrics (0 disables the
+# endpoint) and written to METRICS_SUMMARY_FILE after every cycle
+stage_seconds = registry.histogram("scraper_stage_seconds", "Latency of each scraping stage")
+pages_total = registry.counter("scraper_pages_total", "Pages processed by host and outcome")
+bytes_total = registry.counter("scraper_bytes_total", "HTML bytes fetched by host")
+cache_lookups = registry.counter("scraper_cache_lookups_total", "Cache lookups by cache and result")
+errors_total = registry.counter("scraper_errors_total", "Failures by host and stage")
+queue_depth = registry.gauge("scraper_queue_depth", "Items waiting in front of each stage")
+model_batch_size = registry.histogram("model_batch_size", "Texts per model forward",
+                                      SIZE_BUCKETS)
+pending_gauge = registry.gauge("scraper_pending_refinements", "GPT refinements in flight")
+due_gauge = registry.gauge("scraper_revisits_due", "Targets whose revisit time has passed")
+
+
+def host_of(url):
+    return urlsplit(url).hostname or "unknown"
+
+
+def instrumented(stage):
+    """Times an async pipeline stage and counts its failures per host."""
+    async def wrapper(item):
+        url = item if isinstance(item, str) else item["url"]
+        start = time.perf_counter()
+        try:
+            return await stage(item)
+        except Exception:
+            errors_total.inc(host=host_of(url), stage=stage.__name__)
+            raise
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stage=stage.__name__)
+    wrapper.__name__ = stage.__name__
+    return wrapper
 
-# Tor setup
 
+def clean_text(html_content):
+    return clean_html(html_content)
 
-def get_tor_session():
-    session = requests.Session()
-    session.proxies = {
-        'http': 'socks5h://127.0.0.1:9150',
-        'https': 'socks5h://127.0.0.1:9150'
-    }
-    return session
 
+def predict_with_embeddings(texts):
+    """
+    Scores a batch of texts with one MPNet encode and one XLM-R forward.
+    Pages past 512 tokens are scored as overlapping windows.
+    Returns [(score, MPNet embedding)].
+    """
+    model, encode_fn = get_threat_model()
+    model_batch_size.observe(len(texts))
+    with stage_seconds.time(stage="model"):
+        if LONG_DOC_MODE == "off":
+            labels, vectors = predict_batch(model, get_tokenizer(), texts, encode_fn=encode_fn,
+                                            return_embeddings=True)
+        else:
+            labels, vectors = predict_windows(model, get_tokenizer(), texts, LONG_DOC_MODE,
+                                              encode_fn=encode_fn, return_embeddings=True)
+    return list(zip(labels, vectors))
 
-def clean_text(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
-    for tag in soup(["script", "style", "noscript", "iframe"]):
-        tag.extract()
-    text = soup.get_text()
-    return re.sub(r"\s+", " ", text).strip()
+
+def predict_threat_levels(texts):
+    return [score for score, _ in predict_with_embeddings(texts)]
 
 
 def predict_threat_level(text):
-    inputs = tokenizer(text, return_tensors="pt",
-                       truncation=True, padding=True)
-    mpnet_vec = mpnet_encode([text])[0].unsqueeze(0)
-    with torch.no_grad():
-        outputs = model(
-            input_ids=inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            mpnet_emb=mpnet_vec
-        )
-        logits = outputs["logits"]
-        return int(torch.argmax(logits, dim=1))
-
-
-def scrape_page(url):
-    session = get_tor_session()
-    try:
-        response = session.get(url, timeout=20)
-    except Exception as e:
-        print(f"❌ Failed to fetch {url}: {e}")
-        return None
+    return predict_threat_levels([text])[0]
 
-    if response.status_code != 200:
-        print(f"⚠️ {url} returned status code {response.status_code}")
-        return None
 
-    text = clean_text(response.text)
+def check_text(text):
     if len(text) < 50:
         print("⚠️ Extracted text is too short, skipping...")
         return None
 
     print(f"📝 Cleaned Text Sample: {text[:300]}")
+    return text
 
-    try:
-        score = predict_threat_level(text)
-    except Exception as e:
-        print(f"❌ Error during threat level prediction: {e}")
-        return None
 
+def topic_known(topic):
+    """
+    False until the online topic model's first update. Results carrying
+    the placeholder topic are not cached, clustered or used for RL updates.
+    """
+    return topic != UNKNOWN_TOPIC
+
+
+def refine_score(text, score, tag=None):
+    """
+    Detects the topic and caches the result (under tag for keyword-tier
+    scores). GPT refinement happens later, in refine_later.
+    """
     topic = detect_topic(text)
+    if topic_known(topic):
+        score_cache.put(text, score, topic, tag)
+    return score, topic
+
 
-    if score >= 6:
+def find_near_duplicate(text):
+    """Returns (signature, cluster id or None) for cleaned page text."""
+    signature = minhash(text)
+    cluster = near_duplicates.query(signature)
+    cache_lookups.inc(cache="near_duplicate", result="miss" if cluster is None else "hit")
+    if cluster is not None:
+        near_duplicates.insert(signature, cluster)
+        print(f"🪞 Near-duplicate of cluster {cluster}, reusing its score")
+    return signature, cluster
+
+
+def build_entry(url, text, score, topic, cluster=None, adjust=True):
+    """Applies the RL adjustment (unless adjust=False) and builds the record to persist."""
+    if adjust and topic_known(topic):
         try:
-            score = gpt_refine_threat(text, score)
+            score = adjust_score(score, topic)
         except Exception as e:
-            print(f"⚠️ GPT refinement failed: {e}")
-
-    try:
-        score = adjust_score(score, topic)
-    except Exception as e:
-        print(f"⚠️ RL adjustment failed: {e}")
+            print(f"⚠️ RL adjustment failed: {e}")
 
     print(f"✅ Final Threat Score (GPT+RL): {score}, Topic: {topic}")
 
-    return {
+    entry = {
         "url": url,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "text": text[:500],
+        "content_digest": content_digest(text),
         "score": score,
         "topic": topic
     }
+    if cluster is not None:
+        entry["cluster"] = cluster
+    return entry
+
+
+def lookup_score(text):
+    """
+    Returns (score, topic, tag) of a cached model score, else of a cached
+    keyword-tier score (tag set), else None.
+    """
+    for tag in (None, cascade.cache_tag):
+        cached = score_cache.get(text, tag)
+        if cached is not None:
+            break
+    cache_lookups.inc(cache="score", result="miss" if cached is None else "hit")
+    return None if cached is None else (*cached, tag)
 
 
 def save_scraped_data(entry):
-    existing_data = []
-    if os.path.exists(SCRAPED_DATA_FILE):
-        try:
-            with open(SCRAPED_DATA_FILE, "r", encoding="utf-8") as file:
-                existing_data = json.load(file)
-        except json.JSONDecodeError:
-            print("⚠️ JSON file is corrupted. Creating a new one.")
-    existing_data.append(entry)
-    with open(SCRAPED_DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(existing_data, file, indent=4)
-    print(f"📁 Saved entry to {SCRAPED_DATA_FILE}")
+    record_store.append(entry)
+    # Heartbeats repeat the last observation; only fresh scores are trended
+    if entry.get("status") != "unchanged":
+        trend_rollups.add(entry["timestamp"], entry["score"], entry.get("topic"))
+    print(f"📁 Saved entry to {SCRAPED_DATA_DIR}")
 
 
 def save_predictions(predictions):
@@ -147,35 +264,21 @@ def save_predictions(predictions):
 
 
 def generate_graph():
-    if not os.path.exists(SCRAPED_DATA_FILE):
-        print("⚠️ No scraped data found!")
-        return
+    trend_rollups.save(ROLLUPS_FILE)
+    resolution = pick_resolution(trend_rollups, GRAPH_MAX_POINTS)
+    points = trend_rollups.series(resolution)[-GRAPH_MAX_POINTS:]
 
-    try:
-        with open(SCRAPED_DATA_FILE, "r", encoding="utf-8") as file:
-            data = json.load(file)
-    except json.JSONDecodeError:
-        print("❌ Error: Corrupted JSON file!")
-        return
-
-    if not data:
+    if not points:
         print("⚠️ No data available for graph generation.")
         return
 
-    df = pd.DataFrame(data)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors='coerce')
-    df.dropna(subset=["timestamp"], inplace=True)
-    df["score"] = pd.to_numeric(df["score"], errors='coerce')
-    df.sort_values("timestamp", inplace=True)
-
-    if df.empty:
-        print("⚠️ Not enough valid data to generate a graph.")
-        return
-
+    times, _, means, peaks, p95s = zip(*points)
     plt.figure(figsize=(12, 6))
-    plt.plot(df["timestamp"], df["score"], marker="o",
-             linestyle="-", color="red", label="Threat Score")
-    plt.xlabel("Time")
+    plt.plot(times, means, marker="o",
+             linestyle="-", color="red", label="Mean Threat Score")
+    plt.plot(times, p95s, linestyle="--", color="darkred", label="p95")
+    plt.plot(times, peaks, linestyle=":", color="black", label="Max")
+    plt.xlabel(f"Time (per {resolution})")
     plt.ylabel("Threat Score")
     plt.title("Dark Web Threat Level Trend Over Time")
     plt.xticks(rotation=45)
@@ -199,7 +302,237 @@ def load_target_urls():
         return []
 
 
+def build_heartbeat(url, state):
+    """Builds a "seen, unchanged" record carrying the last known score."""
+    print(f"💤 {url} unchanged since last cycle")
+    return {
+        "url": url,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "unchanged",
+        "score": state["score"] if state else None,
+        "topic": state["topic"] if state else None
+    }
+
+
+def persist_page(page):
+    url = page["url"]
+    pages_total.inc(host=host_of(url), outcome="unchanged" if page["unchanged"] else "changed")
+    if page["unchanged"]:
+        entry = build_heartbeat(url, page["state"])
+        fetch_state.touch(url, page.get("etag"), page.get("last_modified"))
+    else:
+        entry = build_entry(url, page["text"], page["score"], page["topic"], page.get("cluster"))
+        fetch_state.record(url, page["etag"], page["last_modified"],
+                           page["digest"], entry["score"], entry["topic"])
+        topic_model.observe([page["text"]])
+        if page.get("embedding") is not None:
+            vector_index.add([document_id(entry)], [page["embedding"]])
+    save_scraped_data(entry)
+    save_entry(entry)
+    return entry
+
+
+def apply_refinement(page, entry, refined_score):
+    """
+    Re-persists a page once its GPT refinement lands. The update keeps the
+    original timestamp, so it overwrites the Elasticsearch document and is
+    appended to the record store with status "refined". The RL step is not
+    run again: the original record's adjustment is carried over.
+    """
+    text, topic = page["text"], page["topic"]
+    if topic_known(topic):
+        score_cache.put(text, refined_score, topic, page.get("cache_tag"))
+    if page.get("cluster") is not None:
+        near_duplicates.update_score(page["cluster"], refined_score)
+    rl_offset = entry["score"] - page["score"]
+    final_score = round(min(max(refined_score + rl_offset, 0), 10), 2)
+    updated = build_entry(page["url"], text, final_score, topic, page.get("cluster"),
+                          adjust=False)
+    updated["timestamp"] = entry["timestamp"]
+    updated["status"] = "refined"
+    trend_rollups.replace(entry["timestamp"], entry["score"], updated["score"], topic)
+    fetch_state.update_score(page["url"], updated["score"])
+    record_store.append(updated)
+    save_entry(updated)
+
+
+async def refine_later(refiner, page, entry):
+    loop = asyncio.get_running_loop()
+    with cascade.timed("gpt"), stage_seconds.time(stage="gpt"):
+        refined_score = await refiner.refine(page["text"], page["score"])
+    await loop.run_in_executor(None, apply_refinement, page, entry, refined_score)
+
+
+# GPT refinements still running; their pages are already persisted
+pending_refinements = set()
+
+
+async def scrape_cycle(fetcher, scorer, refiner, clean_pool, target_urls):
+    """Runs one pass over target_urls through the staged pipeline."""
+    loop = asyncio.get_running_loop()
+
+    async def fetch(url):
+        state = fetch_state.get(url)
+        host = host_of(url)
+        try:
+            status, html, headers = await fetcher.fetch(
+                url, headers=conditional_headers(state))
+        except Exception as e:
+            print(f"❌ Failed to fetch {url}: {e}")
+            errors_total.inc(host=host, stage="fetch")
+            revisit_scheduler.record(url, failed=True)
+            return None
+        if status == 304:
+            cache_lookups.inc(cache="conditional", result="hit")
+            return {"url": url, "state": state, "unchanged": True}
+        if status != 200:
+            print(f"⚠️ {url} returned status code {status}")
+            errors_total.inc(host=host, stage="fetch")
+            revisit_scheduler.record(url, failed=True)
+            return None
+
+        bytes_total.inc(len(html), host=host)
+        digest = body_digest(html)
+        return {
+            "url": url,
+            "state": state,
+            "html": html,
+            "digest": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "unchanged": state is not None and state["digest"] == digest
+        }
+
+    async def clean(page):
+        if page["unchanged"]:
+            return page
+        text = check_text(await loop.run_in_executor(clean_pool, clean_html, page.pop("html")))
+        if text is None:
+            pages_total.inc(host=host_of(page["url"]), outcome="dropped")
+            revisit_scheduler.record(page["url"], changed=True)
+            return None
+        page["text"] = text
+        return page
+
+    async def score(page):
+        if page["unchanged"]:
+            return page
+        text = page["text"]
+        signature, cluster = await loop.run_in_executor(None, find_near_duplicate, text)
+        if cluster is not None:
+            page["score"], page["topic"] = near_duplicates.cluster_result(cluster)
+            page["cluster"] = cluster
+            return page
+
+        cached = await loop.run_in_executor(None, lookup_score, text)
+        if cached is None:
+            cheap_score, escalate, audited = cascade.triage(text)
+            if escalate:
+                with cascade.timed("model"):
+                    model_score, page["embedding"] = await asyncio.wrap_future(scorer.submit(text))
+                cascade.record_model(model_score, audited)
+                score, topic = await loop.run_in_executor(None, refine_score, text, model_score)
+                cached = score, topic, None
+            else:
+                score, topic = await loop.run_in_executor(None, refine_score, text, cheap_score,
+                                                          cascade.cache_tag)
+                cached = score, topic, cascade.cache_tag
+            page["refine"] = score >= cascade.refine_at
+        page["score"], page["topic"], page["cache_tag"] = cached
+        # Only model scores are shared with near-duplicates
+        if page["cache_tag"] is None and topic_known(page["topic"]):
+            page["cluster"] = near_duplicates.new_cluster(signature, page["score"], page["topic"])
+        return page
+
+    async def persist(page):
+        entry = await loop.run_in_executor(None, persist_page, page)
+        revisit_scheduler.record(page["url"], changed=not page["unchanged"], score=entry["score"])
+        if page.get("refine"):
+            task = asyncio.create_task(refine_later(refiner, page, entry))
+            pending_refinements.add(task)
+            task.add_done_callback(pending_refinements.discard)
+
+    await run_pipeline(target_urls, [
+        (instrumented(fetch), fetcher.max_concurrency),
+        (instrumented(clean), CLEAN_WORKERS),
+        (instrumented(score), SCORE_WORKERS),
+        (instrumented(persist), 1),
+    ], queue_gauge=queue_depth)
+    # URLs dropped by a failing stage are retried with backoff
+    revisit_scheduler.release()
+
+
+async def housekeeping(loop, scorer, refiner):
+    """Flushes ES, saves model and scheduler state, reports stats and redraws the graph."""
+    with stage_seconds.time(stage="es_flush"):
+        await loop.run_in_executor(None, flush_entries)
+    await loop.run_in_executor(None, score_cache.flush)
+    await loop.run_in_executor(None, refiner.cache.flush)
+    await loop.run_in_executor(None, q_table.snapshot)
+    await loop.run_in_executor(None, topic_model.save)
+    await loop.run_in_executor(None, near_duplicates.save)
+    await loop.run_in_executor(None, vector_index.save)
+    await loop.run_in_executor(None, revisit_scheduler.save)
+    print(
+        f"🧮 Scored {scorer.pages} pages in {scorer.batches} batches")
+    print(f"♻️ Score cache: {score_cache.stats()}")
+    print(f"🪜 Cascade: {cascade.report()}")
+    print(f"🪞 Near-duplicates: {near_duplicates.stats()}")
+    print(f"🧭 Vector index: {vector_index.stats()}")
+    print(f"🗓️ Revisits: {revisit_scheduler.stats()}")
+    due_gauge.set(revisit_scheduler.stats()["due"])
+    print(f"🤖 GPT refinement: {refiner.stats()}, {len(pending_refinements)} pending")
+    pending_gauge.set(len(pending_refinements))
+    await loop.run_in_executor(None, registry.write_summary, METRICS_SUMMARY_FILE)
+    await loop.run_in_executor(None, generate_graph)
+
+
+async def scrape_forever(target_urls, clean_pool):
+    scorer = MicroBatchScorer(predict_with_embeddings,
+                              max_batch_size=BATCH_SIZE, max_wait=BATCH_WAIT_SECONDS)
+    refiner = GPTRefiner(cache=ScoreCache(GPT_CACHE_FILE, "gpt"))
+    loop = asyncio.get_running_loop()
+    revisit_scheduler.set_targets(target_urls)
+
+    # Due batches can be a handful of URLs each; saving everything after
+    # each one would cost more than the batch itself
+    periodic = Periodic(lambda: housekeeping(loop, scorer, refiner), HOUSEKEEPING_SECONDS)
+    async with AsyncFetcher() as fetcher:
+        try:
+            while True:
+                await periodic.maybe_run()
+
+                due_urls = revisit_scheduler.due()
+                if not due_urls:
+                    wait = revisit_scheduler.next_due_in()
+                    await asyncio.sleep(MAX_IDLE_SECONDS if wait is None
+                                        else min(max(wait, 1), MAX_IDLE_SECONDS))
+                    continue
+
+                started = time.monotonic()
+                print(f"🗓️ Visiting {len(due_urls)} due URLs")
+                with stage_seconds.time(stage="cycle"):
+                    await scrape_cycle(fetcher, scorer, refiner, clean_pool, due_urls)
+                periodic.mark()
+                print(
+                    f"⏱️ Cycle finished in {time.monotonic() - started:.1f}s")
+        finally:
+            await periodic.close()
+            await refiner.close()
+            refiner.cache.close()
+            await loop.run_in_executor(None, scorer.close)
+
+
 def start_scraping():
+    # HTML cleaning runs in its own processes, started before any model load
+    clean_pool = start_pool(CLEAN_WORKERS)
+
+    try:
+        preload()
+    except Exception as e:
+        print(f"❌ Model loading failed: {e}")
+        sys.exit(1)
+
     create_index()
     target_urls = load_target_urls()
 
@@ -207,17 +540,14 @@ def start_scraping():
         print("⚠️ No target URLs found. Please update `target_url.txt`.")
         return
 
-    print(f"🚀 Starting scraping for {len(target_urls)} URLs...")
+    if METRICS_PORT:
+        try:
+            start_http_server(METRICS_PORT)
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint unavailable: {e}")
 
-    while True:
-        for url in target_urls:
-            entry = scrape_page(url)
-            if entry:
-                save_scraped_data(entry)
-                save_entry(entry)
-        generate_graph()
-        print("🔄 Waiting for next scrape cycle...")
-        time.sleep(60)
+    print(f"🚀 Starting scraping for {len(target_urls)} URLs...")
+    asyncio.run(scrape_forever(target_urls, clean_pool))
 
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
 import requests
 from stem.control import Controller
 from stem import Signal
-from bs4 import BeautifulSoup
-import re
+from ..extraction import clean_html
 
 
 def get_tor_session():
@@ -27,15 +26,7 @@ def renew_tor_ip():
 
 def clean_text(html_content):
     """Cleans raw HTML content and extracts readable text."""
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # Remove scripts and styles
-    for script in soup(["script", "style"]):
-        script.decompose()
-
-    text = soup.get_text()
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return clean_html(html_content)
 
 
 session = get_tor_session()
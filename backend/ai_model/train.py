@@ -2,15 +2,14 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments
 from datasets import Dataset
 import pandas as pd
-import re
+from utils.workbook_cache import load_workbook
 
 # Load dataset
 
 
 def load_dataset():
     try:
-        df = pd.read_excel(
-            "C:/Users/Prajeeta/Documents/GitHub/dark-web-intelligence/backend/data/darkweb_dataset.xlsx", sheet_name=0)
+        df = load_workbook(sheet_name=0)
 
         # Drop unnecessary columns
         if "activity" in df.columns:
@@ -28,7 +27,7 @@ def load_dataset():
 
         # Normalize whitespace to single spaces in "sub-activity"
         df["sub-activity"] = df["sub-activity"].astype(
-            str).apply(lambda x: re.sub(r"\s+", " ", x.strip()))
+            str).str.strip().str.replace(r"\s+", " ", regex=True)
 
         # Rename columns for model compatibility
         df = df.rename(columns={"sub-activity": "text",
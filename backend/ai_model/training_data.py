@@ -0,0 +1,252 @@
+# backend/ai_model/training_data.py
+
+import csv
+import io
+import os
+import time
+from array import array
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+MAX_LENGTH = 512
+PAD_TO_MULTIPLE = 8
+BUCKET_BATCHES = 100        # batches drawn from each length-sorted bucket
+VALIDATION_PERCENT = 10
+INDEX_FORMAT = 1
+
+
+def _parse_row(raw):
+    return next(csv.reader(io.StringIO(raw.decode("utf-8"))))
+
+
+def _iter_raw_rows(file):
+    """Yields (offset, raw bytes) per CSV record; quoted fields may span lines."""
+    offset = file.tell()
+    pending = b""
+    for line in iter(file.readline, b""):
+        pending += line
+        if pending.count(b'"') % 2:
+            continue
+        yield offset, pending
+        offset += len(pending)
+        pending = b""
+
+
+def index_csv(path, text_column="synthetic_text", label_column="final_score"):
+    """
+    One streaming pass over a CSV recording each row's byte offset, byte
+    size, text length and rounded label. Rows without a numeric label are
+    left out. The index is saved as <path>.index.npz and reused while the
+    CSV's size and mtime are unchanged.
+    """
+    index_path = path + ".index.npz"
+    stat = os.stat(path)
+    signature = np.array([INDEX_FORMAT, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    if os.path.exists(index_path):
+        with np.load(index_path, allow_pickle=False) as cached:
+            if (np.array_equal(cached["signature"], signature)
+                    and cached["columns"].tolist() == [text_column, label_column]):
+                return {key: cached[key] for key in cached.files}
+
+    offsets, sizes, lengths, labels = array("q"), array("i"), array("i"), array("b")
+    with open(path, "rb") as file:
+        rows = _iter_raw_rows(file)
+        header = _parse_row(next(rows)[1])
+        text_at, label_at = header.index(text_column), header.index(label_column)
+        for offset, raw in rows:
+            fields = _parse_row(raw)
+            try:
+                label = int(round(float(fields[label_at])))
+            except (IndexError, ValueError):
+                continue
+            offsets.append(offset)
+            sizes.append(len(raw))
+            lengths.append(len(fields[text_at]))
+            labels.append(label)
+
+    index = {
+        "signature": signature,
+        "columns": np.array([text_column, label_column]),
+        "text_at": np.int64(text_at),
+        "offsets": np.frombuffer(offsets, dtype=np.int64),
+        "sizes": np.frombuffer(sizes, dtype=np.int32),
+        "lengths": np.frombuffer(lengths, dtype=np.int32),
+        "labels": np.frombuffer(labels, dtype=np.int8),
+    }
+    with open(index_path + ".tmp", "wb") as file:
+        np.savez(file, **index)
+    os.replace(index_path + ".tmp", index_path)
+    print(f"🗂️ Indexed {len(offsets):,} rows of {path}")
+    return index
+
+
+def split_rows(count, validation_percent=VALIDATION_PERCENT):
+    """Deterministic (train_rows, val_rows) split by a multiplicative hash of the row number."""
+    rows = np.arange(count, dtype=np.int64)
+    is_val = (rows * 2654435761 % 1000003) % 100 < validation_percent
+    return rows[~is_val], rows[is_val]
+
+
+class LazyTextDataset(Dataset):
+    """
+    Map-style dataset over indexed CSV rows. Each __getitem__ reads one
+    row from disk and tokenizes it without padding, so memory holds only
+    the index arrays, not the corpus or its encodings.
+    """
+
+    def __init__(self, path, index, rows, tokenizer, max_length=MAX_LENGTH):
+        self.path = path
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.text_at = int(index["text_at"])
+        self.offsets = index["offsets"][rows]
+        self.sizes = index["sizes"][rows]
+        self.lengths = index["lengths"][rows]
+        self.labels = index["labels"][rows]
+        self._file = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def text(self, idx):
+        # DataLoader workers are forked: each opens its own handle
+        if self._pid != os.getpid():
+            self._file = open(self.path, "rb")
+            self._pid = os.getpid()
+        self._file.seek(int(self.offsets[idx]))
+        return _parse_row(self._file.read(int(self.sizes[idx])))[self.text_at]
+
+    def __getitem__(self, idx):
+        text = self.text(idx)
+        encoding = self.tokenizer(text, truncation=True, max_length=self.max_length)
+        return {"input_ids": encoding["input_ids"], "labels": int(self.labels[idx]),
+                "text": text}
+
+
+class PaddingCollator:
+    """
+    Pads each batch to its own longest sequence (rounded up to
+    pad_to_multiple) and, given encode_fn, adds the batch's MPNet
+    embeddings as mpnet_emb.
+    """
+
+    def __init__(self, pad_token_id, encode_fn=None, pad_to_multiple=PAD_TO_MULTIPLE):
+        self.pad_token_id = pad_token_id
+        self.encode_fn = encode_fn
+        self.pad_to_multiple = pad_to_multiple
+
+    def __call__(self, features):
+        longest = max(len(f["input_ids"]) for f in features)
+        longest = -(-longest // self.pad_to_multiple) * self.pad_to_multiple
+        input_ids = torch.full((len(features), longest), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(features), longest), dtype=torch.long)
+        for i, feature in enumerate(features):
+            ids = feature["input_ids"]
+            input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[i, :len(ids)] = 1
+
+        batch = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": torch.tensor([f["labels"] for f in features], dtype=torch.long),
+        }
+        if self.encode_fn is not None:
+            texts = [f["text"] for f in features]
+            batch["mpnet_emb"] = self.encode_fn(texts, batch_size=len(texts))
+        return batch
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler that shuffles rows, sorts each run of
+    batch_size * bucket_batches rows by text length, cuts it into batches
+    and yields those batches in random order. Similar lengths share a
+    batch while epochs stay shuffled; memory is one permutation of the rows.
+    """
+
+    def __init__(self, lengths, batch_size, bucket_batches=BUCKET_BATCHES, shuffle=True,
+                 seed=42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.bucket = batch_size * bucket_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self):
+        full, rest = divmod(len(self.lengths), self.bucket)
+        return full * -(-self.bucket // self.batch_size) + -(-rest // self.batch_size)
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        count = len(self.lengths)
+        order = rng.permutation(count) if self.shuffle else np.arange(count)
+        for start in range(0, count, self.bucket):
+            chunk = order[start:start + self.bucket]
+            chunk = chunk[np.argsort(self.lengths[chunk], kind="stable")]
+            batches = [chunk[i:i + self.batch_size] for i in range(0, len(chunk), self.batch_size)]
+            if self.shuffle:
+                rng.shuffle(batches)
+            for batch in batches:
+                yield batch.tolist()
+
+
+def make_loader(dataset, batch_size, collator, shuffle=True, bucketed=True, num_workers=0):
+    """DataLoader over a LazyTextDataset, length-bucketed unless bucketed=False."""
+    if bucketed:
+        return DataLoader(dataset, collate_fn=collator, num_workers=num_workers,
+                          batch_sampler=LengthBucketSampler(dataset.lengths, batch_size,
+                                                            shuffle=shuffle))
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=collator,
+                      num_workers=num_workers)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:  # Windows
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+
+
+def benchmark(path, tokenizer, batch_size=16, batches=300):
+    """
+    Tokens/sec, padding waste and peak RSS of feeding batches (without a
+    model) from a CSV, with random and with length-bucketed batches.
+    """
+    start = time.perf_counter()
+    index = index_csv(path)
+    print(f"⏱️ Index: {len(index['offsets']):,} rows in {time.perf_counter() - start:.1f}s, "
+          f"peak RSS {peak_rss_mb():.0f} MB")
+    train_rows, _ = split_rows(len(index["offsets"]))
+    dataset = LazyTextDataset(path, index, train_rows, tokenizer)
+    collator = PaddingCollator(tokenizer.pad_token_id)
+
+    for bucketed in (False, True):
+        loader = make_loader(dataset, batch_size, collator, bucketed=bucketed)
+        real = padded = seen = 0
+        start = time.perf_counter()
+        for batch in loader:
+            real += int(batch["attention_mask"].sum())
+            padded += batch["input_ids"].numel()
+            seen += 1
+            if seen == batches:
+                break
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ {'bucketed' if bucketed else 'random':>8}: {real / elapsed:,.0f} tokens/sec, "
+              f"padding {1 - real / padded:.1%}, peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    # python -m ai_model.training_data <csv>
+    import sys
+
+    from .model_registry import get_tokenizer
+
+    benchmark(sys.argv[1], get_tokenizer())
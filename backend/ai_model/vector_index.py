@@ -0,0 +1,300 @@
+# backend/ai_model/vector_index.py
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+DIM = 768
+INITIAL_CAPACITY = 4096
+
+# IVF parameters: lists are trained once TRAIN_AT vectors exist and
+# retrained when the store has grown REBUILD_FACTOR times since
+TRAIN_AT = 4096
+REBUILD_FACTOR = 8
+NPROBE = 32
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+
+def num_lists(count):
+    """IVF list count, ~sqrt(count) clamped to [16, 4096]."""
+    return int(np.clip(np.sqrt(count), 16, 4096))
+
+
+def _kmeans(sample, k, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means on unit vectors; returns (k, dim) centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        sums[empty] = sample[rng.choice(len(sample), empty.sum())]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+    return centroids
+
+
+class EmbeddingIndex:
+    """
+    Persistent store of normalized MPNet embeddings with an IVF index.
+    - Vectors are float16 rows of a memory-mapped file, keyed by the
+      record's document id
+    - Inverted lists group rows by nearest centroid; a query scans the
+      NPROBE closest lists with exact dot products
+    Until TRAIN_AT vectors exist, queries scan the whole store.
+    manifest.json records how many rows the last save committed; keys and
+    vectors written after it are dropped on load.
+    """
+
+    def __init__(self, directory, dim=DIM):
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f16")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._ivf_path = os.path.join(directory, "ivf.npz")
+        self._manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.RLock()
+
+        self.keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r", encoding="utf-8") as file:
+                self.keys = file.read().splitlines()
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as file:
+                committed = json.load(file)["rows"]
+            if len(self.keys) > committed:
+                print(f"♻️ Dropping {len(self.keys) - committed} uncommitted index rows")
+                self.keys = self.keys[:committed]
+                with open(self._keys_path + ".tmp", "w", encoding="utf-8") as file:
+                    file.writelines(key + "\n" for key in self.keys)
+                os.replace(self._keys_path + ".tmp", self._keys_path)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self._keys_file = open(self._keys_path, "a", encoding="utf-8")
+
+        capacity = max(INITIAL_CAPACITY, len(self.keys))
+        if os.path.exists(self._vectors_path):
+            capacity = max(capacity, os.path.getsize(self._vectors_path) // (2 * dim))
+        self._open(capacity)
+
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.lists = []
+        self.trained_at = 0
+        if os.path.exists(self._ivf_path):
+            with np.load(self._ivf_path) as state:
+                self.centroids = state["centroids"]
+                self.assign = state["assign"][:len(self.keys)]
+                self.trained_at = int(state["trained_at"])
+            self._build_lists()
+            # Rows added after the last save are assigned again
+            self._assign_rows(len(self.assign), len(self.keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _open(self, capacity):
+        if not os.path.exists(self._vectors_path):
+            open(self._vectors_path, "wb").close()
+        with open(self._vectors_path, "r+b") as file:
+            file.truncate(capacity * self.dim * 2)
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r+",
+                                 shape=(capacity, self.dim))
+
+    def add(self, keys, vectors):
+        """Stores vectors under keys; keys already stored are skipped."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            fresh = [i for i, key in enumerate(keys) if key not in self.rows]
+            if not fresh:
+                return
+            start = len(self.keys)
+            end = start + len(fresh)
+            if end > len(self.vectors):
+                self.vectors.flush()
+                self._open(max(end, 2 * len(self.vectors)))
+            self.vectors[start:end] = vectors[fresh]
+            for i in fresh:
+                self.rows[keys[i]] = len(self.keys)
+                self.keys.append(keys[i])
+                self._keys_file.write(keys[i] + "\n")
+
+            if self.centroids is None and end >= TRAIN_AT:
+                self.train()
+            else:
+                self._assign_rows(start, end)
+
+    def _assign_rows(self, start, end):
+        if self.centroids is None or start >= end:
+            return
+        assign = np.argmax(
+            self.vectors[start:end].astype(np.float32) @ self.centroids.T, axis=1).astype(np.int32)
+        self.assign = np.concatenate([self.assign[:start], assign])
+        for cluster in np.unique(assign):
+            rows = np.arange(start, end, dtype=np.int32)[assign == cluster]
+            self.lists[cluster] = np.concatenate([self.lists[cluster], rows])
+
+    def _build_lists(self):
+        order = np.argsort(self.assign, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def train(self):
+        """(Re)trains the IVF centroids on a sample and reassigns every row."""
+        with self._lock:
+            count = len(self.keys)
+            k = num_lists(count)
+            rng = np.random.default_rng(count)
+            sample_rows = np.sort(rng.choice(count, min(count, k * KMEANS_SAMPLE_PER_LIST),
+                                             replace=False))
+            self.centroids = _kmeans(self.vectors[sample_rows].astype(np.float32), k)
+            self.assign = np.zeros(0, dtype=np.int32)
+            self.lists = [np.zeros(0, dtype=np.int32) for _ in range(k)]
+            for start in range(0, count, 65536):
+                self._assign_rows(start, min(count, start + 65536))
+            self.trained_at = count
+            print(f"🧭 Trained {k} IVF lists on {count} vectors")
+
+    def search(self, queries, k=10, nprobe=NPROBE):
+        """
+        Approximate k nearest rows by cosine similarity.
+        Returns (rows, similarities), each of shape (len(queries), k);
+        missing neighbours have row -1.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        with self._lock:
+            count = len(self.keys)
+            if count == 0:
+                return rows, sims
+            if self.centroids is None:
+                candidates = [np.arange(count)] * len(queries)
+            else:
+                probe = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+                candidates = [np.concatenate([self.lists[c] for c in lists]) for lists in probe]
+            for i, candidate in enumerate(candidates):
+                if not len(candidate):
+                    continue
+                scores = self.vectors[candidate].astype(np.float32) @ queries[i]
+                top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                rows[i, :len(top)] = candidate[top]
+                sims[i, :len(top)] = scores[top]
+        return rows, sims
+
+    def vector(self, key):
+        return self.vectors[self.rows[key]].astype(np.float32)
+
+    def find_similar(self, text_or_id, k=10, encode_fn=None):
+        """
+        [(key, similarity)] of the k pages closest to a stored key or to
+        a new text (encoded with MPNet).
+        """
+        if text_or_id in self.rows:
+            query, exclude = self.vector(text_or_id), text_or_id
+        else:
+            if encode_fn is None:
+                from .mpnet_encoder import mpnet_encode as encode_fn
+            query, exclude = np.asarray(encode_fn([text_or_id]), dtype=np.float32), None
+        rows, sims = self.search(query, k + (exclude is not None))
+        results = [(self.keys[r], float(s)) for r, s in zip(rows[0], sims[0])
+                   if r >= 0 and self.keys[r] != exclude]
+        return results[:k]
+
+    def knn_join(self, queries, k=5, min_similarity=0.0, query_keys=None):
+        """
+        Bulk k-NN join of query vectors against the store, e.g. new posts
+        against known threats. Returns one [(key, similarity)] list per
+        query, keeping matches at or above min_similarity.
+        """
+        rows, sims = self.search(queries, k)
+        joined = []
+        for i in range(len(rows)):
+            own = query_keys[i] if query_keys is not None else None
+            joined.append([(self.keys[r], float(s)) for r, s in zip(rows[i], sims[i])
+                           if r >= 0 and s >= min_similarity and self.keys[r] != own])
+        return joined
+
+    def save(self):
+        """
+        Flushes vectors and keys, then commits their row count to the
+        manifest; retrains the lists once the store has grown enough.
+        """
+        with self._lock:
+            if self.centroids is None:
+                due = len(self.keys) >= TRAIN_AT
+            else:
+                due = len(self.keys) >= REBUILD_FACTOR * self.trained_at
+            if due:
+                self.train()
+            self.vectors.flush()
+            self._keys_file.flush()
+            os.fsync(self._keys_file.fileno())
+            with open(self._manifest_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({"rows": len(self.keys), "dim": self.dim}, file)
+            os.replace(self._manifest_path + ".tmp", self._manifest_path)
+            if self.centroids is not None:
+                with open(self._ivf_path + ".tmp", "wb") as file:
+                    np.savez(file, centroids=self.centroids, assign=self.assign,
+                             trained_at=self.trained_at)
+                os.replace(self._ivf_path + ".tmp", self._ivf_path)
+
+    def stats(self):
+        return {"vectors": len(self.keys),
+                "lists": 0 if self.centroids is None else len(self.centroids)}
+
+
+def _topic_centres(rng, topics=20000, latent=64, dim=DIM):
+    # Sentence embeddings have low intrinsic dimension: centres are drawn
+    # in a small latent space and projected to dim
+    projection = rng.standard_normal((latent, dim)).astype(np.float32)
+    centres = rng.standard_normal((topics, latent)).astype(np.float32) @ projection
+    return centres / np.linalg.norm(centres, axis=1, keepdims=True)
+
+
+def _synthetic(count, rng, centres, noise=0.015):
+    vectors = centres[rng.integers(0, len(centres), count)] + \
+        noise * rng.standard_normal((count, centres.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def benchmark(directory, sizes=(100000, 1000000), queries=200, k=10, seed=0):
+    """Query latency and recall@k against exact search at each store size."""
+    rng = np.random.default_rng(seed)
+    centres = _topic_centres(rng)
+    index = EmbeddingIndex(directory)
+    chunk = 50000
+    for size in sizes:
+        while len(index) < size:
+            batch = _synthetic(min(chunk, size - len(index)), rng, centres)
+            index.add([f"doc-{len(index) + i}" for i in range(len(batch))], batch)
+        index.train()
+        probes = index.vectors[rng.integers(0, size, queries)].astype(np.float32)
+        probes += 0.005 * rng.standard_normal(probes.shape).astype(np.float32)
+
+        start = time.perf_counter()
+        rows, _ = index.search(probes, k)
+        latency = 1000 * (time.perf_counter() - start) / queries
+
+        exact = np.zeros_like(rows)
+        for begin in range(0, size, 100000):
+            block = index.vectors[begin:min(size, begin + 100000)].astype(np.float32) @ probes.T
+            exact_block = np.argsort(-block, axis=0)[:k].T + begin
+            merged = np.concatenate([exact, exact_block], axis=1) if begin else exact_block
+            scores = np.einsum("qkd,qd->qk", index.vectors[merged].astype(np.float32), probes)
+            exact = np.take_along_axis(merged, np.argsort(-scores, axis=1)[:, :k], axis=1)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(rows, exact)])
+        print(f"⏱️ {size:>9,} vectors: {latency:.2f} ms/query (nprobe={NPROBE}), "
+              f"recall@{k} {recall:.1%}")
+
+
+if __name__ == "__main__":
+    # python -m ai_model.vector_index <scratch directory>
+    import sys
+
+    benchmark(sys.argv[1])
@@ -0,0 +1,148 @@
+# backend/ai_model/windowing.py
+
+import os
+import time
+
+import numpy as np
+import torch
+
+from .mpnet_encoder import mpnet_encode
+
+# Overlapping windows over the full token sequence of a page
+WINDOW_TOKENS = 512
+WINDOW_STRIDE = 384       # tokens between window starts (128 overlap)
+MAX_WINDOWS = 8           # per document, spread evenly over longer pages
+TOP_K = 3
+
+AGGREGATIONS = ("max", "attention", "topk")
+LONG_DOC_MODE = os.getenv("THREAT_LONG_DOCS", "max")  # or "off" to truncate
+
+
+def window_spans(length, window=WINDOW_TOKENS - 2, stride=WINDOW_STRIDE, max_windows=MAX_WINDOWS):
+    """
+    (start, end) token spans covering length tokens. When more than
+    max_windows are needed, evenly spaced ones are kept so the last
+    window still reaches the end of the page.
+    """
+    if length <= window:
+        return [(0, length)]
+    starts = list(range(0, length - window, stride)) + [length - window]
+    if len(starts) > max_windows:
+        keep = np.linspace(0, len(starts) - 1, max_windows).round().astype(int)
+        starts = [starts[i] for i in keep]
+    return [(start, start + window) for start in starts]
+
+
+def _aggregate(logits, method, top_k=TOP_K):
+    """Combines the (windows, labels) logits of one page into a label."""
+    labels = torch.argmax(logits, dim=1).float()
+    if method == "max":
+        return int(labels.max())
+    if method == "topk":
+        return int(round(float(labels.topk(min(top_k, len(labels))).values.mean())))
+    if method == "attention":
+        # Windows are weighted by their expected score, so confident
+        # threat windows dominate the page label
+        probs = torch.softmax(logits, dim=1)
+        expected = probs @ torch.arange(logits.shape[1], dtype=probs.dtype)
+        weights = torch.softmax(expected, dim=0)
+        return int(round(float(weights @ labels)))
+    raise ValueError(f"Unknown aggregation {method!r}, expected one of {AGGREGATIONS}")
+
+
+def predict_windows(model, tokenizer, texts, aggregate=LONG_DOC_MODE, max_length=WINDOW_TOKENS,
+                    stride=WINDOW_STRIDE, max_windows=MAX_WINDOWS, encode_fn=mpnet_encode,
+                    return_embeddings=False):
+    """
+    Scores texts of any length: every window of every text goes through
+    one padded XLM-R forward pass, and each text's window labels are
+    aggregated. The page-level MPNet embedding is computed once per text
+    and shared by all of its windows; return_embeddings=True also
+    returns those page embeddings.
+    """
+    if not texts:
+        return ([], []) if return_embeddings else []
+
+    token_ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    windows, owners = [], []
+    for owner, ids in enumerate(token_ids):
+        for start, end in window_spans(len(ids), max_length - 2, stride, max_windows):
+            windows.append([tokenizer.cls_token_id] + ids[start:end] + [tokenizer.sep_token_id])
+            owners.append(owner)
+
+    longest = max(len(ids) for ids in windows)
+    input_ids = torch.full((len(windows), longest), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(windows), longest), dtype=torch.long)
+    for row, ids in enumerate(windows):
+        input_ids[row, :len(ids)] = torch.tensor(ids)
+        attention_mask[row, :len(ids)] = 1
+
+    owners = torch.tensor(owners)
+    page_vecs = encode_fn(texts, batch_size=len(texts))
+
+    with torch.no_grad():
+        logits = model(input_ids=input_ids, attention_mask=attention_mask,
+                       mpnet_emb=page_vecs[owners])["logits"]
+    labels = [_aggregate(logits[owners == owner], aggregate) for owner in range(len(texts))]
+    if return_embeddings:
+        return labels, page_vecs.cpu().numpy()
+    return labels
+
+
+def plant(threat, filler, position=0.9):
+    """Inserts threat into filler at the given fraction of its length."""
+    cut = filler.rfind(" ", 0, int(len(filler) * position)) + 1
+    return filler[:cut] + threat + " " + filler[cut:]
+
+
+def planted_recall(predict_fn, threats, filler, threshold=6, position=0.9):
+    """
+    Share of threat texts still scored >= threshold when buried at
+    position of a long benign page.
+    """
+    scores = predict_fn([plant(threat, filler, position) for threat in threats])
+    recall = float(np.mean(np.asarray(scores) >= threshold))
+    print(f"🎯 Planted-threat recall at {position:.0%} of page: {recall:.1%}")
+    return recall
+
+
+def benchmark(predict_fn, texts, batch_size=4):
+    """Prints pages/sec and MB/sec of predict_fn on long pages."""
+    predict_fn(texts[:1])  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        predict_fn(texts[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    megabytes = sum(len(text) for text in texts) / 2 ** 20
+    print(f"⏱️ {len(texts) / elapsed:.2f} long pages/sec, {megabytes / elapsed:.3f} MB/sec")
+    return len(texts) / elapsed
+
+
+if __name__ == "__main__":
+    # Run from backend/: python -m ai_model.windowing <dataset.csv>
+    import sys
+
+    from .cpu_inference import validation_split
+    from .model_registry import get_threat_model, get_tokenizer
+    from .batching import predict_batch
+
+    texts, labels = validation_split(sys.argv[1])
+    model, encode_fn = get_threat_model()
+    tokenizer = get_tokenizer()
+
+    # Benign filler pages of ~3000 tokens and known threats to bury in them
+    benign = [t for t, label in zip(texts, labels) if label <= 2]
+    threats = [t for t, label in zip(texts, labels) if label >= 8][:64]
+    filler = " ".join(benign)[:15000]
+
+    def truncated(batch):
+        return predict_batch(model, tokenizer, batch, encode_fn=encode_fn)
+
+    print("✂️ Truncation (first 512 tokens):")
+    planted_recall(truncated, threats, filler)
+    for method in AGGREGATIONS:
+        def windowed(batch, method=method):
+            return predict_windows(model, tokenizer, batch, method, encode_fn=encode_fn)
+        print(f"🪟 Windows, {method} aggregation:")
+        planted_recall(windowed, threats, filler)
+        benchmark(windowed, [plant(t, filler) for t in threats[:16]])
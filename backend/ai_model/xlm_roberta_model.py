@@ -1,26 +1,35 @@
 import torch
 from torch import nn
-from transformers import XLMRobertaModel
+from transformers import XLMRobertaConfig, XLMRobertaModel
 
 
 class XLMRobertaMPNet(nn.Module):
-    def __init__(self, num_labels=11):
+    def __init__(self, num_labels=11, pretrained=True):
         super().__init__()
-        self.xlm = XLMRobertaModel.from_pretrained("xlm-roberta-base")
+        # pretrained=False builds the encoder from its config only, for when
+        # a fine-tuned checkpoint is loaded straight afterwards
+        if pretrained:
+            self.xlm = XLMRobertaModel.from_pretrained("xlm-roberta-base")
+        else:
+            self.xlm = XLMRobertaModel(
+                XLMRobertaConfig.from_pretrained("xlm-roberta-base"))
         self.mpnet_fc = nn.Linear(768, self.xlm.config.hidden_size)
         self.classifier = nn.Linear(
             self.xlm.config.hidden_size * 2, num_labels)
 
-    def forward(self, input_ids, attention_mask, mpnet_emb=None, labels=None):
-        xlm_out = self.xlm(input_ids=input_ids,
-                           attention_mask=attention_mask).pooler_output
+    def head(self, xlm_out, mpnet_emb=None):
+        """Logits from XLM-R pooled outputs and MPNet embeddings (the trainable head)."""
         if mpnet_emb is not None:
             mpnet_proj = torch.relu(self.mpnet_fc(mpnet_emb))
             combined = torch.cat([xlm_out, mpnet_proj], dim=1)
         else:
             combined = xlm_out
+        return self.classifier(combined)
 
-        logits = self.classifier(combined)
+    def forward(self, input_ids, attention_mask, mpnet_emb=None, labels=None):
+        xlm_out = self.xlm(input_ids=input_ids,
+                           attention_mask=attention_mask).pooler_output
+        logits = self.head(xlm_out, mpnet_emb)
         loss = None
         if labels is not None:
             loss = nn.CrossEntropyLoss()(logits, labels)
@@ -1,5 +1,11 @@
-import pandas as pd
-import random
+# backend/database/larger_dataset.py
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 topic_map = {
     "Hacking": ["account takeover", "phishing", "data breach", "credential stuffing", "zero-day exploit"],
@@ -18,32 +24,216 @@ templates = [
     "Onion domain hosted a thread on {sub} within the {act} community."
 ]
 
-rows = []
-random.seed(42)
-for _ in range(3000):
-    topic = random.choice(list(topic_map.keys()))
-    sub = random.choice(topic_map[topic])
-    act = topic
-    text = random.choice(templates).format(sub=sub, act=act)
-
-    true_score = round(random.uniform(2, 10), 2)
-    bert_score = round(true_score + random.uniform(-1, 1), 2)
-    gpt_score = round((bert_score + true_score) / 2 +
-                      random.uniform(-0.5, 0.5), 2)
-    final_score = round((gpt_score + random.uniform(-0.3, 0.3)), 2)
-    final_score = max(0, min(10, final_score))
-
-    rows.append({
-        "activity": act,
-        "sub-activity": sub,
-        "synthetic_text": text,
-        "illicit_score": true_score,
-        "topic": topic,
-        "bert_score": bert_score,
-        "gpt_score": gpt_score,
-        "final_score": final_score
-    })
-
-df = pd.DataFrame(rows)
-df.to_csv("large_darkweb_threat_dataset.csv", index=False)
-print("✅ File saved as 'large_darkweb_threat_dataset.csv'")
+COLUMNS = ["activity", "sub-activity", "synthetic_text", "illicit_score", "topic",
+           "bert_score", "gpt_score", "final_score"]
+
+# Generation defaults
+ROWS = 3000
+SEED = 42
+SHARD_ROWS = 1_000_000      # rows per output file
+CHUNK_ROWS = 100_000        # rows generated and written at a time (bounds memory)
+FORMAT = "csv"              # "csv" or "parquet"
+OUTPUT_DIR = "synthetic_dataset"
+SINGLE_FILE = "large_darkweb_threat_dataset.csv"
+
+# Share of rows per topic; topics left out get no rows
+TOPIC_MIX = {topic: 1 / len(topic_map) for topic in topic_map}
+
+# Score noise: each score is derived from the previous one plus noise of
+# the given scale, drawn from "uniform" (+/- scale) or "normal" (sd = scale)
+NOISE_MODEL = {"distribution": "uniform", "bert": 1.0, "gpt": 0.5, "final": 0.3}
+TRUE_SCORE_RANGE = (2.0, 10.0)
+
+
+def _vocabulary():
+    """Flat sub-activity list with its topic index, and every rendered text."""
+    topics = list(topic_map)
+    subs = [(t, sub) for t, topic in enumerate(topics) for sub in topic_map[topic]]
+    texts = [template.format(sub=sub, act=topics[t]) for template in templates for t, sub in subs]
+    return topics, subs, texts
+
+
+def _noise(rng, scale, size, distribution):
+    if distribution == "normal":
+        return rng.normal(0.0, scale, size)
+    return rng.uniform(-scale, scale, size)
+
+
+def generate_chunk(rng, rows, topic_mix=TOPIC_MIX, noise=NOISE_MODEL):
+    """
+    Draws rows as column arrays. String columns are returned as int32
+    codes into the vocabulary from _vocabulary(), not as Python strings.
+    """
+    topics, subs, _ = _vocabulary()
+    weights = np.array([topic_mix.get(topic, 0.0) for topic in topics], dtype=np.float64)
+    topic = rng.choice(len(topics), rows, p=weights / weights.sum()).astype(np.int32)
+
+    sizes = np.array([len(topic_map[t]) for t in topics])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    sub = (starts[topic] + (rng.random(rows) * sizes[topic]).astype(np.int64)).astype(np.int32)
+    text = rng.integers(0, len(templates), rows, dtype=np.int32) * len(subs) + sub
+
+    distribution = noise.get("distribution", "uniform")
+    true_score = np.round(rng.uniform(*TRUE_SCORE_RANGE, rows), 2)
+    bert_score = np.round(true_score + _noise(rng, noise["bert"], rows, distribution), 2)
+    gpt_score = np.round((bert_score + true_score) / 2 +
+                         _noise(rng, noise["gpt"], rows, distribution), 2)
+    final_score = np.clip(np.round(gpt_score + _noise(rng, noise["final"], rows, distribution),
+                                   2), 0, 10)
+    return {"topic": topic, "sub-activity": sub, "synthetic_text": text,
+            "illicit_score": true_score, "bert_score": bert_score, "gpt_score": gpt_score,
+            "final_score": final_score}
+
+
+def _to_table(chunk):
+    import pyarrow as pa
+
+    topics, subs, texts = _vocabulary()
+    topic_names = pa.array(topics)
+    columns = {
+        "activity": pa.DictionaryArray.from_arrays(chunk["topic"], topic_names),
+        "sub-activity": pa.DictionaryArray.from_arrays(
+            chunk["sub-activity"], pa.array([sub for _, sub in subs])),
+        "synthetic_text": pa.DictionaryArray.from_arrays(chunk["synthetic_text"],
+                                                         pa.array(texts)),
+        "illicit_score": pa.array(chunk["illicit_score"]),
+        "topic": pa.DictionaryArray.from_arrays(chunk["topic"], topic_names),
+        "bert_score": pa.array(chunk["bert_score"]),
+        "gpt_score": pa.array(chunk["gpt_score"]),
+        "final_score": pa.array(chunk["final_score"]),
+    }
+    return pa.table([columns[name] for name in COLUMNS], names=COLUMNS)
+
+
+def _plain_schema(schema):
+    """schema with dictionary columns decoded to plain strings (for CSV)."""
+    import pyarrow as pa
+
+    return pa.schema([pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type)
+                               else f.type) for f in schema])
+
+
+def write_shard(path, seed_sequence, rows, file_format=FORMAT, topic_mix=TOPIC_MIX,
+                noise=NOISE_MODEL, chunk_rows=CHUNK_ROWS):
+    """
+    Generates one shard from its own seed sequence, chunk_rows at a time,
+    and writes it atomically. Returns the shard's manifest entry.
+    """
+    import pyarrow.csv as pcsv
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(seed_sequence)
+    topics, _, _ = _vocabulary()
+    topic_counts = np.zeros(len(topics), dtype=np.int64)
+    writer = None
+    with open(path + ".tmp", "wb") as file:
+        for start in range(0, rows, chunk_rows):
+            chunk = generate_chunk(rng, min(chunk_rows, rows - start), topic_mix, noise)
+            topic_counts += np.bincount(chunk["topic"], minlength=len(topics))
+            table = _to_table(chunk)
+            if file_format == "parquet":
+                if writer is None:
+                    writer = pq.ParquetWriter(file, table.schema, compression="zstd")
+            else:
+                table = table.cast(_plain_schema(table.schema))
+                if writer is None:
+                    writer = pcsv.CSVWriter(file, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    os.replace(path + ".tmp", path)
+    return {"file": os.path.basename(path), "rows": rows, "bytes": os.path.getsize(path),
+            "spawn_key": list(seed_sequence.spawn_key),
+            "topics": dict(zip(topics, topic_counts.tolist()))}
+
+
+def _write_shard(args):
+    return write_shard(*args)
+
+
+def generate_dataset(rows, output_dir=OUTPUT_DIR, seed=SEED, shard_rows=SHARD_ROWS,
+                     file_format=FORMAT, topic_mix=TOPIC_MIX, noise=NOISE_MODEL,
+                     workers=None):
+    """
+    Writes rows synthetic rows as shards of shard_rows each, one process
+    per shard in parallel, plus a manifest.json describing the run.
+    Shard i is drawn from SeedSequence(seed).spawn(...)[i], so output does
+    not depend on the number of workers.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shards = -(-rows // shard_rows)
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    extension = "parquet" if file_format == "parquet" else "csv"
+    jobs = [(os.path.join(output_dir, f"part-{i:05d}.{extension}"), seeds[i],
+             min(shard_rows, rows - i * shard_rows), file_format, topic_mix, noise)
+            for i in range(shards)]
+
+    start = time.perf_counter()
+    workers = min(shards, workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(_write_shard, jobs))
+    else:
+        entries = [_write_shard(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "rows": rows,
+        "seed": seed,
+        "format": file_format,
+        "columns": COLUMNS,
+        "topic_mix": topic_mix,
+        "noise": noise,
+        "true_score_range": list(TRUE_SCORE_RANGE),
+        "seconds": round(elapsed, 2),
+        "shards": entries,
+    }
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    print(f"✅ Wrote {rows:,} rows in {shards} shards to '{output_dir}' in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/sec)")
+    return manifest
+
+
+def parse_mix(spec):
+    """"Hacking=3,Drugs=1" -> {"Hacking": 3.0, "Drugs": 1.0}."""
+    mix = {}
+    for part in spec.split(","):
+        topic, weight = part.rsplit("=", 1)
+        if topic not in topic_map:
+            raise ValueError(f"Unknown topic {topic!r}")
+        mix[topic] = float(weight)
+    return mix
+
+
+if __name__ == "__main__":
+    # python database/larger_dataset.py
+    #   -> 3,000 rows in large_darkweb_threat_dataset.csv (as before)
+    # python database/larger_dataset.py --rows 100000000 --format parquet --out corpus
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Synthetic dark web threat dataset")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--out", default=None, help=f"shard directory (default: {SINGLE_FILE})")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=FORMAT)
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mix", type=parse_mix, default=TOPIC_MIX,
+                        help='topic weights, e.g. "Hacking=3,Drugs=1"')
+    parser.add_argument("--noise", choices=["uniform", "normal"],
+                        default=NOISE_MODEL["distribution"])
+    args = parser.parse_args()
+    noise = {**NOISE_MODEL, "distribution": args.noise}
+
+    if args.out is None:
+        # One shard, written to the file the training scripts read
+        write_shard(SINGLE_FILE, np.random.SeedSequence(args.seed).spawn(1)[0], args.rows,
+                    "csv", args.mix, noise)
+        print(f"✅ File saved as '{SINGLE_FILE}'")
+    else:
+        generate_dataset(args.rows, args.out, args.seed, args.shard_rows, args.format,
+                         args.mix, noise, args.workers)
@@ -2,13 +2,54 @@
 
 from neo4j import GraphDatabase
 import os
+import threading
+import time
+
+from utils.metrics import registry
 
 # Neo4j Connection
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "your_password_here"  # tb changed
+NEO4J_POOL_SIZE = 16
+
+# Buffered writes: one UNWIND transaction per batch
+BATCH_SIZE = 2000
+FLUSH_INTERVAL_SECONDS = 5
+
+# Rows kept while Neo4j is unreachable; beyond this the oldest are dropped
+MAX_BUFFERED_ROWS = 50000
+
+rows_dropped = registry.counter("neo4j_rows_dropped_total",
+                                "Graph rows dropped because the write buffer was full")
+
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD),
+                              max_connection_pool_size=NEO4J_POOL_SIZE)
+
+# Uniqueness constraints (each backed by an index) for every MERGE key
+SCHEMA_QUERIES = [
+    "CREATE CONSTRAINT user_name IF NOT EXISTS FOR (u:User) REQUIRE u.name IS UNIQUE",
+    "CREATE CONSTRAINT post_id IF NOT EXISTS FOR (p:Post) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT forum_name IF NOT EXISTS FOR (f:Forum) REQUIRE f.name IS UNIQUE",
+]
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+UPSERT_POSTS = """
+UNWIND $rows AS row
+MERGE (u:User {name: row.username})
+MERGE (f:Forum {name: row.forum_name})
+MERGE (p:Post {id: row.post_id})
+SET p.content = row.content, p.score = row.score, p.topic = row.topic
+MERGE (u)-[:POSTED]->(p)
+MERGE (p)-[:BELONGS_TO]->(f)
+"""
+
+
+def ensure_schema(graph_driver=driver):
+    """Creates the uniqueness constraints if they do not exist yet."""
+    with graph_driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+    print("✅ Neo4j constraints ready")
 
 # Create a user node
 
@@ -41,13 +82,196 @@ def create_relationships(tx, username, post_id, forum_name):
     MERGE (p)-[:BELONGS_TO]->(f)
     """, username=username, post_id=post_id, forum_name=forum_name)
 
+
+def _upsert_rows(tx, rows):
+    tx.run(UPSERT_POSTS, rows=rows).consume()
+
+
+class GraphWriter:
+    """
+    Buffers posts and writes each batch with a single UNWIND query in one
+    write transaction. Flushes on batch size or a timer; later rows for the
+    same post id replace earlier ones in the buffer. The schema is ensured
+    before the first write. A failed batch goes back into the buffer, which
+    holds at most max_buffered rows (oldest dropped first); add() never
+    raises, and leaves retries to the timer until the next interval.
+    """
+
+    def __init__(self, graph_driver=driver, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL_SECONDS, max_buffered=MAX_BUFFERED_ROWS):
+        self.driver = graph_driver
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self._retry_at = 0.0
+        self._schema_ready = False
+        self._buffer = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._timer.start()
+
+    def add(self, username, post_id, content, score, topic, forum_name):
+        row = {"username": username, "post_id": post_id, "content": content,
+               "score": score, "topic": topic, "forum_name": forum_name}
+        with self._lock:
+            self._buffer[post_id] = row
+            self._trim()
+            full = len(self._buffer) >= self.batch_size
+        if full and time.monotonic() >= self._retry_at:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Neo4j flush failed, keeping {len(self._buffer)} rows for retry: {e}")
+
+    def _trim(self):
+        dropped = len(self._buffer) - self.max_buffered
+        if dropped > 0:
+            for post_id in list(self._buffer)[:dropped]:
+                del self._buffer[post_id]
+            self.dropped += dropped
+            rows_dropped.inc(dropped)
+            print(f"❌ Dropped {dropped} Neo4j rows, write buffer is full")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = list(self._buffer.values()), {}
+            if not rows:
+                return
+            try:
+                if not self._schema_ready:
+                    ensure_schema(self.driver)
+                    self._schema_ready = True
+                with self.driver.session() as session:
+                    session.execute_write(_upsert_rows, rows)
+            except Exception:
+                # Failed rows go first; rows queued meanwhile are newer and win
+                with self._lock:
+                    requeued = {row["post_id"]: row for row in rows}
+                    requeued.update(self._buffer)
+                    self._buffer = requeued
+                    self._trim()
+                    self._retry_at = time.monotonic() + self.flush_interval
+                self.failed += 1
+                raise
+            self.written += len(rows)
+
+    def _flush_periodically(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Periodic Neo4j flush failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+graph_writer = GraphWriter(driver)
+
 # Main function to save full data
 
 
 def save_user_post_forum(username, post_id, content, score, topic, forum_name):
-    with driver.session() as session:
-        session.write_transaction(create_user, username)
-        session.write_transaction(create_post, post_id, content, score, topic)
-        session.write_transaction(create_forum, forum_name)
-        session.write_transaction(
+    """Queues a post for the next batched write; see flush_graph."""
+    graph_writer.add(username, post_id, content, score, topic, forum_name)
+
+
+def flush_graph():
+    graph_writer.flush()
+
+
+def save_user_post_forum_unbatched(graph_driver, username, post_id, content, score, topic,
+                                   forum_name):
+    """The previous four-transaction write, kept as the benchmark baseline."""
+    with graph_driver.session() as session:
+        session.execute_write(create_user, username)
+        session.execute_write(create_post, post_id, content, score, topic)
+        session.execute_write(create_forum, forum_name)
+        session.execute_write(
             create_relationships, username, post_id, forum_name)
+
+
+class RecordingDriver:
+    """
+    Stand-in for a neo4j driver that records (query, parameters) instead
+    of sending them, for testing and for measuring client-side overhead.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency  # simulated round trip per transaction
+        self.queries = []
+        self.transactions = 0
+
+    def session(self, **_):
+        return _RecordingSession(self)
+
+
+class _RecordingSession:
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        self.recorder.queries.append((query, {**(parameters or {}), **kwargs}))
+        return _RecordedResult()
+
+    def execute_write(self, work, *args, **kwargs):
+        self.recorder.transactions += 1
+        if self.recorder.latency:
+            time.sleep(self.recorder.latency)
+        return work(self, *args, **kwargs)
+
+
+class _RecordedResult:
+    def consume(self):
+        return None
+
+
+def _sample_posts(count):
+    return [(f"user{i % 5000}", f"post{i}", f"content {i}", i % 11, f"Topic_{i % 5}",
+             f"forum{i % 50}") for i in range(count)]
+
+
+def benchmark(graph_driver, posts=20000, batch_size=BATCH_SIZE):
+    """Posts/sec of the per-post transactions vs. the batched UNWIND writer."""
+    sample = _sample_posts(posts)
+    baseline = sample[:min(posts, 2000)]
+    start = time.perf_counter()
+    for post in baseline:
+        save_user_post_forum_unbatched(graph_driver, *post)
+    unbatched = len(baseline) / (time.perf_counter() - start)
+
+    writer = GraphWriter(graph_driver, batch_size=batch_size, flush_interval=3600)
+    start = time.perf_counter()
+    for post in sample:
+        writer.add(*post)
+    writer.close()
+    batched = posts / (time.perf_counter() - start)
+    print(f"⏱️ Neo4j writes: {unbatched:,.0f} posts/sec unbatched, "
+          f"{batched:,.0f} posts/sec batched (batch={batch_size})")
+    return unbatched, batched
+
+
+if __name__ == "__main__":
+    # Run from backend/:
+    #   python -m database.neo4j_graph            (local Neo4j at NEO4J_URI)
+    #   python -m database.neo4j_graph record     (recorded-query stand-in, 1 ms round trips)
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        benchmark(RecordingDriver(latency=0.001), posts=200000)
+    else:
+        benchmark(driver)
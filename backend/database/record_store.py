@@ -0,0 +1,154 @@
+# backend/database/record_store.py
+
+import glob
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+# Segment rotation and fsync batching
+SEGMENT_BYTES = 64 * 1024 * 1024
+FSYNC_EVERY = 64
+FSYNC_INTERVAL_SECONDS = 1.0
+
+_SEGMENT_RE = re.compile(r"segment-(\d+)\.(jsonl|parquet)$")
+
+
+def _segments(directory):
+    """Returns (number, path) of every segment in directory, oldest first."""
+    found = []
+    for path in glob.glob(os.path.join(directory, "segment-*")):
+        match = _SEGMENT_RE.search(path)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+def _segment_path(directory, number, ext="jsonl"):
+    return os.path.join(directory, f"segment-{number:06d}.{ext}")
+
+
+class RecordStore:
+    """
+    Append-only, line-delimited JSON store split into size-rotated segments.
+    Every append is flushed to the OS; fsync is batched every fsync_every
+    records or fsync_interval seconds. Sealed segments can optionally be
+    compacted to Parquet (requires pyarrow).
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL_SECONDS, compact=False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact = compact
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+        segments = _segments(directory)
+        if segments and segments[-1][1].endswith(".jsonl"):
+            self._number = segments[-1][0]
+        else:
+            self._number = segments[-1][0] + 1 if segments else 1
+        self._file = open(_segment_path(directory, self._number), "ab")
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        sealed = _segment_path(self.directory, self._number)
+        self._number += 1
+        self._file = open(_segment_path(self.directory, self._number), "ab")
+        if self.compact:
+            compact_segment(sealed)
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+
+def compact_segment(path):
+    """Rewrites a sealed JSONL segment as Parquet, keeping it on failure."""
+    try:
+        import pandas as pd
+        records = list(_iter_jsonl(path))
+        target = path[:-len(".jsonl")] + ".parquet"
+        pd.DataFrame(records).to_parquet(target + ".tmp", index=False)
+        os.replace(target + ".tmp", target)
+        os.remove(path)
+        print(f"🗜️ Compacted {path} -> {target}")
+    except Exception as e:
+        print(f"⚠️ Segment compaction failed for {path}: {e}")
+
+
+def _iter_jsonl(path):
+    with open(path, "rb") as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # torn write at the tail of a crashed segment
+
+
+def _iter_parquet(path, columns=None):
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+        yield from batch.to_pylist()
+
+
+def iter_records(directory, columns=None):
+    """Streams every record in the store, oldest segment first."""
+    for _, path in _segments(directory):
+        if path.endswith(".parquet"):
+            yield from _iter_parquet(path, columns)
+        else:
+            for record in _iter_jsonl(path):
+                yield {k: record.get(k) for k in columns} if columns else record
+
+
+def migrate_json(json_path, directory):
+    """
+    Copies the records of a legacy scraped_data.json array into a new store.
+    The store is built in a staging directory and renamed into place, so an
+    interrupted migration leaves no store behind and is redone on the next run.
+    """
+    with open(json_path, "r", encoding="utf-8") as file:
+        records = json.load(file)
+    staging = directory.rstrip("/\\") + ".migrating"
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    store = RecordStore(staging)
+    for record in records:
+        store.append(record)
+    store.close()
+    os.replace(staging, directory)
+    print(f"📦 Migrated {len(records)} records from {json_path} to {directory}")
+    return len(records)
+
+
+if __name__ == "__main__":
+    # python backend/database/record_store.py backend/scraped_data.json backend/scraped_data
+    import sys
+    migrate_json(sys.argv[1], sys.argv[2])
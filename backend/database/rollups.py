@@ -0,0 +1,198 @@
+# backend/database/rollups.py
+
+import calendar
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Bucket width and how many buckets each resolution keeps
+RESOLUTIONS = {"minute": 60, "hour": 3600, "day": 86400}
+RETENTION = {"minute": 24 * 60, "hour": 30 * 24, "day": 5 * 365}
+
+ALL_TOPICS = "__all__"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Scores are histogrammed in 0.1 steps for the p95 estimate
+HIST_STEP = 0.1
+
+# GPT refinements land shortly after the record they re-score; this many
+# recent records are remembered to find it when replaying the store
+REFINE_WINDOW = 100000
+
+
+def _epoch(timestamp):
+    return calendar.timegm(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timetuple())
+
+
+def _percentile(hist, count, q):
+    rank = q * count
+    seen = 0
+    for bin_index in sorted(hist):
+        seen += hist[bin_index]
+        if seen >= rank:
+            return bin_index * HIST_STEP
+    return 0.0
+
+
+class TrendRollups:
+    """
+    Incremental per-minute/hour/day score rollups, overall and per topic.
+    Each bucket keeps count, sum, max and a sparse score histogram, so
+    adding a record is O(1) and charts read a bounded number of points
+    regardless of how much history has been scraped.
+    """
+
+    def __init__(self):
+        # resolution -> topic -> bucket start -> [count, sum, max, {bin: n}]
+        self._buckets = {res: {} for res in RESOLUTIONS}
+        self._lock = threading.Lock()
+
+    def add(self, timestamp, score, topic=None):
+        try:
+            epoch = _epoch(timestamp)
+            score = float(score)
+        except (TypeError, ValueError):
+            return
+        bin_index = int(round(score / HIST_STEP))
+        with self._lock:
+            for res, width in RESOLUTIONS.items():
+                start = epoch - epoch % width
+                for key in (ALL_TOPICS, topic) if topic else (ALL_TOPICS,):
+                    series = self._buckets[res].setdefault(key, {})
+                    bucket = series.get(start)
+                    if bucket is None:
+                        bucket = series[start] = [0, 0.0, score, {}]
+                        self._trim(series, res)
+                    bucket[0] += 1
+                    bucket[1] += score
+                    bucket[2] = max(bucket[2], score)
+                    bucket[3][bin_index] = bucket[3].get(bin_index, 0) + 1
+
+    def replace(self, timestamp, old_score, new_score, topic=None):
+        """Re-scores one record already added with old_score."""
+        try:
+            epoch = _epoch(timestamp)
+            old_score, new_score = float(old_score), float(new_score)
+        except (TypeError, ValueError):
+            return
+        old_bin = int(round(old_score / HIST_STEP))
+        new_bin = int(round(new_score / HIST_STEP))
+        with self._lock:
+            for res, width in RESOLUTIONS.items():
+                start = epoch - epoch % width
+                for key in (ALL_TOPICS, topic) if topic else (ALL_TOPICS,):
+                    bucket = self._buckets[res].get(key, {}).get(start)
+                    if bucket is None or not bucket[3].get(old_bin):
+                        continue  # trimmed, or never added
+                    bucket[1] += new_score - old_score
+                    bucket[3][old_bin] -= 1
+                    if not bucket[3][old_bin]:
+                        del bucket[3][old_bin]
+                    bucket[3][new_bin] = bucket[3].get(new_bin, 0) + 1
+                    if new_score >= bucket[2]:
+                        bucket[2] = new_score
+                    elif old_score >= bucket[2]:
+                        bucket[2] = max(bucket[3]) * HIST_STEP
+
+    @staticmethod
+    def _trim(series, res):
+        excess = len(series) - RETENTION[res]
+        if excess > 0:
+            for start in sorted(series)[:excess]:
+                del series[start]
+
+    def series(self, resolution, topic=ALL_TOPICS):
+        """Returns [(bucket start, count, mean, max, p95)] oldest first."""
+        with self._lock:
+            buckets = sorted(self._buckets[resolution].get(topic, {}).items())
+            return [
+                (datetime.fromtimestamp(start, tz=timezone.utc), count, total / count, peak,
+                 _percentile(hist, count, 0.95))
+                for start, (count, total, peak, hist) in buckets
+            ]
+
+    def topics(self):
+        with self._lock:
+            return [t for t in self._buckets["day"] if t != ALL_TOPICS]
+
+    def save(self, path):
+        """Atomically writes the rollups to a JSON file."""
+        with self._lock:
+            state = {
+                res: {
+                    topic: {str(start): [b[0], b[1], b[2], {str(k): v for k, v in b[3].items()}]
+                            for start, b in series.items()}
+                    for topic, series in topics.items()
+                }
+                for res, topics in self._buckets.items()
+            }
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        rollups = cls()
+        with open(path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+        for res, topics in state.items():
+            rollups._buckets[res] = {
+                topic: {int(start): [b[0], b[1], b[2], {int(k): v for k, v in b[3].items()}]
+                        for start, b in series.items()}
+                for topic, series in topics.items()
+            }
+        return rollups
+
+    @classmethod
+    def from_records(cls, records):
+        """Backfills rollups from an iterable of scraped records."""
+        rollups = cls()
+        for record, previous in observations(records):
+            if previous is None:
+                rollups.add(record.get("timestamp"),
+                            record.get("score"), record.get("topic"))
+            else:
+                rollups.replace(record.get("timestamp"), previous,
+                                record.get("score"), record.get("topic"))
+        return rollups
+
+
+def observations(records, window=REFINE_WINDOW):
+    """
+    Yields (record, previous score) for the scored observations in records.
+    Heartbeats ("unchanged") are skipped. Fresh records come with None, and
+    "refined" records with the score of the record they re-score, which is
+    looked up among the last window records (refinements of older records
+    are skipped).
+    """
+    recent = OrderedDict()
+    for record in records:
+        status = record.get("status")
+        if status == "unchanged":
+            continue
+        key = (record.get("url"), record.get("timestamp"))
+        if status == "refined":
+            if key in recent:
+                previous, recent[key] = recent[key], record.get("score")
+                yield record, previous
+            continue
+        recent[key] = record.get("score")
+        if len(recent) > window:
+            recent.popitem(last=False)
+        yield record, None
+
+
+def pick_resolution(rollups, max_points):
+    """Finest resolution that still spans the whole history in max_points."""
+    days = rollups.series("day")
+    if not days:
+        return "day"
+    oldest = days[0][0]
+    for res in RESOLUTIONS:
+        points = rollups.series(res)
+        covers = (points[0][0] - oldest).total_seconds() < RESOLUTIONS["day"]
+        if len(points) <= max_points and covers:
+            return res
+    return "day"
@@ -1,38 +1,224 @@
 # backend/elasticsearch_ops/elastic_manager.py
 
 from elasticsearch import Elasticsearch, helpers
+import hashlib
+import json
 import os
+import threading
+import time
+
+from utils.metrics import registry
 
 # Connect to local Elasticsearch
 es = Elasticsearch("http://localhost:9200")
 
-# Index Name
+# Index Name (write alias over time-based backing indices)
 INDEX_NAME = "darkweb-threats"
+TEMPLATE_NAME = "darkweb-threats-template"
+POLICY_NAME = "darkweb-threats-rollover"
+
+# Bulk flush thresholds
+FLUSH_DOCS = 500
+FLUSH_BYTES = 5 * 1024 * 1024
+FLUSH_INTERVAL_SECONDS = 5.0
+MAX_RETRIES = 5
+
+# Actions kept while Elasticsearch is unreachable; beyond this the oldest are dropped
+MAX_BUFFERED_DOCS = 50000
+
+docs_dropped = registry.counter("elasticsearch_docs_dropped_total",
+                                "Documents dropped because the bulk buffer was full")
 
-# Index Mapping (only needs to be created once)
+# Index template for a write-heavy stream (only needs to be created once)
 
 
 def create_index():
-    if not es.indices.exists(index=INDEX_NAME):
-        mapping = {
+    if es.indices.exists(index=INDEX_NAME):
+        print(f"ℹ️ Index {INDEX_NAME} already exists.")
+        return
+
+    es.ilm.put_lifecycle(name=POLICY_NAME, policy={
+        "phases": {
+            "hot": {
+                "actions": {
+                    "rollover": {"max_age": "1d", "max_primary_shard_size": "20gb"}
+                }
+            }
+        }
+    })
+    es.indices.put_index_template(
+        name=TEMPLATE_NAME,
+        index_patterns=[f"{INDEX_NAME}-*"],
+        template={
+            "settings": {
+                "index.lifecycle.name": POLICY_NAME,
+                "index.lifecycle.rollover_alias": INDEX_NAME,
+                "refresh_interval": "30s",
+                "number_of_replicas": 0
+            },
             "mappings": {
                 "properties": {
                     "url": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
+                    "timestamp": {
+                        "type": "date",
+                        "format": "yyyy-MM-dd HH:mm:ss||strict_date_optional_time||epoch_millis"
+                    },
                     "text": {"type": "text"},
                     "score": {"type": "float"},
-                    "topic": {"type": "keyword"}
+                    "topic": {"type": "keyword"},
+                    "status": {"type": "keyword"},
+                    "content_digest": {"type": "keyword"}
                 }
             }
+        })
+    es.indices.create(index=f"{INDEX_NAME}-000001",
+                      aliases={INDEX_NAME: {"is_write_index": True}})
+    print(f"✅ Created index: {INDEX_NAME}")
+
+
+def content_digest(text):
+    """Digest of a page's full cleaned text (entries only keep its first 500 chars)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_id(entry):
+    """
+    Deterministic _id from URL and content, so re-scrapes overwrite.
+    Uses the entry's content_digest when set, as "text" is truncated.
+    """
+    digest = hashlib.sha256()
+    digest.update(entry.get("url", "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update((entry.get("content_digest") or entry.get("text") or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _retryable(status):
+    # Rejections, server errors and connection failures; not mapping errors
+    return status is None or status == 429 or status >= 500
+
+
+class BulkIndexer:
+    """
+    Buffers documents and sends them with helpers.streaming_bulk.
+    Flushes on document count, buffered bytes or a timer. A flush triggered
+    by add() runs in the caller's thread, which blocks the producer while
+    Elasticsearch catches up. 429 responses are retried with backoff;
+    actions that still fail with a retryable status, or whose request
+    failed outright, are put back in the buffer for the next flush. The
+    buffer holds at most max_buffered actions (oldest dropped first).
+    """
+
+    def __init__(self, client, index=INDEX_NAME, flush_docs=FLUSH_DOCS, flush_bytes=FLUSH_BYTES,
+                 flush_interval=FLUSH_INTERVAL_SECONDS, max_retries=MAX_RETRIES,
+                 max_buffered=MAX_BUFFERED_DOCS):
+        self.client = client
+        self.index = index
+        self.flush_docs = flush_docs
+        self.flush_bytes = flush_bytes
+        self.max_retries = max_retries
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.indexed = 0
+        self.errors = 0
+        self.requeued = 0
+        self.dropped = 0
+        self._buffer = []
+        self._bytes = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._timer.start()
+
+    def add(self, entry):
+        action = {
+            "_op_type": "index",
+            "_index": self.index,
+            "_id": document_id(entry),
+            "_source": entry
         }
-        es.indices.create(index=INDEX_NAME, body=mapping)
-        print(f"✅ Created index: {INDEX_NAME}")
-    else:
-        print(f"ℹ️ Index {INDEX_NAME} already exists.")
+        with self._lock:
+            self._buffer.append(action)
+            self._bytes += len(json.dumps(entry))
+            self._trim()
+            full = len(self._buffer) >= self.flush_docs or self._bytes >= self.flush_bytes
+        # After a failed flush, leave retries to the timer
+        if full and time.monotonic() >= self._retry_at:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                actions, self._buffer, self._bytes = self._buffer, [], 0
+            if not actions:
+                return
+            # Newest action per _id, to re-queue by the _id a failure reports
+            latest = {action["_id"]: action for action in actions}
+            failed = []
+            try:
+                for ok, item in helpers.streaming_bulk(
+                        self.client, actions, chunk_size=len(actions),
+                        max_retries=self.max_retries, initial_backoff=1, max_backoff=30,
+                        raise_on_error=False, raise_on_exception=False):
+                    if ok:
+                        self.indexed += 1
+                        continue
+                    result = next(iter(item.values()))
+                    if _retryable(result.get("status")) and result.get("_id") in latest:
+                        failed.append(latest[result["_id"]])
+                    else:
+                        self.errors += 1
+                        print(f"❌ Elasticsearch bulk error: {item}")
+            except Exception as e:
+                # Re-sending with the same _ids is idempotent
+                print(f"⚠️ Elasticsearch bulk request failed: {e}")
+                failed = actions
+            if failed:
+                self._requeue(failed)
+            print(f"📥 Bulk indexed {len(actions) - len(failed)} entries to Elasticsearch"
+                  + (f", {len(failed)} re-queued" if failed else ""))
+
+    def _requeue(self, failed):
+        with self._lock:
+            self._buffer = failed + self._buffer
+            self._bytes = sum(len(json.dumps(action["_source"])) for action in self._buffer)
+            self._trim()
+            self.requeued += len(failed)
+            self._retry_at = time.monotonic() + self.flush_interval
 
-# Save a single document
+    def _trim(self):
+        dropped = len(self._buffer) - self.max_buffered
+        if dropped > 0:
+            self._bytes -= sum(len(json.dumps(action["_source"]))
+                               for action in self._buffer[:dropped])
+            del self._buffer[:dropped]
+            self.dropped += dropped
+            docs_dropped.inc(dropped)
+            print(f"❌ Dropped {dropped} Elasticsearch actions, bulk buffer is full")
+
+    def _flush_periodically(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Periodic Elasticsearch flush failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+bulk_indexer = BulkIndexer(es)
+
+# Queue a document for the next bulk flush
 
 
 def save_entry(entry):
-    es.index(index=INDEX_NAME, document=entry)
-    print(f"📥 Saved entry to Elasticsearch: {entry['url']}")
+    bulk_indexer.add(entry)
+
+
+def flush_entries():
+    bulk_indexer.flush()
@@ -1,48 +1,30 @@
+import csv
 import datetime
-import json
 import pandas as pd
-import torch
 import os
 import matplotlib.pyplot as plt
-from transformers import XLMRobertaTokenizer, TrainingArguments, Trainer
-from torch.utils.data import Dataset
-from sklearn.model_selection import train_test_split
+from transformers import TrainingArguments, Trainer
 from backend.ai_model.xlm_roberta_model import XLMRobertaMPNet
 from ai_model.mpnet_encoder import mpnet_encode
+from ai_model.model_registry import get_tokenizer
+from ai_model.training_data import (LazyTextDataset, PaddingCollator, index_csv, make_loader,
+                                    split_rows)
+from backend.database.record_store import iter_records
+from backend.database.rollups import observations
 
-# Load dataset
-df = pd.read_csv("large_darkweb_threat_dataset.csv")
-df["label"] = df["final_score"].round().astype(int)
-
-# Split data
-train_texts, val_texts, train_labels, val_labels = train_test_split(
-    df["synthetic_text"].tolist(), df["label"].tolist(), test_size=0.1, random_state=42
-)
+DATASET_FILE = "large_darkweb_threat_dataset.csv"
 
 # Tokenizer
-tokenizer = XLMRobertaTokenizer.from_pretrained("xlm-roberta-base")
-
-
-class ThreatDataset(Dataset):
-    def __init__(self, texts, labels):
-        self.encodings = tokenizer(
-            texts, truncation=True, padding=True, return_tensors="pt")
-        self.labels = torch.tensor(labels)
-        self.mpnet = mpnet_encode(texts)
-
-    def __getitem__(self, idx):
-        item = {k: v[idx] for k, v in self.encodings.items()}
-        item["labels"] = self.labels[idx]
-        item["mpnet_emb"] = self.mpnet[idx]
-        return item
-
-    def __len__(self):
-        return len(self.labels)
+tokenizer = get_tokenizer()
 
+# Rows are read and tokenized lazily from the CSV; only the row index
+# (offsets, lengths, labels) is held in memory
+index = index_csv(DATASET_FILE, text_column="synthetic_text", label_column="final_score")
+train_rows, val_rows = split_rows(len(index["offsets"]))
 
 # Datasets
-train_dataset = ThreatDataset(train_texts, train_labels)
-val_dataset = ThreatDataset(val_texts, val_labels)
+train_dataset = LazyTextDataset(DATASET_FILE, index, train_rows, tokenizer)
+val_dataset = LazyTextDataset(DATASET_FILE, index, val_rows, tokenizer)
 
 # Model
 model = XLMRobertaMPNet(num_labels=11)
@@ -62,17 +44,25 @@ training_args = TrainingArguments(
 )
 
 
-def custom_collator(features):
-    batch = {
-        "input_ids": torch.stack([f["input_ids"] for f in features]),
-        "attention_mask": torch.stack([f["attention_mask"] for f in features]),
-        "labels": torch.stack([f["labels"] for f in features]),
-        "mpnet_emb": torch.stack([f["mpnet_emb"] for f in features])
-    }
-    return batch
+# Pads per batch and encodes the batch's MPNet embeddings on the fly
+custom_collator = PaddingCollator(tokenizer.pad_token_id, encode_fn=mpnet_encode)
+
 
+class BucketedTrainer(Trainer):
+    """Trainer whose batches come from the length-bucketing sampler."""
 
-trainer = Trainer(
+    def get_train_dataloader(self):
+        return self.accelerator.prepare(make_loader(
+            self.train_dataset, self._train_batch_size, self.data_collator,
+            num_workers=self.args.dataloader_num_workers))
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        return self.accelerator.prepare(make_loader(
+            eval_dataset or self.eval_dataset, self.args.eval_batch_size, self.data_collator,
+            shuffle=False, num_workers=self.args.dataloader_num_workers))
+
+
+trainer = BucketedTrainer(
     model=model,
     args=training_args,
     train_dataset=train_dataset,
@@ -89,21 +79,47 @@ tokenizer.save_pretrained("./xlm_roberta_elmo_model")
 # ===============================
 
 
-SCRAPED_DATA_FILE = "backend/scraped_data.json"
+SCRAPED_DATA_DIR = "backend/scraped_data"
 EXPORT_FILE = f"backend/export/high_risk_links_{datetime.date.today()}.csv"
 
 os.makedirs("backend/export", exist_ok=True)
 
-try:
-    with open(SCRAPED_DATA_FILE, "r", encoding="utf-8") as file:
-        data = json.load(file)
 
-    df = pd.DataFrame(data)
-    df["score"] = pd.to_numeric(df["score"], errors="coerce")
-    high_risk = df[df["score"] >= 8]  # Customize threshold
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 
-    high_risk[["url", "score", "topic", "timestamp"]].to_csv(
-        EXPORT_FILE, index=False)
+# Streams the record store once, keeping only the latest score of each
+# high-risk (url, timestamp) and per-day (sum, count) totals for the dashboard
+HIGH_RISK_SCORE = 8  # Customize threshold
+daily_totals = {}
+high_risk = {}
+try:
+    for record, previous in observations(iter_records(SCRAPED_DATA_DIR)):
+        score = _to_float(record.get("score"))
+        if score is None:
+            continue
+        key = (record.get("url"), record.get("timestamp"))
+        if score >= HIGH_RISK_SCORE:
+            high_risk[key] = [record.get("url"), score, record.get("topic"),
+                              record.get("timestamp")]
+        else:
+            high_risk.pop(key, None)  # refined below the threshold
+        day = str(record.get("timestamp", ""))[:10]
+        if day:
+            total = daily_totals.setdefault(day, [0.0, 0])
+            if previous is None:
+                total[0] += score
+                total[1] += 1
+            else:
+                total[0] += score - (_to_float(previous) or 0.0)
+    with open(EXPORT_FILE, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["url", "score", "topic", "timestamp"])
+        writer.writerows(high_risk.values())
     print(f"✅ Exported high-risk links to: {EXPORT_FILE}")
 except Exception as e:
     print(f"⚠️ Failed to export high-risk links: {e}")
@@ -113,13 +129,16 @@ except Exception as e:
 # ===============================
 
 try:
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df = df.dropna(subset=["timestamp"])
-    df = df.sort_values("timestamp")
-    df.set_index("timestamp", inplace=True)
+    daily = pd.DataFrame(
+        [(day, total / count) for day, (total, count) in daily_totals.items()],
+        columns=["timestamp", "score"])
+    daily["timestamp"] = pd.to_datetime(daily["timestamp"], errors="coerce")
+    daily = daily.dropna(subset=["timestamp"])
+    daily = daily.sort_values("timestamp")
+    daily.set_index("timestamp", inplace=True)
 
     # Weekly score trend
-    weekly = df.resample("D").mean(numeric_only=True)
+    weekly = daily.resample("D").mean(numeric_only=True)
     weekly[["score"]].plot(
         title="📊 Threat Score Trend (Daily Average)", figsize=(12, 6), color='red')
     plt.xlabel("Date")
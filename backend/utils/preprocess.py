@@ -1,25 +1,32 @@
-import pandas as pd
-import re
+import hashlib
+import os
+import pickle
+import time
+from collections import deque
 
-# Default dataset path
-EXCEL_PATH = "C:/Users/Prajeeta/Documents/GitHub/dark-web-intelligence/backend/data/darkweb_dataset.xlsx"
+import numpy as np
+
+from utils.workbook_cache import load_workbook, workbook_path
+
+# Default dataset path ($DARKWEB_DATASET or backend/data/darkweb_dataset.xlsx)
+EXCEL_PATH = workbook_path()
+
+# Compiled matcher cache (rebuilt when the workbook changes)
+MATCHER_CACHE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "illicit_matcher.pkl")
+
+THREAT_THRESHOLD = 5
 
 # Load dataset from Excel
 
 
 def load_illicit_words(excel_path=EXCEL_PATH):
     try:
-        df = pd.read_excel(excel_path, sheet_name="Sheet1")
-        word_pairs = {}
-
-        for _, row in df.iterrows():
-            activity = str(row["activity"]).strip(
-            ).lower() if pd.notna(row["activity"]) else ""
-            sub_activity = str(
-                row["sub-activity"]).strip().lower() if pd.notna(row["sub-activity"]) else ""
-            word_pairs[sub_activity] = activity
-
-        return word_pairs
+        df = load_workbook(excel_path, sheet_name="Sheet1")
+        activities = df["activity"].fillna("").astype(str).str.strip().str.lower()
+        sub_activities = df["sub-activity"].fillna(
+            "").astype(str).str.strip().str.lower()
+        return dict(zip(sub_activities, activities))
     except FileNotFoundError:
         print(f"Error: The file {excel_path} was not found.")
         return {}
@@ -27,10 +34,134 @@ def load_illicit_words(excel_path=EXCEL_PATH):
         print(f"Error loading dataset: {e}")
         return {}
 
+
+class KeywordMatcher:
+    """
+    Token-level Aho-Corasick automaton over the illicit sub-activity phrases.
+    Matches every phrase, single- or multi-word, in one pass over a sentence.
+    As in the original scorer, a match only counts when its activity is
+    empty or the activity's words come right before the phrase. Unlike it,
+    multi-word phrases and multi-word activities can match; the original
+    compared single tokens, so such entries never scored there.
+    With normalize, phrases, activities and sentences all go through the
+    same function (e.g. one that strips punctuation), so they still match.
+    """
+
+    def __init__(self, word_pairs, normalize=None):
+        self.normalize = normalize
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        digest = hashlib.sha256(_function_name(normalize).encode())
+        for phrase, activity in sorted(word_pairs.items()):
+            digest.update(f"\0{phrase}\0{activity}".encode())
+            tokens = self._words(phrase)
+            if tokens:
+                self._add(tokens, tuple(self._words(activity)))
+        self._link()
+        # Identifies the phrase set and normalization, e.g. for cache keys
+        self.fingerprint = digest.hexdigest()[:16]
+
+    def _words(self, text):
+        return (self.normalize(text) if self.normalize else text).lower().split()
+
+    def _add(self, tokens, activity):
+        state = 0
+        for token in tokens:
+            nxt = self.goto[state].get(token)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][token] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append((len(tokens), activity))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(token, 0)
+                self.output[nxt] = self.output[nxt] + \
+                    self.output[self.fail[nxt]]
+
+    def count(self, sentence):
+        goto, fail, output = self.goto, self.fail, self.output
+        words = self._words(sentence)
+        state = 0
+        score = 0
+        for i, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, activity in output[state]:
+                if not activity:
+                    score += 1
+                    continue
+                start = i - length + 1
+                if start >= len(activity) and tuple(words[start - len(activity):start]) == activity:
+                    score += 1
+        return score
+
+    def scores(self, sentences):
+        return np.fromiter((self.count(s) for s in sentences), dtype=np.int32, count=len(sentences))
+
+
+def _function_name(function):
+    return f"{function.__module__}.{function.__qualname__}" if function else ""
+
+
+def _source_key(excel_path, normalize=None):
+    stat = os.stat(excel_path)
+    return hashlib.sha256(f"{os.path.abspath(excel_path)}:{stat.st_size}:{stat.st_mtime_ns}:"
+                          f"{_function_name(normalize)}".encode()).hexdigest()
+
+
+def load_matcher(excel_path=EXCEL_PATH, cache_path=MATCHER_CACHE, normalize=None):
+    """
+    Loads the compiled matcher from disk, rebuilding it if the workbook or
+    the normalize function changed.
+    """
+    key = _source_key(excel_path, normalize)
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as file:
+            cached = pickle.load(file)
+        if cached.get("key") == key:
+            return cached["matcher"]
+
+    matcher = KeywordMatcher(load_illicit_words(excel_path), normalize)
+    with open(cache_path + ".tmp", "wb") as file:
+        pickle.dump({"key": key, "matcher": matcher}, file)
+    os.replace(cache_path + ".tmp", cache_path)
+    return matcher
+
+
+# Matchers built for word_pairs dicts passed to the per-sentence API
+_matchers = {}
+
+
+def _matcher_for(word_pairs):
+    cached = _matchers.get(id(word_pairs))
+    if cached is None or cached[0] is not word_pairs:
+        cached = _matchers[id(word_pairs)] = (
+            word_pairs, KeywordMatcher(word_pairs))
+    return cached[1]
+
 # Process scraped sentences
 
 
 def compute_threat_score(sentence, word_pairs):
+    return _matcher_for(word_pairs).count(sentence)
+
+
+def _legacy_threat_score(sentence, word_pairs):
+    """Original single-token scorer, kept as the benchmark baseline."""
     words = sentence.lower().split()
     score = 0
     for i, word in enumerate(words):
@@ -45,7 +176,29 @@ def compute_threat_score(sentence, word_pairs):
 
 def classify_text(sentence, word_pairs):
     score = compute_threat_score(sentence, word_pairs)
-    return {"score": score, "label": "Threat" if score >= 5 else "Normal"}
+    return {"score": score, "label": "Threat" if score >= THREAT_THRESHOLD else "Normal"}
+
+
+def classify_texts(sentences, matcher, threshold=THREAT_THRESHOLD):
+    """Scores a batch of sentences; returns (scores array, is_threat mask)."""
+    scores = matcher.scores(sentences)
+    return scores, scores >= threshold
+
+
+def benchmark(sentences, word_pairs):
+    """Sentences/sec of the original scorer vs the compiled matcher."""
+    start = time.perf_counter()
+    for sentence in sentences:
+        _legacy_threat_score(sentence, word_pairs)
+    legacy = len(sentences) / (time.perf_counter() - start)
+
+    matcher = KeywordMatcher(word_pairs)
+    start = time.perf_counter()
+    classify_texts(sentences, matcher)
+    compiled = len(sentences) / (time.perf_counter() - start)
+
+    print(f"⏱️ legacy: {legacy:.0f} sentences/sec, compiled: {compiled:.0f} sentences/sec")
+    return legacy, compiled
 
 
 # Example Usage
@@ -54,3 +207,4 @@ if __name__ == "__main__":
     text = "This is a sample threat conversation"
     result = classify_text(text, word_pairs)
     print(result)
+    benchmark([text, "selling a credit card dump and zero-day exploit kits"] * 5000, word_pairs)
@@ -0,0 +1,119 @@
+# backend/utils/workbook_cache.py
+
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+BACKEND_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Override with DARKWEB_DATASET / DATASET_CACHE_DIR
+DEFAULT_WORKBOOK = os.path.join(BACKEND_PATH, "data", "darkweb_dataset.xlsx")
+DEFAULT_CACHE_DIR = os.path.join(BACKEND_PATH, "data", "cache")
+
+
+def workbook_path(path=None):
+    """path if given, else $DARKWEB_DATASET, else backend/data/darkweb_dataset.xlsx."""
+    return path or os.getenv("DARKWEB_DATASET") or DEFAULT_WORKBOOK
+
+
+def cache_dir(directory=None):
+    return directory or os.getenv("DATASET_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(source, sheet_name, directory):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    sheet = re.sub(r"[^\w-]", "_", str(sheet_name))
+    tag = hashlib.sha256(os.path.abspath(source).encode("utf-8")).hexdigest()[:8]
+    base = os.path.join(directory, f"{stem}-{sheet}-{tag}")
+    return base + ".parquet", base + ".json"
+
+
+def _parquet_available():
+    try:
+        __import__("pyarrow")
+        return True
+    except ImportError:
+        return False
+
+
+def _columnar(df):
+    # Excel columns mixing numbers and text (e.g. an activity named 420)
+    # are stored as text; missing cells stay null
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+
+def load_workbook(path=None, sheet_name=0, directory=None):
+    """
+    Returns one sheet of the workbook as a DataFrame, read from a Parquet
+    copy that is converted on first use. The copy is reused while the
+    workbook's size and mtime match; if only the mtime changed, the
+    content hash decides. Without pyarrow the workbook is read directly.
+    """
+    source = workbook_path(path)
+    if not _parquet_available():
+        print(f"⚠️ pyarrow not installed, reading {source} without the Parquet cache")
+        return _columnar(pd.read_excel(source, sheet_name=sheet_name))
+    directory = cache_dir(directory)
+    data_path, meta_path = _cache_paths(source, sheet_name, directory)
+    stat = os.stat(source)
+    stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    meta = None
+    if os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if all(meta.get(k) == v for k, v in stamp.items()):
+            return pd.read_parquet(data_path)
+
+    digest = _file_digest(source)
+    if meta is not None and meta.get("sha256") == digest:
+        df = pd.read_parquet(data_path)
+    else:
+        df = _columnar(pd.read_excel(source, sheet_name=sheet_name))
+        os.makedirs(directory, exist_ok=True)
+        df.to_parquet(data_path + ".tmp", index=False)
+        os.replace(data_path + ".tmp", data_path)
+        print(f"🗃️ Cached {source} [{sheet_name}] as {data_path}")
+
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({**stamp, "sha256": digest, "source": os.path.abspath(source),
+                   "sheet": str(sheet_name)}, file)
+    os.replace(meta_path + ".tmp", meta_path)
+    return df
+
+
+def benchmark(path=None, sheet_name=0, repeats=20):
+    """Milliseconds per load with pd.read_excel vs. the cached Parquet copy."""
+    source = workbook_path(path)
+    load_workbook(source, sheet_name)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pd.read_excel(source, sheet_name=sheet_name)
+    excel = 1000 * (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load_workbook(source, sheet_name)
+    cached = 1000 * (time.perf_counter() - start) / repeats
+    print(f"⏱️ read_excel: {excel:.1f} ms, cached Parquet: {cached:.1f} ms")
+    return excel, cached
+
+
+if __name__ == "__main__":
+    # python -m utils.workbook_cache [workbook]
+    import sys
+
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Modules import each other as top-level packages (ai_model, utils, ...)
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_PATH)
@@ -0,0 +1,113 @@
+# tests/test_async_pipeline.py
+
+import asyncio
+from collections import Counter
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from ai_model.scraping.async_fetcher import AsyncFetcher
+from ai_model.scraping.pipeline import Periodic, run_pipeline
+
+DELAY = 0.05
+
+
+def stand_in_app(in_flight, peak):
+    """Local stand-in for the onion hosts; tracks concurrent requests per Host."""
+    async def page(request):
+        host = request.host.split(":")[0]
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        peak["all"] = max(peak["all"], sum(in_flight.values()))
+        try:
+            await asyncio.sleep(DELAY)
+            return web.Response(text=f"<p>{request.path}</p>", content_type="text/html")
+        finally:
+            in_flight[host] -= 1
+
+    app = web.Application()
+    app.router.add_get("/{name}", page)
+    return app
+
+
+async def crawl(urls_for, per_host, fail_on=None):
+    in_flight, peak = Counter(), Counter()
+    server = TestServer(stand_in_app(in_flight, peak), host="127.0.0.1")
+    await server.start_server()
+    results = []
+    try:
+        async with AsyncFetcher(proxy_url=None, per_host=per_host) as fetcher:
+            async def fetch(url):
+                status, body, _ = await fetcher.fetch(url)
+                assert status == 200
+                return url, body
+
+            async def check(item):
+                if fail_on and item[0].endswith(fail_on):
+                    raise ValueError("bad page")
+                return item
+
+            async def persist(item):
+                results.append(item)
+
+            await run_pipeline(urls_for(server.port), [(fetch, 16), (check, 2), (persist, 1)])
+    finally:
+        await server.close()
+    return results, peak
+
+
+def two_hosts(count):
+    # 127.0.0.1 and localhost reach the same server but are separate hosts
+    return lambda port: [f"http://{host}:{port}/p{i}"
+                         for i in range(count) for host in ("127.0.0.1", "localhost")]
+
+
+def test_per_host_limit_holds_while_hosts_overlap():
+    results, peak = asyncio.run(crawl(two_hosts(6), per_host=2))
+    assert len(results) == 12
+    assert peak["127.0.0.1"] == 2
+    assert peak["localhost"] == 2
+    assert peak["all"] > 2
+
+
+def test_failing_stage_drops_only_its_item():
+    results, _ = asyncio.run(crawl(lambda port: [f"http://127.0.0.1:{port}/p{i}"
+                                                 for i in range(5)],
+                                   per_host=2, fail_on="/p3"))
+    assert sorted(url.rsplit("/", 1)[1] for url, _ in results) == ["p0", "p1", "p2", "p4"]
+    assert all(body.startswith("<p>/p") for _, body in results)
+
+
+def test_periodic_runs_at_most_once_per_period():
+    async def run():
+        now = [0.0]
+        calls = []
+
+        async def callback():
+            calls.append(now[0])
+
+        periodic = Periodic(callback, 60, clock=lambda: now[0])
+        for now[0] in (10.0, 70.0):
+            await periodic.maybe_run()
+        assert calls == []              # nothing marked yet
+
+        for now[0] in (80.0, 90.0, 100.0):
+            periodic.mark()
+            await periodic.maybe_run()
+        assert calls == [80.0]          # 80 s since start, then the period restarts
+
+        for now[0] in (120.0, 139.0):
+            periodic.mark()
+            await periodic.maybe_run()
+        assert calls == [80.0]
+        now[0] = 140.0
+        await periodic.maybe_run()
+        assert calls == [80.0, 140.0]
+
+        await periodic.close()
+        assert calls == [80.0, 140.0]   # nothing outstanding
+        periodic.mark()
+        await periodic.close()
+        assert calls == [80.0, 140.0, 140.0]
+
+    asyncio.run(run())
@@ -0,0 +1,116 @@
+# tests/test_batching.py
+
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from ai_model.batching import MicroBatchScorer, predict_batch
+
+
+class Recorder:
+    """score_fn that records batch sizes and scores each text by its length."""
+
+    def __init__(self, fail=False):
+        self.sizes = []
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.sizes.append(len(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [len(text) for text in texts]
+
+
+def test_flushes_at_max_batch_size():
+    recorder = Recorder()
+    scorer = MicroBatchScorer(recorder, max_batch_size=4, max_wait=30)
+    futures = [scorer.submit("x" * i) for i in range(4)]
+    done, _ = wait(futures, timeout=5)
+    assert len(done) == 4
+    assert recorder.sizes == [4]
+    scorer.close()
+
+
+def test_flushes_when_max_wait_expires():
+    recorder = Recorder()
+    scorer = MicroBatchScorer(recorder, max_batch_size=100, max_wait=0.05)
+    start = time.monotonic()
+    futures = [scorer.submit("a"), scorer.submit("bb")]
+    assert [f.result(timeout=5) for f in futures] == [1, 2]
+    assert time.monotonic() - start < 5
+    assert recorder.sizes == [2]
+    scorer.close()
+
+
+def test_results_map_back_to_their_futures():
+    scorer = MicroBatchScorer(Recorder(), max_batch_size=8, max_wait=0.01)
+    texts = ["x" * n for n in (5, 1, 9, 3, 7, 2, 8, 4, 6, 10, 11)]
+    results = {}
+
+    def submit(text):
+        results[text] = scorer.submit(text).result(timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {text: len(text) for text in texts}
+    assert scorer.pages == len(texts)
+    scorer.close()
+
+
+def test_exception_reaches_every_caller():
+    scorer = MicroBatchScorer(Recorder(fail=True), max_batch_size=3, max_wait=30)
+    futures = [scorer.submit(text) for text in ("a", "b", "c")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
+    assert scorer.batches == 0
+    scorer.close()
+
+
+def test_close_drains_pending_texts():
+    recorder = Recorder()
+    scorer = MicroBatchScorer(recorder, max_batch_size=100, max_wait=30)
+    futures = [scorer.submit("x" * i) for i in range(5)]
+    scorer.close()
+    assert all(f.done() for f in futures)
+    assert [f.result() for f in futures] == list(range(5))
+    assert not scorer._thread.is_alive()
+
+
+class PaddingTokenizer:
+    def __call__(self, texts, return_tensors, truncation, max_length, padding):
+        assert padding == "longest"
+        lengths = [min(len(t.split()), max_length) for t in texts]
+        width = max(lengths)
+        ids = torch.zeros(len(texts), width, dtype=torch.long)
+        mask = torch.zeros(len(texts), width, dtype=torch.long)
+        for i, n in enumerate(lengths):
+            ids[i, :n], mask[i, :n] = 1, 1
+        return {"input_ids": ids, "attention_mask": mask}
+
+
+class LengthModel(torch.nn.Module):
+    """Predicts the number of real tokens as the label."""
+
+    def forward(self, input_ids, attention_mask, mpnet_emb):
+        tokens = attention_mask.sum(dim=1)
+        return {"logits": torch.nn.functional.one_hot(tokens, 11).float()}
+
+
+def test_predict_batch_scores_each_text():
+    def encode(texts, batch_size):
+        return torch.ones(len(texts), 4)
+
+    texts = ["one", "one two three", "one two"]
+    labels, vectors = predict_batch(LengthModel(), PaddingTokenizer(), texts,
+                                    encode_fn=encode, return_embeddings=True)
+    assert labels == [1, 3, 2]
+    assert vectors.shape == (3, 4)
+    assert predict_batch(LengthModel(), PaddingTokenizer(), [], encode_fn=encode) == []
@@ -0,0 +1,73 @@
+# tests/test_cascade.py
+
+import pytest
+
+from ai_model.cascade import ScoringCascade
+from ai_model.extraction import normalize_keywords
+from utils.preprocess import KeywordMatcher, load_matcher
+from utils.workbook_cache import DEFAULT_WORKBOOK
+
+WORD_PAIRS = {
+    "exit-scam": "",
+    "café": "",
+    "end-to-end": "",
+    "kit": "zero-day",
+    "fullz": "",
+}
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher(WORD_PAIRS, normalize=normalize_keywords)
+
+
+@pytest.mark.parametrize("text, hits", [
+    ("Vendor pulled an EXIT-SCAM last week.", 1),
+    ("Meet at the Café, bring cash", 1),
+    ("End-to-end encrypted chat; zero-day kit for sale", 2),
+    ("a kit without its activity", 0),
+    ("weather report", 0),
+])
+def test_hyphenated_and_accented_phrases_match(matcher, text, hits):
+    assert matcher.count(text) == hits
+
+
+def test_workbook_phrases_match_after_normalization(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATASET_CACHE_DIR", str(tmp_path))
+    matcher = load_matcher(DEFAULT_WORKBOOK, str(tmp_path / "matcher.pkl"), normalize_keywords)
+    assert matcher.count("classic exit-scam by the admins") >= 1
+    assert load_matcher(DEFAULT_WORKBOOK, str(tmp_path / "matcher.pkl"),
+                        normalize_keywords).fingerprint == matcher.fingerprint
+
+
+def test_band_routes_pages(matcher):
+    cascade = ScoringCascade(matcher, band_low=2, band_high=6, keyword_points=2,
+                             audit_rate=0.0)
+    assert cascade.triage("nothing to see") == (0.0, False, None)
+    assert cascade.triage("exit-scam") == (2.0, True, None)
+    assert cascade.triage("exit-scam fullz café") == (6.0, False, None)
+    assert cascade.report()["counts"]["filtered"] == 1
+    assert cascade.report()["counts"]["resolved_high"] == 1
+
+
+def test_audits_and_agreement(matcher):
+    cascade = ScoringCascade(matcher, band_low=2, band_high=6, keyword_points=2,
+                             audit_rate=1.0)
+    _, escalate, audited = cascade.triage("nothing to see")
+    assert escalate and audited == "low"
+    cascade.record_model(1, audited)
+    _, escalate, audited = cascade.triage("exit-scam fullz café")
+    assert escalate and audited == "high"
+    cascade.record_model(3, audited)
+    report = cascade.report()
+    assert report["filter_agreement"] == 1.0
+    assert report["high_agreement"] == 0.0
+
+
+def test_cache_tag_follows_thresholds(matcher):
+    tag = ScoringCascade(matcher).cache_tag
+    assert ScoringCascade(matcher).cache_tag == tag
+    assert ScoringCascade(matcher, band_low=4).cache_tag != tag
+    assert ScoringCascade(matcher, keyword_points=1).cache_tag != tag
+    other = KeywordMatcher({**WORD_PAIRS, "cvv": ""}, normalize=normalize_keywords)
+    assert ScoringCascade(other).cache_tag != tag
@@ -0,0 +1,68 @@
+# tests/test_cpu_inference.py
+
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+from torch import nn
+
+from ai_model.cpu_inference import load_inference_backend, quantize_int8
+from ai_model.mpnet_encoder import mpnet_encode
+
+
+class TinyThreatModel(nn.Module):
+    """XLMRobertaMPNet's call signature over a small embedding and MLP."""
+
+    def __init__(self, vocab=100, dim=64, labels=11):
+        super().__init__()
+        self.embed = nn.Embedding(vocab, dim)
+        self.mpnet_fc = nn.Linear(32, dim)
+        self.hidden = nn.Linear(2 * dim, dim)
+        self.classifier = nn.Linear(dim, labels)
+
+    def forward(self, input_ids, attention_mask, mpnet_emb):
+        mask = attention_mask.unsqueeze(-1).float()
+        pooled = (self.embed(input_ids) * mask).sum(1) / mask.sum(1)
+        features = torch.cat([pooled, self.mpnet_fc(mpnet_emb)], dim=1)
+        return {"logits": self.classifier(torch.relu(self.hidden(features)))}
+
+
+def test_onnx_falls_back_to_torch_without_onnxruntime(monkeypatch):
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    model = TinyThreatModel()
+    backend_model, encode_fn = load_inference_backend("onnx", model)
+    assert backend_model is model
+    assert encode_fn is mpnet_encode
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_inference_backend("fp16", TinyThreatModel())
+
+
+def test_int8_scores_stay_close_to_fp32():
+    torch.manual_seed(0)
+    model = TinyThreatModel().eval()
+    quantized = quantize_int8(model).eval()
+    assert any("quantized" in type(m).__module__ for m in quantized.modules())
+
+    ids = torch.randint(0, 100, (256, 24))
+    mask = torch.ones_like(ids)
+    mask[:, 16:] = torch.randint(0, 2, (256, 8))
+    emb = torch.randn(256, 32)
+    with torch.no_grad():
+        reference = model(ids, mask, emb)["logits"]
+        candidate = quantized(ids, mask, emb)["logits"]
+    scale = reference.abs().max()
+    assert (candidate - reference).abs().max() <= 0.05 * scale
+    agreement = (candidate.argmax(1) == reference.argmax(1)).float().mean()
+    assert agreement >= 0.95
+
+
+def test_int8_backend_quantizes_both_models():
+    model, mpnet = TinyThreatModel().eval(), nn.Sequential(nn.Linear(8, 8))
+    backend_model, encode_fn = load_inference_backend("int8", model, mpnet=mpnet)
+    assert backend_model is not model
+    assert any("quantized" in type(m).__module__ for m in backend_model.modules())
+    assert callable(encode_fn)
@@ -0,0 +1,121 @@
+# tests/test_elastic_bulk.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from elasticsearch import Elasticsearch
+
+from elasticsearch_ops.elastic_manager import BulkIndexer, content_digest, document_id
+
+
+class StubElasticsearch(BaseHTTPRequestHandler):
+    """
+    Answers _bulk requests like Elasticsearch; ids listed in server.reject
+    get a 503 item status (once each), ids in server.invalid a 400.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        lines = self.rfile.read(int(self.headers["Content-Length"])).splitlines()
+        items = []
+        for header, source in zip(lines[::2], lines[1::2]):
+            _id = json.loads(header)["index"]["_id"]
+            if _id in self.server.reject:
+                self.server.reject.discard(_id)
+                items.append({"index": {"_id": _id, "status": 503,
+                                        "error": {"type": "unavailable_shards_exception"}}})
+            elif _id in self.server.invalid:
+                items.append({"index": {"_id": _id, "status": 400,
+                                        "error": {"type": "mapper_parsing_exception"}}})
+            else:
+                self.server.indexed[_id] = json.loads(source)
+                items.append({"index": {"_id": _id, "status": 201}})
+        self._reply({"took": 1, "errors": any(i["index"]["status"] >= 300 for i in items),
+                     "items": items})
+
+    do_PUT = do_POST
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubElasticsearch)
+    server.reject, server.invalid, server.indexed = set(), set(), {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def indexer_for(url, **kwargs):
+    client = Elasticsearch(url, max_retries=0)
+    return BulkIndexer(client, index="test", flush_interval=3600, **kwargs)
+
+
+def entry(i, text=None):
+    text = text or f"page {i}"
+    return {"url": f"http://site{i}.onion", "text": text[:500],
+            "content_digest": content_digest(text), "score": i}
+
+
+def test_failed_actions_are_retried_on_next_flush(stub_server):
+    indexer = indexer_for(f"http://127.0.0.1:{stub_server.server_port}", flush_docs=4)
+    entries = [entry(i) for i in range(4)]
+    stub_server.reject = {document_id(entries[1])}
+    stub_server.invalid = {document_id(entries[3])}
+
+    for e in entries:
+        indexer.add(e)
+    assert len(stub_server.indexed) == 2
+    assert indexer.requeued == 1
+    assert indexer.errors == 1
+
+    indexer.flush()
+    assert sorted(doc["score"] for doc in stub_server.indexed.values()) == [0, 1, 2]
+    assert indexer.indexed == 3
+
+
+def test_unreachable_cluster_keeps_actions(stub_server):
+    port = stub_server.server_port
+    stub_server.shutdown()
+    stub_server.server_close()
+
+    indexer = indexer_for(f"http://127.0.0.1:{port}")
+    indexer.add(entry(0))
+    indexer.flush()
+    assert indexer.requeued == 1
+    assert len(indexer._buffer) == 1
+
+
+def test_document_id_covers_text_beyond_the_stored_prefix():
+    prefix = "x" * 500
+    first, second = entry(0, prefix + " old listing"), entry(0, prefix + " new listing")
+    assert first["text"] == second["text"]
+    assert document_id(first) != document_id(second)
+
+
+def test_outage_buffer_is_capped(stub_server):
+    port = stub_server.server_port
+    stub_server.shutdown()
+    stub_server.server_close()
+
+    indexer = indexer_for(f"http://127.0.0.1:{port}", flush_docs=2, max_buffered=3)
+    for i in range(6):
+        indexer.add(entry(i))
+    indexer.flush()
+    assert [a["_source"]["score"] for a in indexer._buffer] == [3, 4, 5]
+    assert indexer.dropped == 3
+    assert indexer._bytes == sum(len(json.dumps(a["_source"])) for a in indexer._buffer)
@@ -0,0 +1,61 @@
+# tests/test_extraction.py
+
+import pytest
+
+from ai_model.extraction import (BACKENDS, _available, clean_html, legacy_clean,
+                                 normalize_keywords, parity_report)
+
+PAGES = [
+    "<html><head><title>Market</title><style>p {color: red}</style></head>"
+    "<body><p>Fresh <b>cards</b> for sale</p><script>var t = 1;</script>"
+    "<p>Escrow only</p></body></html>",
+    "<div>Queue<noscript><p>enable javascript</p></noscript> DO NOT REFRESH</div>",
+    "<p>one</p><template>hidden <b>row</b></template><p>two</p>",
+    "<body><noscript>no js</noscript><template><p>tmpl</p></template>tail</body>",
+    "<p>login<!-- captcha -->form</p><iframe src='x'>frame</iframe>after",
+    "<ul><li>Café – zero-day</li><li>exit-scam &amp; more</li></ul>",
+    "",
+]
+
+# Pages whose text only differs in tags the scraper_utils rules kept
+SCRAPER_UTILS_PAGES = [p for p in PAGES if "<noscript" not in p and "<iframe" not in p]
+
+backends = [pytest.param(b, marks=pytest.mark.skipif(not _available(b), reason=f"{b} missing"))
+            for b in BACKENDS]
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("html", PAGES)
+def test_matches_legacy_scraper(backend, html):
+    assert clean_html(html, "", backend) == legacy_clean(html, "scraper")
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("html", PAGES)
+def test_matches_legacy_parser(backend, html):
+    assert normalize_keywords(clean_html(html, " ", backend)) == legacy_clean(html, "parser")
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("html", SCRAPER_UTILS_PAGES)
+def test_matches_legacy_scraper_utils(backend, html):
+    assert clean_html(html, "", backend) == legacy_clean(html, "scraper_utils")
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_template_and_comment_tails(backend):
+    assert clean_html(PAGES[3], " ", backend) == "tail"
+    assert clean_html(PAGES[4], " ", backend) == "login form after"
+
+
+def test_parity_report_covers_every_profile():
+    report = parity_report(PAGES, backends=("html.parser",))
+    assert report[("html.parser", "scraper")] == 1.0
+    assert report[("html.parser", "parser")] == 1.0
+
+
+def test_max_bytes_counts_encoded_bytes():
+    html = "<p>" + "é" * 100 + "</p>"
+    text = clean_html(html, max_bytes=3 + 21)
+    assert text == "é" * 10
+    assert len(clean_html(html, max_bytes=3 + 20)) == 10
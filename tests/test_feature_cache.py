@@ -0,0 +1,48 @@
+# tests/test_feature_cache.py
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from ai_model.feature_cache import FeatureStore
+
+
+def test_encoder_change_clears_only_store_files(tmp_path):
+    other = tmp_path / "notes.txt"
+    other.write_text("keep me", encoding="utf-8")
+    store = FeatureStore(str(tmp_path), "v1", dim=4)
+    store.add(["a", "b"], np.ones((2, 4)), np.zeros((2, 4)))
+    store.save()
+    store._keys_file.close()
+
+    assert len(FeatureStore(str(tmp_path), "v1", dim=4)) == 2
+    fresh = FeatureStore(str(tmp_path), "v2", dim=4)
+    assert len(fresh) == 0
+    assert other.read_text(encoding="utf-8") == "keep me"
+
+
+def test_torn_write_drops_uncommitted_rows(tmp_path):
+    store = FeatureStore(str(tmp_path), "v1", dim=4)
+    store.add(["a", "b"], np.ones((2, 4)), np.zeros((2, 4)))
+    store.save()
+    # Crash after the keys reached disk but before the next save
+    store.add(["c"], np.full((1, 4), 2.0), np.zeros((1, 4)))
+    store._keys_file.flush()
+    store._keys_file.close()
+
+    reloaded = FeatureStore(str(tmp_path), "v1", dim=4)
+    assert len(reloaded) == 2
+    assert reloaded.missing(["a", "b", "c"]) == [2]
+    with open(tmp_path / "keys.txt", encoding="utf-8") as file:
+        assert len(file.read().splitlines()) == 2
+    xlm_out, _ = reloaded.load(reloaded.lookup(["b"]))
+    assert xlm_out.float().tolist() == [[1.0] * 4]
+
+
+def test_store_without_manifest_starts_empty(tmp_path):
+    store = FeatureStore(str(tmp_path), "v1", dim=4)
+    store.add(["a"], np.ones((1, 4)), np.zeros((1, 4)))
+    store._keys_file.flush()
+    store._keys_file.close()
+    assert len(FeatureStore(str(tmp_path), "v1", dim=4)) == 0
@@ -0,0 +1,99 @@
+# tests/test_fetch_state.py
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from ai_model.scraping.async_fetcher import AsyncFetcher
+from ai_model.scraping.fetch_state import FetchState, body_digest, conditional_headers
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Oct 2025 10:00:00 GMT"
+
+
+def test_validators_round_trip(tmp_path):
+    state = FetchState(str(tmp_path / "fetch_state.db"))
+    assert state.get("http://a.onion/") is None
+    assert conditional_headers(None) == {}
+
+    state.record("http://a.onion/", ETAG, LAST_MODIFIED, body_digest("<p>hi</p>"), 7, "Drugs")
+    stored = state.get("http://a.onion/")
+    assert conditional_headers(stored) == {"If-None-Match": ETAG,
+                                           "If-Modified-Since": LAST_MODIFIED}
+
+    state.touch("http://a.onion/", etag='"v2"')
+    stored = state.get("http://a.onion/")
+    assert stored["etag"] == '"v2"' and stored["last_modified"] == LAST_MODIFIED
+    state.close()
+
+    reopened = FetchState(str(tmp_path / "fetch_state.db"))
+    assert reopened.get("http://a.onion/")["etag"] == '"v2"'
+
+
+def test_only_present_validators_are_sent(tmp_path):
+    state = FetchState(str(tmp_path / "fetch_state.db"))
+    state.record("http://b.onion/", None, LAST_MODIFIED, "d", 3, "Other")
+    assert conditional_headers(state.get("http://b.onion/")) == {
+        "If-Modified-Since": LAST_MODIFIED}
+
+
+def conditional_app(body):
+    async def page(request):
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304)
+        return web.Response(text=body["html"], content_type="text/html",
+                            headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    return app
+
+
+async def visit(fetcher, state, url):
+    """
+    The scraper's fetch-stage decision: (status, reused score or None,
+    response headers, body).
+    """
+    stored = state.get(url)
+    status, html, headers = await fetcher.fetch(url, headers=conditional_headers(stored))
+    if status == 304:
+        state.touch(url)
+        return status, stored["score"], headers, None
+    if stored is not None and stored["digest"] == body_digest(html):
+        return status, stored["score"], headers, html
+    return status, None, headers, html
+
+
+def test_304_reuses_score_and_new_body_invalidates_it(tmp_path):
+    async def run():
+        body = {"html": "<p>listing</p>"}
+        server = TestServer(conditional_app(body), host="127.0.0.1")
+        await server.start_server()
+        state = FetchState(str(tmp_path / "fetch_state.db"))
+        url = f"http://127.0.0.1:{server.port}/"
+        try:
+            async with AsyncFetcher(proxy_url=None) as fetcher:
+                status, score, headers, html = await visit(fetcher, state, url)
+                assert status == 200 and score is None
+                # Header lookups are case-insensitive (aiohttp sends "Etag")
+                state.record(url, headers.get("ETag"), headers.get("Last-Modified"),
+                             body_digest(html), 6, "Drugs")
+
+                status, score, _, _ = await visit(fetcher, state, url)
+                assert (status, score) == (304, 6)
+
+                # Without validators the unchanged body digest still reuses the score
+                state.record(url, None, None, body_digest(html), 6, "Drugs")
+                status, score, _, _ = await visit(fetcher, state, url)
+                assert (status, score) == (200, 6)
+
+                # A changed body has a new digest: the stored score is not reused
+                body["html"] = "<p>listing, now with guns</p>"
+                status, score, _, html = await visit(fetcher, state, url)
+                assert status == 200 and score is None
+                assert body_digest(html) != state.get(url)["digest"]
+        finally:
+            await server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,92 @@
+# tests/test_gpt_assist.py
+
+import asyncio
+import time
+
+from aiohttp.test_utils import TestServer
+
+from ai_model.gpt_assist import (FAKE_STATS, ChatCompletionsBackend, CircuitBreaker, GPTRefiner,
+                                 TokenBucket, fake_app)
+from ai_model.score_cache import ScoreCache
+
+
+def test_token_bucket_allows_burst_then_paces():
+    async def acquire_all(bucket, count):
+        start = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_all(TokenBucket(rate=20, burst=2), 2)) < 0.04
+    assert asyncio.run(acquire_all(TokenBucket(rate=20, burst=2), 6)) >= 0.18
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(max_failures=2, reset_seconds=0.05)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial call at a time
+    breaker.failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+async def with_fake_server(run, **app_kwargs):
+    app = fake_app(latency=0.01, **app_kwargs)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    try:
+        return await run(f"http://127.0.0.1:{server.port}/v1", app)
+    finally:
+        await server.close()
+
+
+def test_refiner_batches_and_caches(tmp_path):
+    cache = ScoreCache(str(tmp_path / "gpt.db"), "gpt")
+
+    async def run(base_url, app):
+        refiner = GPTRefiner(ChatCompletionsBackend(base_url, api_key=None), cache=cache,
+                             max_wait=0.05, bucket=TokenBucket(rate=100, burst=10))
+        try:
+            texts = ["selling a weapon", "ransomware builds", "selling a weapon", "garden club"]
+            first = await asyncio.gather(*(refiner.refine(t, 5) for t in texts))
+            requests = app[FAKE_STATS]["requests"]
+            again = await refiner.refine("ransomware builds", 5)
+            return first, requests, again, app[FAKE_STATS]["requests"], refiner.stats()
+        finally:
+            await refiner.close()
+
+    first, requests, again, requests_after, stats = asyncio.run(with_fake_server(run))
+    assert first == [6, 6, 6, 4]
+    assert requests == 1          # three distinct texts in one request
+    assert again == 6 and requests_after == 1
+    assert stats["refined"] == 3
+    assert cache.get("garden club") == (4, None)
+
+
+def test_failing_backend_falls_back_and_opens_circuit():
+    async def run(base_url, app):
+        refiner = GPTRefiner(ChatCompletionsBackend(base_url, api_key=None), max_wait=0.01,
+                             bucket=TokenBucket(rate=100, burst=10),
+                             breaker=CircuitBreaker(max_failures=2, reset_seconds=60))
+        try:
+            scores = [await refiner.refine(f"leaked cards {i}", 7) for i in range(4)]
+            return scores, refiner.stats()
+        finally:
+            await refiner.close()
+
+    scores, stats = asyncio.run(with_fake_server(run, fail_rate=1.0))
+    assert scores == [7, 7, 7, 7]
+    assert stats["requests"] == 2  # no calls once the circuit is open
+    assert stats["fallbacks"] == 4
+    assert stats["circuit"] == "open"
@@ -0,0 +1,53 @@
+# tests/test_larger_dataset.py
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+
+from database.larger_dataset import COLUMNS, generate_dataset, parse_mix
+
+ROWS = 2500
+SHARD_ROWS = 1000
+
+
+def _generate(directory, file_format="csv", workers=1, **kwargs):
+    return generate_dataset(ROWS, str(directory), seed=7, shard_rows=SHARD_ROWS,
+                            file_format=file_format, workers=workers, **kwargs)
+
+
+def _shards(directory, manifest):
+    return [(directory / entry["file"]).read_bytes() for entry in manifest["shards"]]
+
+
+def test_fixed_seed_gives_identical_shards(tmp_path):
+    first = _generate(tmp_path / "a")
+    second = _generate(tmp_path / "b", workers=2)
+    assert [s["rows"] for s in first["shards"]] == [1000, 1000, 500]
+    assert _shards(tmp_path / "a", first) == _shards(tmp_path / "b", second)
+
+    other = generate_dataset(ROWS, str(tmp_path / "c"), seed=8, shard_rows=SHARD_ROWS, workers=1)
+    assert _shards(tmp_path / "c", other) != _shards(tmp_path / "a", first)
+
+
+def test_parquet_and_csv_hold_the_same_rows(tmp_path):
+    csv_manifest = _generate(tmp_path / "csv")
+    parquet_manifest = _generate(tmp_path / "parquet", "parquet")
+
+    csv_rows = sum(pcsv.read_csv(tmp_path / "csv" / s["file"]).num_rows
+                   for s in csv_manifest["shards"])
+    parquet_tables = [pq.read_table(tmp_path / "parquet" / s["file"])
+                      for s in parquet_manifest["shards"]]
+    assert csv_rows == sum(t.num_rows for t in parquet_tables) == ROWS
+    assert parquet_tables[0].column_names == COLUMNS
+    assert parquet_manifest["shards"][0]["topics"] == csv_manifest["shards"][0]["topics"]
+
+
+def test_topic_mix_leaves_out_unlisted_topics(tmp_path):
+    manifest = generate_dataset(500, str(tmp_path), seed=1, shard_rows=500, workers=1,
+                                topic_mix=parse_mix("Hacking=3,Drugs=1"))
+    topics = manifest["shards"][0]["topics"]
+    assert set(t for t, n in topics.items() if n) == {"Hacking", "Drugs"}
+    assert topics["Hacking"] > topics["Drugs"]
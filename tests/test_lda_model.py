@@ -0,0 +1,61 @@
+# tests/test_lda_model.py
+
+import threading
+
+from ai_model.lda_model import NUM_TOPICS, TopicModel
+
+PAGES = ["cheap cocaine and lsd shipped worldwide", "ransomware builds with botnet access",
+         "credit card dumps and paypal fraud guides", "firearms and ammo without papers"] * 8
+
+
+def test_unfitted_model_is_uniform(tmp_path):
+    model = TopicModel(str(tmp_path / "topics.joblib"))
+    assert not model.fitted
+    assert (model.detect_topics(PAGES[:2]) == 1 / NUM_TOPICS).all()
+
+
+def test_update_swaps_in_a_fitted_copy(tmp_path):
+    model = TopicModel(str(tmp_path / "topics.joblib"))
+    model.update(PAGES)
+    first = model.lda
+    assert model.fitted and model.documents == len(PAGES)
+
+    model.update(PAGES)
+    assert model.lda is not first
+    assert model.version == 2
+    assert model.detect_topics(PAGES[:3]).shape == (3, NUM_TOPICS)
+
+
+def test_detection_does_not_wait_for_a_fit(tmp_path, monkeypatch):
+    model = TopicModel(str(tmp_path / "topics.joblib"))
+    model.update(PAGES)
+
+    fitting, release = threading.Event(), threading.Event()
+    original = type(model.lda).partial_fit
+
+    def slow_partial_fit(self, X, y=None):
+        fitting.set()
+        release.wait(5)
+        return original(self, X)
+
+    monkeypatch.setattr(type(model.lda), "partial_fit", slow_partial_fit)
+    worker = threading.Thread(target=model.update, args=(PAGES,))
+    worker.start()
+    try:
+        assert fitting.wait(5)
+        assert model.detect_topics(PAGES[:1]).shape == (1, NUM_TOPICS)
+        assert model.version == 1
+    finally:
+        release.set()
+        worker.join()
+    assert model.version == 2
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "topics.joblib")
+    model = TopicModel(path)
+    model.update(PAGES)
+    model.save()
+    loaded = TopicModel.load(path)
+    assert loaded.version == 1
+    assert (loaded.detect_topics(PAGES[:2]) == model.detect_topics(PAGES[:2])).all()
@@ -0,0 +1,26 @@
+# tests/test_metrics.py
+
+from utils.metrics import Registry
+
+
+def test_label_values_are_escaped():
+    metrics = Registry()
+    fetches = metrics.counter("scraper_fetches_total", "Fetches per host")
+    fetches.inc(host='evil"host\\x\nnext')
+    assert 'scraper_fetches_total{host="evil\\"host\\\\x\\nnext"} 1' in metrics.render()
+
+
+def test_histogram_labels_are_escaped():
+    metrics = Registry()
+    latency = metrics.histogram("stage_seconds", "Stage latency\nper stage", buckets=(1,))
+    latency.observe(0.5, stage='fetch "a"')
+    rendered = metrics.render()
+    assert "# HELP stage_seconds Stage latency\\nper stage" in rendered
+    assert 'stage_seconds_bucket{stage="fetch \\"a\\"",le="1"} 1' in rendered
+    assert len(rendered.splitlines()) == 6
+
+
+def test_plain_labels_are_unchanged():
+    metrics = Registry()
+    metrics.gauge("queue_depth", "Queued pages").set(3, stage="score")
+    assert 'queue_depth{stage="score"} 3' in metrics.render()
@@ -0,0 +1,53 @@
+# tests/test_model_registry.py
+
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("safetensors")
+
+from ai_model.model_registry import load_state_dict, save_state_dict, weights_path
+from ai_model.score_cache import model_version
+
+
+def test_bin_is_used_without_safetensors(tmp_path):
+    checkpoint = str(tmp_path / "pytorch_model.bin")
+    state = {"classifier.weight": torch.zeros(2, 3)}
+    torch.save(state, checkpoint)
+    assert weights_path(checkpoint) == checkpoint
+    assert torch.equal(load_state_dict(checkpoint)["classifier.weight"], state["classifier.weight"])
+
+
+def test_safetensors_is_preferred(tmp_path):
+    from safetensors.torch import save_file
+
+    checkpoint = str(tmp_path / "pytorch_model.bin")
+    torch.save({"classifier.weight": torch.zeros(2, 3)}, checkpoint)
+    save_file({"classifier.weight": torch.ones(2, 3)}, str(tmp_path / "model.safetensors"))
+    assert weights_path(checkpoint) == str(tmp_path / "model.safetensors")
+    assert torch.equal(load_state_dict(checkpoint)["classifier.weight"], torch.ones(2, 3))
+
+
+def test_safetensors_only_retrain_changes_the_version(tmp_path):
+    from safetensors.torch import save_file
+
+    checkpoint = str(tmp_path / "pytorch_model.bin")
+    save_file({"classifier.weight": torch.zeros(2, 3)}, str(tmp_path / "model.safetensors"))
+    before = model_version(weights_path(checkpoint))
+    assert before != "unknown"
+
+    save_file({"classifier.weight": torch.zeros(4, 3)}, str(tmp_path / "model.safetensors"))
+    assert model_version(weights_path(checkpoint)) != before
+
+
+def test_save_state_dict_writes_both_files(tmp_path):
+    checkpoint = str(tmp_path / "pytorch_model.bin")
+    new = {"classifier.weight": torch.ones(3, 2).t()}
+    save_state_dict(new, checkpoint)
+
+    assert os.path.exists(tmp_path / "model.safetensors")
+    assert torch.equal(load_state_dict(checkpoint)["classifier.weight"], new["classifier.weight"])
+    assert torch.equal(torch.load(checkpoint, weights_only=True)["classifier.weight"],
+                       new["classifier.weight"])
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
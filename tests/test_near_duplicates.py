@@ -0,0 +1,67 @@
+# tests/test_near_duplicates.py
+
+import numpy as np
+
+from ai_model.near_duplicates import NearDuplicateIndex, minhash
+
+WORDS = [f"w{i}" for i in range(5000)]
+
+
+def _page(seed, words=300):
+    rng = np.random.default_rng(seed)
+    return " ".join(rng.choice(WORDS, words))
+
+
+def _edited(text, every=60):
+    words = text.split()
+    return " ".join("edited" if i % every == 0 else w for i, w in enumerate(words))
+
+
+def test_near_duplicate_hit_and_distinct_miss():
+    index = NearDuplicateIndex()
+    page = _page(0)
+    cluster = index.new_cluster(minhash(page), 7.5, "Drugs")
+
+    assert index.query(minhash(_edited(page))) == cluster
+    assert index.cluster_result(cluster) == (7.5, "Drugs")
+    assert index.query(minhash(_page(1))) is None
+
+
+def test_insert_then_query():
+    index = NearDuplicateIndex()
+    page, mirror = _page(2), _page(3)
+    cluster = index.new_cluster(minhash(page), 3.0, "Weapons")
+    index.insert(minhash(mirror), cluster)
+    assert index.query(minhash(_edited(mirror))) == cluster
+    assert index.stats()["documents"] == 2
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "near_duplicates.npz")
+    index = NearDuplicateIndex(path, version="v1")
+    pages = [_page(seed) for seed in range(5)]
+    clusters = [index.new_cluster(minhash(p), float(i), f"Topic_{i % 2}")
+                for i, p in enumerate(pages)]
+    index.update_score(clusters[3], 9.0)
+    index.save()
+
+    loaded = NearDuplicateIndex.load(path, "v1")
+    assert loaded.stats() == index.stats()
+    for i, page in enumerate(pages):
+        assert loaded.query(minhash(_edited(page))) == clusters[i]
+    assert loaded.cluster_result(clusters[3]) == (9.0, "Topic_1")
+    assert loaded.new_cluster(minhash(_page(9)), 1.0, "Topic_0") == len(pages)
+
+
+def test_version_change_discards_clusters(tmp_path):
+    path = str(tmp_path / "near_duplicates.npz")
+    index = NearDuplicateIndex(path, version="model-a/keyword-x")
+    page = _page(4)
+    index.new_cluster(minhash(page), 8.0, "Drugs")
+    index.save()
+
+    assert NearDuplicateIndex.load(path, "model-a/keyword-x").query(minhash(page)) == 0
+    fresh = NearDuplicateIndex.load(path, "model-b/keyword-x")
+    assert fresh.query(minhash(page)) is None
+    assert fresh.stats() == {"documents": 0, "clusters": 0, "band_keys": 0}
+    assert fresh.version == "model-b/keyword-x"
@@ -0,0 +1,93 @@
+# tests/test_neo4j_graph.py
+
+import pytest
+
+pytest.importorskip("neo4j")
+
+from database.neo4j_graph import (SCHEMA_QUERIES, UPSERT_POSTS, GraphWriter, RecordingDriver,
+                                  rows_dropped)
+
+
+class FlakyDriver(RecordingDriver):
+    """Raises on the first `failures` write transactions."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def session(self, **_):
+        session = super().session()
+        execute_write = session.execute_write
+
+        def flaky(work, *args, **kwargs):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("bolt connection lost")
+            return execute_write(work, *args, **kwargs)
+
+        session.execute_write = flaky
+        return session
+
+
+def test_batch_is_one_unwind_query():
+    recorder = RecordingDriver()
+    writer = GraphWriter(recorder, batch_size=3, flush_interval=3600)
+    writer.add("alice", "p1", "old text", 3, "Drugs", "market")
+    writer.add("bob", "p2", "guns", 9, "Weapons", "forum")
+    writer.add("alice", "p1", "new text", 5, "Drugs", "market")
+    writer.close()
+
+    assert [query for query, _ in recorder.queries] == SCHEMA_QUERIES + [UPSERT_POSTS]
+    assert recorder.transactions == 1
+    _, params = recorder.queries[-1]
+    assert params == {"rows": [
+        {"username": "alice", "post_id": "p1", "content": "new text", "score": 5,
+         "topic": "Drugs", "forum_name": "market"},
+        {"username": "bob", "post_id": "p2", "content": "guns", "score": 9,
+         "topic": "Weapons", "forum_name": "forum"},
+    ]}
+    assert writer.written == 2
+
+
+def test_schema_is_ensured_once():
+    recorder = RecordingDriver()
+    writer = GraphWriter(recorder, batch_size=1, flush_interval=3600)
+    writer.add("alice", "p1", "a", 1, "Drugs", "market")
+    writer.add("bob", "p2", "b", 2, "Drugs", "market")
+    writer.close()
+    queries = [query for query, _ in recorder.queries]
+    assert queries == SCHEMA_QUERIES + [UPSERT_POSTS, UPSERT_POSTS]
+
+
+def test_failed_batch_is_requeued():
+    driver = FlakyDriver(failures=1)
+    writer = GraphWriter(driver, batch_size=100, flush_interval=3600)
+    writer.add("alice", "p1", "old", 3, "Drugs", "market")
+    with pytest.raises(ConnectionError):
+        writer.flush()
+    assert writer.failed == 1 and writer.written == 0
+
+    writer.add("alice", "p1", "newer", 4, "Drugs", "market")
+    writer.add("bob", "p2", "b", 2, "Drugs", "market")
+    writer.close()
+    _, params = driver.queries[-1]
+    assert [(row["post_id"], row["content"]) for row in params["rows"]] == \
+        [("p1", "newer"), ("p2", "b")]
+    assert writer.written == 2
+
+
+def test_add_survives_an_outage_and_caps_the_buffer():
+    driver = FlakyDriver(failures=10 ** 6)
+    writer = GraphWriter(driver, batch_size=2, flush_interval=3600, max_buffered=3)
+    for i in range(6):
+        writer.add(f"user{i}", f"p{i}", "text", i, "Drugs", "market")
+
+    assert writer.failed == 1          # later adds wait for the retry interval
+    assert writer.dropped == 3
+    assert list(writer._buffer) == ["p3", "p4", "p5"]
+
+    driver.failures = 0
+    writer.close()
+    _, params = driver.queries[-1]
+    assert [row["post_id"] for row in params["rows"]] == ["p3", "p4", "p5"]
+    assert writer.written == 3
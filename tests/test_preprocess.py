@@ -0,0 +1,53 @@
+# tests/test_preprocess.py
+
+import numpy as np
+
+from utils.preprocess import (KeywordMatcher, _legacy_threat_score, classify_texts,
+                              compute_threat_score)
+
+SINGLE_WORD_PAIRS = {"lsd": "drugs", "cocaine": "", "phishing": "hacking", "botnets": "",
+                     "trojans": "malware", "knives": "weapons"}
+MULTI_WORD_PAIRS = {"credit card dump": "", "zero-day exploit": "hacking",
+                    "skimming": "financial fraud"}
+FILLER = ["selling", "cheap", "the", "best", "drugs", "hacking", "malware", "weapons",
+          "forum", "vendor", "escrow"]
+
+
+def _corpus(size=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = list(SINGLE_WORD_PAIRS) + FILLER
+    return [" ".join(rng.choice(vocabulary, rng.integers(1, 25))) for _ in range(size)]
+
+
+def test_single_word_entries_match_the_legacy_scorer():
+    matcher = KeywordMatcher(SINGLE_WORD_PAIRS)
+    corpus = _corpus()
+    legacy = [_legacy_threat_score(s, SINGLE_WORD_PAIRS) for s in corpus]
+    assert matcher.scores(corpus).tolist() == legacy
+    assert sum(legacy) > 0
+    assert [compute_threat_score(s, SINGLE_WORD_PAIRS) for s in corpus[:50]] == legacy[:50]
+
+
+def test_multi_word_entries_score_where_the_legacy_scorer_could_not():
+    pairs = {**SINGLE_WORD_PAIRS, **MULTI_WORD_PAIRS}
+    matcher = KeywordMatcher(pairs)
+    cases = {
+        # (sentence, legacy score, matcher score)
+        "fresh credit card dump for sale": (0, 1),
+        "hacking zero-day exploit kit": (0, 1),
+        "zero-day exploit kit": (0, 0),                # activity must precede
+        "financial fraud skimming rigs": (0, 1),
+        "fraud skimming rigs": (0, 0),
+        "drugs lsd and cocaine with credit card dump": (2, 3),
+    }
+    for sentence, (legacy, compiled) in cases.items():
+        assert _legacy_threat_score(sentence, pairs) == legacy, sentence
+        assert matcher.count(sentence) == compiled, sentence
+
+
+def test_classify_texts_thresholds_scores():
+    matcher = KeywordMatcher(SINGLE_WORD_PAIRS)
+    scores, is_threat = classify_texts(["cocaine " * 6, "cocaine botnets", "nothing here"],
+                                       matcher, threshold=2)
+    assert scores.tolist() == [6, 2, 0]
+    assert is_threat.tolist() == [True, True, False]
@@ -0,0 +1,48 @@
+# tests/test_record_store.py
+
+import json
+import os
+
+import pytest
+
+from database import record_store
+from database.record_store import RecordStore, iter_records, migrate_json
+
+
+def legacy_file(tmp_path, count):
+    path = tmp_path / "scraped_data.json"
+    path.write_text(json.dumps([{"url": f"u{i}", "score": i} for i in range(count)]))
+    return str(path)
+
+
+def test_append_and_read_back(tmp_path):
+    store = RecordStore(str(tmp_path / "store"), segment_bytes=200)
+    for i in range(20):
+        store.append({"url": f"u{i}", "score": i})
+    store.close()
+    assert [r["score"] for r in iter_records(str(tmp_path / "store"))] == list(range(20))
+    assert len(os.listdir(tmp_path / "store")) > 1
+
+
+def test_interrupted_migration_is_redone(tmp_path, monkeypatch):
+    source = legacy_file(tmp_path, 10)
+    directory = str(tmp_path / "scraped_data")
+
+    appended = []
+    original = RecordStore.append
+
+    def crash_midway(self, record):
+        if len(appended) == 4:
+            raise KeyboardInterrupt
+        appended.append(record)
+        original(self, record)
+
+    monkeypatch.setattr(record_store.RecordStore, "append", crash_midway)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_json(source, directory)
+    assert not os.path.isdir(directory)
+
+    monkeypatch.undo()
+    assert migrate_json(source, directory) == 10
+    assert [r["url"] for r in iter_records(directory)] == [f"u{i}" for i in range(10)]
+    assert not os.path.exists(directory + ".migrating")
@@ -0,0 +1,90 @@
+# tests/test_revisit_scheduler.py
+
+from ai_model.scraping.revisit_scheduler import INITIAL_INTERVAL_SECONDS, RevisitScheduler
+
+URLS = [f"http://site{i}.onion/" for i in range(5)]
+
+
+def test_due_returns_most_overdue_first():
+    scheduler = RevisitScheduler(budget_per_minute=100)
+    scheduler.set_targets(URLS, now=0.0)
+    assert len(scheduler.due(now=0.0)) == len(URLS)
+    # Visited in reverse order with the same interval: URLS[4] is due first
+    for step, url in enumerate(reversed(URLS)):
+        scheduler.record(url, now=10.0 * step)
+
+    assert scheduler.due(now=INITIAL_INTERVAL_SECONDS - 1) == []
+    assert scheduler.due(now=10 ** 4) == list(reversed(URLS))
+
+
+def test_in_flight_urls_are_not_handed_out_twice():
+    scheduler = RevisitScheduler(budget_per_minute=100)
+    scheduler.set_targets(URLS, now=0.0)
+    assert sorted(scheduler.due(now=0.0)) == sorted(URLS)
+    assert scheduler.due(now=10 ** 6) == []
+    scheduler.release(now=0.0)
+    assert scheduler.stats(now=0.0)["fetches"] == len(URLS)
+
+
+def test_budget_limits_each_call_and_refills():
+    scheduler = RevisitScheduler(budget_per_minute=3)
+    scheduler.set_targets(URLS, now=0.0)
+    assert len(scheduler.due(now=0.0)) == 3
+    assert scheduler.due(now=0.0) == []
+    assert scheduler.next_due_in(now=0.0) > 0
+    # 40 s refill two of the three tokens
+    assert len(scheduler.due(now=40.0)) == 2
+
+
+def _visit(scheduler, url, changed, visits, score=None):
+    now = 0.0
+    for _ in range(visits):
+        scheduler.record(url, changed=changed, score=score, now=now)
+        now = scheduler.next_visit[scheduler.ids[url]]
+    return scheduler.interval[scheduler.ids[url]]
+
+
+def test_record_backs_off_static_pages_and_speeds_up_changing_ones():
+    scheduler = RevisitScheduler(budget_per_minute=100)
+    scheduler.set_targets(URLS[:3], now=0.0)
+    static = _visit(scheduler, URLS[0], changed=False, visits=20)
+    changing = _visit(scheduler, URLS[1], changed=True, visits=20)
+    assert static > INITIAL_INTERVAL_SECONDS
+    assert changing < INITIAL_INTERVAL_SECONDS
+    assert changing == scheduler.min_interval
+
+    # A high threat score shortens the interval for the same history
+    risky = _visit(scheduler, URLS[2], changed=False, visits=20, score=10)
+    assert risky < static
+
+
+def test_failures_back_off_exponentially():
+    scheduler = RevisitScheduler(budget_per_minute=100)
+    scheduler.set_targets(URLS[:1], now=0.0)
+    scheduler.record(URLS[0], now=0.0)
+    base = scheduler.interval[0]
+    scheduler.record(URLS[0], failed=True, now=0.0)
+    assert scheduler.next_visit[0] == 2 * base
+    scheduler.record(URLS[0], failed=True, now=0.0)
+    assert scheduler.next_visit[0] == 4 * base
+    scheduler.record(URLS[0], changed=True, now=10.0)
+    assert scheduler.failures[0] == 0
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "revisit_state.npz")
+    scheduler = RevisitScheduler(path, budget_per_minute=100)
+    scheduler.set_targets(URLS, now=0.0)
+    for url in scheduler.due(now=0.0):
+        scheduler.record(url, changed=url.endswith("1.onion/"), score=5, now=0.0)
+    scheduler.set_targets(URLS[:4], now=0.0)
+    scheduler.save()
+
+    loaded = RevisitScheduler.load(path, budget_per_minute=100)
+    assert loaded.urls == scheduler.urls
+    count = len(URLS)
+    for field in ("next_visit", "interval", "score", "failures", "active"):
+        assert (getattr(loaded, field)[:count] == getattr(scheduler, field)[:count]).all()
+    assert loaded.fetches == scheduler.fetches
+    # Inactive targets stay out of the heap
+    assert sorted(loaded.due(now=10 ** 6)) == sorted(URLS[:4])
@@ -0,0 +1,89 @@
+# tests/test_rl_model.py
+
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from ai_model import rl_model
+from ai_model.rl_model import ACTIONS, ALPHA, STATE_BINS, QTable
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setattr(rl_model, "SNAPSHOT_EVERY", 10 ** 9)
+    monkeypatch.setattr(rl_model, "SNAPSHOT_INTERVAL_SECONDS", 10 ** 9)
+    return QTable(str(tmp_path / "q_table.json"))
+
+
+def test_adjust_moves_scores_by_an_action(table):
+    np.random.seed(0)
+    scores = [0.0, 4.2, 9.9, 10.0]
+    new_scores, actions, rewards = table.adjust(scores, ["Drugs", "Drugs", "Hacking", "Other"])
+    assert np.allclose(new_scores, np.clip(np.array(scores) + np.array(ACTIONS)[actions], 0, 10))
+    assert set(rewards.tolist()) <= {-1, 0, 1}
+    assert set(table.topic_ids) == {"Drugs", "Hacking", "Other"}
+
+
+def test_repeated_states_in_one_batch_all_count(table, monkeypatch):
+    monkeypatch.setattr(rl_model, "EPSILON", 0.0)
+    np.random.seed(1)
+    _, actions, rewards = table.adjust([5.0, 5.0, 5.0], ["Drugs"] * 3)
+    # Greedy on an all-zero table picks action 0 for each; from zero values
+    # every update is ALPHA * reward, and all three must accumulate
+    assert actions.tolist() == [0, 0, 0]
+    bin_index = int(5.0 / (10 / STATE_BINS))
+    value = table.values[bin_index, table.topic_ids["Drugs"], 0]
+    assert value == pytest.approx(ALPHA * rewards.sum())
+
+
+def test_snapshot_round_trip(table):
+    np.random.seed(2)
+    for _ in range(20):
+        table.adjust(np.random.uniform(0, 10, 8), ["Drugs", "Weapons"] * 4)
+    table.snapshot()
+    assert not os.path.exists(table.path + ".tmp")
+
+    loaded = QTable(table.path)
+    for topic, topic_id in table.topic_ids.items():
+        assert np.allclose(loaded.values[:, loaded.topic_ids[topic]], table.values[:, topic_id])
+
+
+def test_loads_legacy_json(tmp_path):
+    path = tmp_path / "q_table.json"
+    path.write_text(json.dumps({"3_Drugs": [0.1, 0.0, -0.2],
+                                "20_Financial_Fraud": [0.0, 0.5, 0.0]}), encoding="utf-8")
+    table = QTable(str(path))
+    assert table.values[3, table.topic_ids["Drugs"]].tolist() == [0.1, 0.0, -0.2]
+    assert table.values[20, table.topic_ids["Financial_Fraud"]].tolist() == [0.0, 0.5, 0.0]
+
+    table.snapshot()
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "3_Drugs": [0.1, 0.0, -0.2], "20_Financial_Fraud": [0.0, 0.5, 0.0]}
+
+
+def test_concurrent_adjust(table):
+    topics = [f"Topic_{i}" for i in range(40)]
+    errors = []
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(50):
+                batch = rng.choice(topics, 4).tolist()
+                table.adjust(rng.uniform(0, 10, 4), batch)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert table._dirty == 8 * 50 * 4
+    assert sorted(table.topic_ids.values()) == list(range(len(table.topic_ids)))
+    assert table.values.shape[1] >= len(table.topic_ids)
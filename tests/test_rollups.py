@@ -0,0 +1,61 @@
+# tests/test_rollups.py
+
+import warnings
+from datetime import datetime, timezone
+
+from database.rollups import TrendRollups, observations
+
+
+def test_backfill_skips_heartbeats():
+    records = [
+        {"url": "a", "timestamp": "2025-03-01 10:00:05", "score": 8, "topic": "Drugs"},
+        {"url": "a", "timestamp": "2025-03-01 10:00:35", "score": 8, "topic": "Drugs",
+         "status": "unchanged"},
+        {"url": "b", "timestamp": "2025-03-01 10:00:50", "score": 2, "topic": "Other"},
+    ]
+    (_, count, mean, peak, _), = TrendRollups.from_records(records).series("minute")
+    assert count == 2
+    assert mean == 5.0
+    assert peak == 8.0
+
+
+def test_refinement_replaces_the_original_score():
+    records = [
+        {"url": "a", "timestamp": "2025-03-01 10:00:05", "score": 6, "topic": "Drugs"},
+        {"url": "b", "timestamp": "2025-03-01 10:00:20", "score": 2, "topic": "Other"},
+        {"url": "a", "timestamp": "2025-03-01 10:00:05", "score": 9, "topic": "Drugs",
+         "status": "refined"},
+        {"url": "c", "timestamp": "2025-03-01 10:00:40", "score": 8, "topic": "Other",
+         "status": "refined"},
+    ]
+    rollups = TrendRollups.from_records(records)
+    (_, count, mean, peak, _), = rollups.series("minute")
+    assert (count, mean, peak) == (2, 5.5, 9.0)
+    (_, count, mean, peak, _), = rollups.series("hour", "Drugs")
+    assert (count, mean, peak) == (1, 9.0, 9.0)
+
+
+def test_lowering_the_peak_recomputes_it():
+    rollups = TrendRollups()
+    rollups.add("2025-03-01 10:00:05", 9, "Drugs")
+    rollups.add("2025-03-01 10:00:06", 4, "Drugs")
+    rollups.replace("2025-03-01 10:00:05", 9, 5, "Drugs")
+    (_, count, mean, peak, _), = rollups.series("minute")
+    assert (count, mean, peak) == (2, 4.5, 5.0)
+
+
+def test_observations_pair_refinements_with_their_record():
+    records = [
+        {"url": "a", "timestamp": "t1", "score": 6},
+        {"url": "a", "timestamp": "t2", "score": 6, "status": "unchanged"},
+        {"url": "a", "timestamp": "t1", "score": 8, "status": "refined"},
+    ]
+    assert [(r["score"], previous) for r, previous in observations(records)] == [(6, None), (8, 6)]
+
+
+def test_series_starts_are_utc_datetimes():
+    records = [{"url": "a", "timestamp": "2025-03-01 10:00:05", "score": 8, "topic": "Drugs"}]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        (start, *_), = TrendRollups.from_records(records).series("minute")
+    assert start == datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
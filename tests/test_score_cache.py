@@ -0,0 +1,69 @@
+# tests/test_score_cache.py
+
+from ai_model.score_cache import ScoreCache
+
+
+def test_model_scores_come_back_as_ints(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"), "v1")
+    cache.put("queue page", 7, "Drugs")
+    cache.put("refined page", 7.25, "Hacking")
+
+    score, topic = cache.get("queue page")
+    assert score == 7 and isinstance(score, int)
+    assert topic == "Drugs"
+    assert cache.get("refined page") == (7.25, "Hacking")
+
+
+def test_version_change_misses(tmp_path):
+    path = str(tmp_path / "scores.db")
+    ScoreCache(path, "v1").put("page", 3, "Other")
+    assert ScoreCache(path, "v2").get("page") is None
+
+
+def test_tags_keep_scorers_apart(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"), "v1")
+    cache.put("page", 2.0, "Other", tag="keyword-a")
+    assert cache.get("page") is None
+    assert cache.get("page", tag="keyword-b") is None
+    assert cache.get("page", tag="keyword-a") == (2, "Other")
+
+
+def _last_access(path):
+    import sqlite3
+
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT key, last_access FROM scores"))
+
+
+def test_hits_do_not_write_until_flush(tmp_path):
+    path = str(tmp_path / "scores.db")
+    cache = ScoreCache(path, "v1")
+    cache.put("page", 4, "Drugs")
+    before = _last_access(path)
+
+    assert cache.get("page") == (4, "Drugs")
+    assert _last_access(path) == before
+    cache.flush()
+    (key,) = before
+    assert _last_access(path)[key] > before[key]
+
+
+def test_eviction_runs_every_n_puts(tmp_path):
+    path = str(tmp_path / "scores.db")
+    cache = ScoreCache(path, "v1", max_entries=3, evict_every=5)
+    for i in range(4):
+        cache.put(f"page {i}", i, "Other")
+    assert len(_last_access(path)) == 4
+
+    cache.get("page 0")  # recently used, so it survives
+    cache.put("page 4", 4, "Other")
+    assert len(_last_access(path)) == 3
+    assert cache.get("page 0") == (0, "Other")
+    assert cache.get("page 1") is None and cache.get("page 2") is None
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"), "v1", ttl=-1)
+    cache.put("page", 4, "Drugs")
+    assert cache.get("page") is None
+    assert cache.stats()["misses"] == 1
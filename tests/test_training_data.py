@@ -0,0 +1,59 @@
+# tests/test_training_data.py
+
+import csv
+
+import pytest
+
+pytest.importorskip("torch")
+
+from ai_model.cpu_inference import validation_split
+from ai_model.training_data import LazyTextDataset, index_csv, split_rows
+
+
+@pytest.fixture
+def dataset_csv(tmp_path):
+    path = tmp_path / "threats.csv"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["activity", "synthetic_text", "final_score"])
+        for i in range(200):
+            writer.writerow(["Drugs", f'post {i}, "quoted"\nsecond line', i % 11 + 0.4])
+    return str(path)
+
+
+def test_validation_split_matches_training_split(dataset_csv):
+    texts, labels = validation_split(dataset_csv)
+    index = index_csv(dataset_csv)
+    _, val_rows = split_rows(len(index["offsets"]))
+
+    assert len(texts) == len(val_rows) > 0
+    assert texts == [f'post {i}, "quoted"\nsecond line' for i in val_rows]
+    assert labels == [i % 11 for i in val_rows]
+
+
+def test_validation_rows_are_held_out(dataset_csv):
+    index = index_csv(dataset_csv)
+    train_rows, val_rows = split_rows(len(index["offsets"]))
+    assert not set(train_rows) & set(val_rows)
+    train = LazyTextDataset(dataset_csv, index, train_rows, None)
+    texts, _ = validation_split(dataset_csv)
+    assert not set(texts) & {train.text(i) for i in range(len(train))}
+
+
+def test_imports_without_resource_module(monkeypatch):
+    import builtins
+    import importlib
+    import sys
+
+    real_import = builtins.__import__
+
+    def no_resource(name, *args, **kwargs):
+        if name == "resource":
+            raise ImportError("No module named 'resource'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_resource)
+    monkeypatch.delitem(sys.modules, "ai_model.training_data")
+    module = importlib.import_module("ai_model.training_data")
+    pytest.importorskip("psutil")
+    assert module.peak_rss_mb() > 0
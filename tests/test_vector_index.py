@@ -0,0 +1,45 @@
+# tests/test_vector_index.py
+
+import numpy as np
+
+from ai_model.vector_index import EmbeddingIndex
+
+
+def _unit(rng, count, dim=16):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_reload_keeps_saved_rows(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng, 10)
+    index = EmbeddingIndex(str(tmp_path), dim=16)
+    index.add([f"doc-{i}" for i in range(10)], vectors)
+    index.save()
+
+    reloaded = EmbeddingIndex(str(tmp_path), dim=16)
+    assert reloaded.keys == [f"doc-{i}" for i in range(10)]
+    assert np.allclose(reloaded.vector("doc-3"), vectors[3], atol=1e-3)
+
+
+def test_rows_after_last_save_are_dropped(tmp_path):
+    rng = np.random.default_rng(1)
+    index = EmbeddingIndex(str(tmp_path), dim=16)
+    index.add([f"doc-{i}" for i in range(5)], _unit(rng, 5))
+    index.save()
+    # Crash after the keys reached disk but before the next save
+    index.add([f"late-{i}" for i in range(3)], _unit(rng, 3))
+    index._keys_file.flush()
+
+    reloaded = EmbeddingIndex(str(tmp_path), dim=16)
+    assert len(reloaded) == 5
+    assert "late-0" not in reloaded.rows
+    with open(tmp_path / "keys.txt", encoding="utf-8") as file:
+        assert file.read().splitlines() == [f"doc-{i}" for i in range(5)]
+
+    vector = _unit(rng, 1)
+    reloaded.add(["fresh"], vector)
+    assert reloaded.rows["fresh"] == 5
+    assert reloaded.find_similar("fresh", k=1, encode_fn=None)[0][0] != "fresh"
+    rows, _ = reloaded.search(vector, k=1)
+    assert reloaded.keys[rows[0][0]] == "fresh"
@@ -0,0 +1,100 @@
+# tests/test_windowing.py
+
+import pytest
+import torch
+
+from ai_model.batching import predict_batch
+from ai_model.windowing import (AGGREGATIONS, plant, planted_recall, predict_windows,
+                                window_spans)
+
+THREAT_WORDS = {"ransomware", "carding", "exploit"}
+THREATS = ["selling ransomware builds", "fresh carding tutorials", "private exploit kit"]
+# ~3000 tokens: fits in MAX_WINDOWS windows, as in the windowing benchmark
+FILLER = " ".join(f"benign{i % 97} word" for i in range(1500))
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with the parts of the HF interface the scorers use."""
+    pad_token_id, cls_token_id, sep_token_id = 0, 1, 2
+
+    def __init__(self):
+        self.vocab = {}
+
+    def ids(self, text):
+        return [self.vocab.setdefault(word, len(self.vocab) + 3) for word in text.split()]
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None,
+                 padding=None, return_tensors=None):
+        batch = [self.ids(text) for text in texts]
+        if add_special_tokens:
+            if truncation:
+                batch = [ids[:max_length - 2] for ids in batch]
+            batch = [[self.cls_token_id] + ids + [self.sep_token_id] for ids in batch]
+        if return_tensors != "pt":
+            return {"input_ids": batch}
+        longest = max(len(ids) for ids in batch)
+        input_ids = torch.zeros((len(batch), longest), dtype=torch.long)
+        for row, ids in enumerate(batch):
+            input_ids[row, :len(ids)] = torch.tensor(ids)
+        return {"input_ids": input_ids, "attention_mask": (input_ids != 0).long()}
+
+
+class KeywordModel:
+    """Scores a window 9 if it contains a threat word, else 1."""
+
+    def __init__(self, tokenizer):
+        self.threat_ids = torch.tensor(tokenizer.ids(" ".join(sorted(THREAT_WORDS))))
+
+    def __call__(self, input_ids, attention_mask, mpnet_emb):
+        logits = torch.zeros((len(input_ids), 11))
+        hit = torch.isin(input_ids, self.threat_ids).any(dim=1)
+        logits[hit, 9] = 5.0
+        logits[~hit, 1] = 5.0
+        return {"logits": logits}
+
+
+def encode(texts, batch_size):
+    return torch.zeros((len(texts), 4))
+
+
+@pytest.fixture
+def scorer():
+    tokenizer = WordTokenizer()
+    return KeywordModel(tokenizer), tokenizer
+
+
+def test_spans_cover_the_whole_page():
+    spans = window_spans(10000)
+    assert spans[0][0] == 0 and spans[-1][1] == 10000
+    assert len(spans) == 8
+    assert window_spans(100) == [(0, 100)]
+
+
+def test_plant_buries_threat_late_in_the_page():
+    page = plant("selling ransomware builds", FILLER, 0.9)
+    assert 0.85 < page.index("ransomware") / len(page) < 0.95
+
+
+def test_truncation_misses_planted_threats(scorer):
+    model, tokenizer = scorer
+    recall = planted_recall(lambda batch: predict_batch(model, tokenizer, batch, encode_fn=encode),
+                            THREATS, FILLER)
+    assert recall == 0.0
+
+
+@pytest.mark.parametrize("method", ["max", "attention"])
+@pytest.mark.parametrize("position", [0.1, 0.5, 0.9, 1.0])
+def test_windows_recall_planted_threats(scorer, method, position):
+    model, tokenizer = scorer
+
+    def windowed(batch):
+        return predict_windows(model, tokenizer, batch, method, encode_fn=encode)
+
+    assert planted_recall(windowed, THREATS, FILLER, position=position) == 1.0
+
+
+def test_benign_pages_stay_low(scorer):
+    model, tokenizer = scorer
+    for method in AGGREGATIONS:
+        assert predict_windows(model, tokenizer, [FILLER, "short benign page"], method,
+                               encode_fn=encode) == [1, 1]
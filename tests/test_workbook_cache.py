@@ -0,0 +1,61 @@
+# tests/test_workbook_cache.py
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from utils.workbook_cache import load_workbook
+
+
+def _write(path, rows):
+    pd.DataFrame({"activity": ["Drugs"] * rows, "sub-activity": [f"item {i}" for i in range(rows)]}
+                 ).to_excel(path, sheet_name="Sheet1", index=False)
+
+
+def _parquet_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".parquet")]
+
+
+def test_cache_is_reused_while_the_workbook_is_unchanged(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    source, cache = str(tmp_path / "dataset.xlsx"), str(tmp_path / "cache")
+    _write(source, 3)
+    first = load_workbook(source, "Sheet1", cache)
+    assert len(_parquet_files(cache)) == 1
+
+    def no_excel(*args, **kwargs):
+        raise AssertionError("workbook re-read")
+
+    monkeypatch.setattr(pd, "read_excel", no_excel)
+    pd.testing.assert_frame_equal(load_workbook(source, "Sheet1", cache), first)
+
+    # Touched but identical: the content hash keeps the cached copy
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    pd.testing.assert_frame_equal(load_workbook(source, "Sheet1", cache), first)
+
+
+def test_changed_workbook_is_converted_again(tmp_path):
+    pytest.importorskip("pyarrow")
+    source, cache = str(tmp_path / "dataset.xlsx"), str(tmp_path / "cache")
+    _write(source, 3)
+    assert len(load_workbook(source, "Sheet1", cache)) == 3
+
+    # New content with a different size and mtime
+    stat = os.stat(source)
+    _write(source, 5)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert len(load_workbook(source, "Sheet1", cache)) == 5
+
+
+def test_without_pyarrow_the_workbook_is_read_directly(tmp_path, monkeypatch):
+    source, cache = str(tmp_path / "dataset.xlsx"), str(tmp_path / "cache")
+    _write(source, 4)
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    df = load_workbook(source, "Sheet1", cache)
+    assert df["sub-activity"].tolist() == [f"item {i}" for i in range(4)]
+    assert not os.path.exists(cache)